@@ -1,8 +1,8 @@
-"""Monitoring endpoints: root redirect, health check, logger control, Prometheus metrics, and custom API docs."""
+"""Monitoring endpoints: root redirect, health check, logger control, Prometheus metrics, LLM usage, and custom API docs."""
 
 from __future__ import annotations
 
-from fastapi import APIRouter, FastAPI, Request, Response, status
+from fastapi import APIRouter, FastAPI, Query, Request, Response, status
 from fastapi.responses import RedirectResponse
 from loguru import logger
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
@@ -11,6 +11,7 @@ from app.apis.monitor.service import CustomDocsService
 from app.core.config import settings
 from app.core.extra.logger import configure_logger
 from app.core.responses import AppJSONResponse
+from app.services.llm import identity_usage
 
 from .models import LoggerLevelRequestParams
 
@@ -95,6 +96,31 @@ class MonitorRoutes:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    # LLM Usage per Identity
+    @staticmethod
+    @monitor_router.get(
+        "/usage",
+        summary="LLM Usage per Identity",
+        description=(
+            "Token usage and estimated cost of the heaviest rate-limit identities "
+            "(hashed) served by this worker, among the "
+            "`LLM_USAGE_MAX_IDENTITIES` most recently active."
+        ),
+        response_class=AppJSONResponse,
+        response_description="Per-identity usage, highest cost first",
+        status_code=status.HTTP_200_OK,
+    )
+    async def usage(
+        limit: int = Query(20, ge=1, le=1000, description="Identities to return."),
+    ) -> AppJSONResponse:
+        """Top identities by LLM cost in this worker."""
+        return AppJSONResponse(
+            data={"identities": identity_usage.top(limit)},
+            message="LLM usage per identity.",
+            status="success",
+            status_code=status.HTTP_200_OK,
+        )
+
     # Docs Setup
     @staticmethod
     def setup_docs(app: FastAPI, prefix: str | None = None) -> None:
@@ -5,6 +5,7 @@ from fastapi.routing import APIRouter
 from fastapi_limiter.depends import RateLimiter
 from fastapi_utils.cbv import cbv
 
+from app.core.middlewares.rate_limiter import token_or_ip_key
 from app.core.responses import AppJSONResponse, AppStreamingResponse
 
 from .models import ChatRequest, SummaryRequest, WebSearchChatRequest
@@ -62,7 +63,10 @@ class ChatRoute:
     ) -> AppStreamingResponse:
         """Stream chat tokens based on query parameters."""
         chat_request = WebSearchChatRequest(question=question, thread_id=thread_id)
-        data = await self.service.ask_service(request_params=chat_request)
+        identity = await token_or_ip_key(request)
+        data = await self.service.ask_service(
+            request_params=chat_request, identity=identity
+        )
 
         return AppStreamingResponse(data_stream=data)
 
@@ -83,7 +87,10 @@ class ChatRoute:
     ) -> AppStreamingResponse:
         """Stream chat tokens based on query parameters."""
         chat_request = WebSearchChatRequest(question=question, thread_id=thread_id)
-        data = await self.service.chat_websearch_service(request_params=chat_request)
+        identity = await token_or_ip_key(request)
+        data = await self.service.chat_websearch_service(
+            request_params=chat_request, identity=identity
+        )
 
         return AppStreamingResponse(data_stream=data)
 
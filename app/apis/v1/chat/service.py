@@ -12,6 +12,7 @@ from langchain_core.messages import AIMessageChunk, HumanMessage
 from loguru import logger
 
 from app import cache, celery_app
+from app.services.llm import UsageTracker, identity_label, usage_tracker_ctx_var
 from app.tasks.chat import generate_summary
 
 from ....workflows.graphs.rag import RagAgentGraph
@@ -75,8 +76,24 @@ class ChatService:
 
         return stream
 
+    @staticmethod
+    def _usage_event(tracker: UsageTracker) -> str:
+        """Format the per-request token usage as the final SSE frame.
+
+        The summary is logged with the caller's identity label, which metrics
+        do not carry; running totals per identity are served by ``GET /usage``.
+        """
+        summary = tracker.summary()
+        logger.info(
+            "LLM usage for {}: {} tokens, ${:.6f}",
+            identity_label(tracker.identity),
+            summary["total"]["total_tokens"],
+            summary["cost_usd"],
+        )
+        return f"event: usage\ndata: {json.dumps(summary)}\n\n"
+
     async def ask_service(
-        self, request_params: WebSearchChatRequest
+        self, request_params: WebSearchChatRequest, identity: str | None = None
     ) -> Callable[[], AsyncGenerator[str]]:
         """Handles streaming chat responses with integrated web search results."""
 
@@ -108,18 +125,22 @@ class ChatService:
             "refined_questions" : [],
             "require_enhancement": False,
             "require_triptiika": False,
+            "pitaka": "all",
             "search_results": [],
             "messages": [HumanMessage(content=request_params.question)],
         }
 
         # Run the workflow and get the final state
         async def stream() -> AsyncGenerator[str]:
+            # Bound to this response's task; every LLM call in the graph reports here.
+            tracker = UsageTracker(identity=identity)
+            usage_tracker_ctx_var.set(tracker)
             cache_buffer = ""
             raw_citation_map = {}
             superscript_buffer = ""
             replacer = CitationReplacer()
 
-            for mode, chunk in graph.stream(
+            async for mode, chunk in graph.astream(
                 input=state_input,
                 config={"configurable": {"thread_id": str(request_params.thread_id)}},
                 stream_mode=["messages", "custom"],
@@ -163,6 +184,9 @@ class ChatService:
             cache_buffer += result
             yield result
 
+            # Usage describes this run only, so it is not part of the cached replay.
+            yield self._usage_event(tracker)
+
             cache_buffer += "event: complete\ndata: [DONE]\n\n"
             yield "event: complete\ndata: [DONE]\n\n"
 
@@ -172,7 +196,7 @@ class ChatService:
         return stream
 
     async def chat_websearch_service(
-        self, request_params: WebSearchChatRequest
+        self, request_params: WebSearchChatRequest, identity: str | None = None
     ) -> Callable[[], AsyncGenerator[str]]:
         """Handles streaming chat responses with integrated web search results."""
 
@@ -186,17 +210,20 @@ class ChatService:
             "refined_questions" : [],
             "require_enhancement": False,
             "require_triptiika": False,
+            "pitaka": "all",
             "search_results": [],
             "messages": [HumanMessage(content=request_params.question)],
         }
 
         # Run the workflow and get the final state
         async def stream() -> AsyncGenerator[str]:
+            tracker = UsageTracker(identity=identity)
+            usage_tracker_ctx_var.set(tracker)
             raw_citation_map = {}
             superscript_buffer = ""
             replacer = CitationReplacer()
 
-            for mode, chunk in graph.stream(
+            async for mode, chunk in graph.astream(
                 input=state_input,
                 config={"configurable": {"thread_id": str(request_params.thread_id)}},
                 stream_mode=["messages", "custom"],
@@ -236,6 +263,7 @@ class ChatService:
             }
 
             yield f"event: citation\ndata: {final_citation_map}\n\n"
+            yield self._usage_event(tracker)
             yield "event: complete\ndata: [DONE]\n\n"
 
         return stream
@@ -1,8 +1,23 @@
 """Configuration settings for the application"""
 
+from typing import Any
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from app.core.enums import AppEnvs, CacheBackend, LogLevel, RateLimitBackend
+from app.core.enums import (
+    AppEnvs,
+    CacheBackend,
+    LogLevel,
+    QuantizedCodes,
+    RateLimitBackend,
+    ReplayLatency,
+    ReplayMode,
+    SearchMode,
+    VectorBackend,
+    VectorDistance,
+    VectorIndexType,
+    VectorStorage,
+)
 
 
 class AppConfig(BaseSettings):
@@ -39,10 +54,18 @@ class AppConfig(BaseSettings):
     # Local Model (LM Studio)
     LOCAL_MODEL_URL: str = "http://127.0.0.1:1234"
     USE_LOCAL_MODEL: bool = False  # Default to OpenAI, can be overridden
+    LOCAL_MODEL_NAME: str = "local-model"
+    LOCAL_MODEL_MAX_CONNECTIONS: int = 32  # shared HTTP pool per process
+    LOCAL_MODEL_TIMEOUT: float = 120.0
 
     # Search Provider Configuration
-    SEARCH_PROVIDER: str = "duckduckgo"  # "duckduckgo" or "tavily"
+    SEARCH_PROVIDER: str = "duckduckgo"  # "duckduckgo", "tavily", "race" or "adaptive"
+    SEARCH_RACE_MIN_RESULTS: int = 3  # results with content for a raced answer to win
+    SEARCH_RACE_EXPLORE_EVERY: int = 10  # "adaptive": race all providers every N calls
     DUCKDUCKGO_MAX_RESULTS: int = 10
+    DUCKDUCKGO_MAX_WORKERS: int = 8  # concurrent DuckDuckGo requests per process
+    DUCKDUCKGO_CACHE_TTL: float = 300.0  # seconds a search result is reused
+    DUCKDUCKGO_CACHE_SIZE: int = 1024
 
     # LangFuse
     LANGFUSE_HOST: str = ""
@@ -52,18 +75,92 @@ class AppConfig(BaseSettings):
     # Google Generative AI
     GOOGLE_GENAI_API_KEY: str = ""
     GOOGLE_GENAI_EMBED_MODEL: str = "gemini-embedding-001"
+    # Requested output dimensionality (Matryoshka truncation); None keeps the full 3072
+    EMBEDDING_DIMENSIONS: int | None = None
     GOOGLE_APPLICATION_CREDENTIALS: str = ""
     PROJECT_ID: str = ""
     REGION: str = ""
 
+    # LLM pricing in USD per 1M tokens, keyed by model (thinking is billed as output)
+    LLM_PRICING: dict[str, dict[str, float]] = {
+        "gemini-2.5-flash": {"input": 0.30, "cached_input": 0.075, "output": 2.50},
+    }
+
+    # Rate-limit identities whose LLM usage each worker keeps for GET /usage
+    LLM_USAGE_MAX_IDENTITIES: int = 1000
+
+    # Per-node generation overrides, e.g.
+    # {"answer_generation": {"thinking_budget": 512, "max_output_tokens": 2048}}
+    LLM_GENERATION_PROFILES: dict[str, dict[str, Any]] = {}
+
+    # Hedging of streamed LLM calls; enabled per node via the profile's hedge_budget
+    LLM_HEDGE_PERCENTILE: float = 95.0  # first-token latency percentile to wait for
+    LLM_HEDGE_MIN_DELAY_MS: float = 300.0
+    LLM_HEDGE_MAX_DELAY_MS: float = 5000.0
+    LLM_HEDGE_WINDOW: int = 200  # recent calls per node used for the delay and budget
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # no hedging until this many latencies are known
+
     # RAG defaults
     RAG_MAX_RESULTS: int = 5
     RAG_DEFAULT_TOP_K: int = 5
     RAG_EMBEDDING_TIMEOUT: float = 15.0
+    RAG_SEARCH_MODE: SearchMode = SearchMode.VECTOR
+    RAG_HYBRID_CANDIDATES: int = 50  # per ranking, before fusion
+    RAG_HYBRID_RRF_K: int = 60
+    RAG_HYBRID_TRIGRAM_THRESHOLD: float | None = 0.3  # pg_trgm word similarity
+    RAG_MMR_LAMBDA: float | None = None  # MMR diversification; 1.0 = relevance only
+    RAG_MMR_CANDIDATES: int = 20  # matches fetched per query before MMR
+
+    # Query embedding cache (float32 bytes; in-process LRU, plus Redis if CACHE_BACKEND=redis)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EMBEDDING_CACHE_TTL: int = 7 * 24 * 3600  # seconds, Redis tier
+
+    # Micro-batching of embedding requests across concurrent queries (0 disables)
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 20
 
     PG_URL: str = ""
+    PG_REPLICA_URL: str = ""  # optional read replica for similarity search
+    # Connection pools; sizes default to a per-worker share of DB_MAX_CONNECTIONS
+    DB_MAX_CONNECTIONS: int = 80  # all workers together, below Postgres max_connections
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_TIMEOUT: float = 10.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP_CONNECTIONS: int = 4  # opened per pool at startup, up to its size
+    DB_STATEMENT_CACHE_SIZE: int = 500  # prepared statements cached per connection
     VECTOR_TABLE_NAME: str = ""
-
+    VECTOR_STORAGE: VectorStorage = VectorStorage.VECTOR  # type of the embedding column
+    VECTOR_BACKEND: VectorBackend = VectorBackend.SQLALCHEMY
+    VECTOR_ASYNCPG_POOL_MIN_SIZE: int = 1  # VECTOR_BACKEND=asyncpg only
+    VECTOR_ASYNCPG_POOL_MAX_SIZE: int | None = None  # default: half the worker's share
+    # Exported matrix for VECTOR_BACKEND=numpy (vectorstores/memory/export.py)
+    VECTOR_MEMORY_PATH: str = "vector_store"
+    VECTOR_MEMORY_MMAP: bool = True
+    # IVF index for VECTOR_BACKEND=ivf (vectorstores/memory/ivf.py)
+    VECTOR_IVF_CODES: QuantizedCodes = QuantizedCodes.INT8  # used when building
+    VECTOR_IVF_NPROBE: int = 8  # lists scanned per query
+    VECTOR_IVF_RESCORE: int = 4  # exact rescoring of rescore * top_k candidates
+    # Ranking operator; must match the index operator class for the index to be used
+    VECTOR_DISTANCE: VectorDistance = VectorDistance.COSINE
+
+    # ANN index build parameters (see app/services/vectorstores/pgvector/indexes.py)
+    VECTOR_INDEX_TYPE: VectorIndexType = VectorIndexType.HNSW
+    VECTOR_HNSW_M: int = 16
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_IVFFLAT_LISTS: int | None = None  # None derives the list count from rows
+    # Per-query ANN search defaults applied with SET LOCAL (None keeps the server's)
+    VECTOR_HNSW_EF_SEARCH: int | None = None
+    VECTOR_IVFFLAT_PROBES: int | None = None
+
+    # Record / replay of external backends (benchmarking without live services)
+    REPLAY_MODE: ReplayMode = ReplayMode.OFF
+    REPLAY_CASSETTE_DIR: str = "cassettes"
+    REPLAY_LATENCY_PROFILE: ReplayLatency = ReplayLatency.RECORDED
+    REPLAY_LATENCY_SCALE: float = 1.0  # multiplier for the recorded latency
+    REPLAY_FIXED_LATENCY_MS: dict[str, float] = {}  # per-backend latency, "fixed" profile
 
 
 # Initialize configuration settings
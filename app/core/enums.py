@@ -37,3 +37,71 @@ class AppEnvs(str, enum.Enum):
     QA = "qa"
     DEMO = "demo"
     PRODUCTION = "production"
+
+
+class ReplayMode(str, enum.Enum):
+    """Record/replay modes for external backends (LLM, embeddings, search, vectors)."""
+
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class ReplayLatency(str, enum.Enum):
+    """Latency profiles applied when serving recorded interactions."""
+
+    RECORDED = "recorded"
+    FIXED = "fixed"
+    NONE = "none"
+
+
+class VectorStorage(str, enum.Enum):
+    """pgvector column types for stored embeddings."""
+
+    VECTOR = "vector"  # float32
+    HALFVEC = "halfvec"  # float16, half the storage; indexable up to 4000 dimensions
+
+
+class VectorIndexType(str, enum.Enum):
+    """Approximate nearest-neighbour index methods provided by pgvector."""
+
+    HNSW = "hnsw"
+    IVFFLAT = "ivfflat"
+
+
+class VectorDistance(str, enum.Enum):
+    """Distance operators used to rank embeddings."""
+
+    COSINE = "cosine"  # <=>
+    INNER_PRODUCT = "inner_product"  # <#>, equivalent to cosine on unit vectors
+
+
+class Pitaka(str, enum.Enum):
+    """Baskets of the Tipitaka, used to narrow retrieval."""
+
+    VINAYA = "vinaya"  # books 1-8
+    SUTTA = "sutta"  # books 9-33
+    ABHIDHAMMA = "abhidhamma"  # books 34-45
+
+
+class VectorBackend(str, enum.Enum):
+    """Implementations of ``VectorStoreService`` used for retrieval."""
+
+    SQLALCHEMY = "sqlalchemy"  # PgVectorRepository through the ORM session
+    ASYNCPG = "asyncpg"  # raw pooled asyncpg with prepared statements
+    NUMPY = "numpy"  # exact search over an exported in-memory matrix
+    IVF = "ivf"  # quantized IVF lists over the exported matrix, exact rescoring
+
+
+class QuantizedCodes(str, enum.Enum):
+    """Compact row codes of the in-memory IVF index."""
+
+    INT8 = "int8"  # one byte per dimension
+    BINARY = "binary"  # one sign bit per dimension, ranked by Hamming distance
+
+
+class SearchMode(str, enum.Enum):
+    """How RAG retrieval ranks pages."""
+
+    VECTOR = "vector"
+    HYBRID = "hybrid"  # vector + trigram ranks fused with reciprocal rank fusion
@@ -0,0 +1,96 @@
+"""Resident memory of the current worker, split into shared and private pages.
+
+gunicorn workers fork from a master that preloads the app, so memory-mapped
+files (the exported vector store) and untouched preloaded objects stay
+shared between them. ``private`` is what each additional worker costs;
+``pss`` divides shared pages among the processes mapping them.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+from loguru import logger
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+SMAPS_ROLLUP = Path("/proc/self/smaps_rollup")
+MEMORY_KINDS = ("rss", "pss", "shared", "private")
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+def memory_usage(path: Path = SMAPS_ROLLUP) -> dict[str, int]:
+    """Bytes of ``MEMORY_KINDS``; empty where ``smaps_rollup`` is unavailable."""
+
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return {}
+    usage = dict.fromkeys(MEMORY_KINDS, 0)
+    for line in lines:
+        name, _, value = line.partition(":")
+        kind = _FIELDS.get(name)
+        if kind is not None:
+            usage[kind] += int(value.split()[0]) * 1024  # reported in kB
+    return usage
+
+
+class ProcessMemoryCollector(Collector):
+    """``process_memory_bytes`` of every kind from one read per scrape."""
+
+    def __init__(self, path: Path = SMAPS_ROLLUP) -> None:
+        self._path = path
+
+    def describe(self) -> Iterator[GaugeMetricFamily]:
+        yield self._family()
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        family = self._family()
+        usage = memory_usage(self._path)
+        for kind in MEMORY_KINDS:
+            family.add_metric([kind], usage.get(kind, 0))
+        yield family
+
+    @staticmethod
+    def _family() -> GaugeMetricFamily:
+        return GaugeMetricFamily(
+            "process_memory_bytes",
+            "Resident memory of this worker; shared pages include memory-mapped files.",
+            labels=["kind"],
+        )
+
+
+PROCESS_MEMORY_COLLECTOR = ProcessMemoryCollector()
+REGISTRY.register(PROCESS_MEMORY_COLLECTOR)
+
+
+def log_memory_usage() -> None:
+    """Log this worker's resident, shared and private memory."""
+
+    usage = memory_usage()
+    if not usage:
+        return
+    logger.info(
+        "Worker {} memory: rss={:.1f} MiB, shared={:.1f} MiB, "
+        "private={:.1f} MiB, pss={:.1f} MiB",
+        os.getpid(),
+        *(usage[kind] / 2**20 for kind in ("rss", "shared", "private", "pss")),
+    )
+
+
+__all__ = [
+    "MEMORY_KINDS",
+    "PROCESS_MEMORY_COLLECTOR",
+    "ProcessMemoryCollector",
+    "log_memory_usage",
+    "memory_usage",
+]
@@ -5,6 +5,10 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from loguru import logger
 
+from app.database.session import dispose_engines, warm_up_pools
+from app.workflows.graphs.rag.tools import RAG_TOOL
+
+from .extra.process_memory import log_memory_usage
 from .middlewares.rate_limiter import init_rate_limiter
 
 
@@ -13,5 +17,10 @@ async def lifespan(app: FastAPI) -> None:
     """Handle application startup and shutdown events."""
     logger.info("🚀 Application starting up...")
     await init_rate_limiter()
+    await warm_up_pools()
+    log_memory_usage()
     yield
     logger.info("👋 Application shutting down...")
+
+    await RAG_TOOL.aclose()
+    await dispose_engines()
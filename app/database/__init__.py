@@ -1,6 +1,6 @@
 """Database utilities and configuration."""
 
 from .base import Base
-from .session import async_session_factory, get_session
+from .session import async_read_session_factory, async_session_factory, get_session
 
-__all__ = ["Base", "async_session_factory", "get_session"]
\ No newline at end of file
+__all__ = ["Base", "async_read_session_factory", "async_session_factory", "get_session"]
\ No newline at end of file
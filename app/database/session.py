@@ -1,25 +1,218 @@
-"""Session management for the application's database layer."""
+"""Session management for the application's database layer.
+
+Every gunicorn worker owns its own pools, so pool sizes (including the raw
+asyncpg pool of ``VECTOR_BACKEND=asyncpg``) are derived from
+``DB_MAX_CONNECTIONS`` (the budget for all workers together) unless set
+explicitly. Read-only similarity queries can be routed to a replica with
+``PG_REPLICA_URL``; without one, reads share the primary engine.
+"""
 
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+import asyncio
+import multiprocessing
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, cast
 
+from loguru import logger
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.enums import AppEnvs, VectorBackend
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Persistent connections the pool keeps.", ["pool"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out.", ["pool"]
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size.", ["pool"]
+)
+DB_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a pooled connection, including opening a new one.",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits."""
+
+    _wait = DB_POOL_CHECKOUT_WAIT_SECONDS.labels(pool="primary")
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self._wait.observe(time.perf_counter() - started)
+
+
+def _timed_pool(label: str) -> type[_TimedQueuePool]:
+    # A class per pool keeps its label across ``dispose()``, which recreates
+    # the pool from its class.
+    wait = DB_POOL_CHECKOUT_WAIT_SECONDS.labels(pool=label)
+    return type(f"TimedQueuePool_{label}", (_TimedQueuePool,), {"_wait": wait})
+
+
+def _queue_pool(bind: AsyncEngine) -> QueuePool:
+    # ``create_engine`` always installs a queue pool; ``Engine.pool`` is
+    # typed as the base ``Pool``, which has no size counters.
+    return cast(QueuePool, bind.pool)
+
+
+def worker_count() -> int:
+    """Processes sharing the connection budget, as started by ``main.py``."""
+
+    if settings.ENVIRONMENT == AppEnvs.LOCAL:
+        return 1
+    return settings.WORKER_COUNT or multiprocessing.cpu_count() * 2 + 1
+
+
+def _share(workers: int) -> int:
+    return settings.DB_MAX_CONNECTIONS // max(1, workers)
+
+
+def asyncpg_pool_max_size(workers: int) -> int:
+    """Connections one worker's raw asyncpg pool may open (``VECTOR_BACKEND=asyncpg``).
+
+    ``VECTOR_ASYNCPG_POOL_MAX_SIZE`` wins; otherwise half of the worker's
+    share of ``DB_MAX_CONNECTIONS``. Zero for the other backends.
+    """
+
+    if settings.VECTOR_BACKEND != VectorBackend.ASYNCPG:
+        return 0
+    if settings.VECTOR_ASYNCPG_POOL_MAX_SIZE is not None:
+        return settings.VECTOR_ASYNCPG_POOL_MAX_SIZE
+    return max(1, _share(workers) // 2)
+
 
-engine = create_async_engine(settings.PG_URL, echo=False, future=True)
+def pool_limits(workers: int) -> tuple[int, int]:
+    """``(pool_size, max_overflow)`` of one worker's pool.
+
+    Explicit ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW`` win; otherwise each
+    worker gets an equal share of ``DB_MAX_CONNECTIONS``, less its asyncpg
+    pool, half of it kept open and half as overflow for bursts. A warning
+    is logged when the pools together exceed the budget.
+    """
+
+    asyncpg_size = asyncpg_pool_max_size(workers)
+    share = _share(workers) - asyncpg_size
+    pool_size = settings.DB_POOL_SIZE or max(1, share // 2)
+    max_overflow = settings.DB_MAX_OVERFLOW
+    if max_overflow is None:
+        max_overflow = max(0, share - pool_size)
+    total = workers * (pool_size + max_overflow + asyncpg_size)
+    if total > settings.DB_MAX_CONNECTIONS:
+        logger.warning(
+            "{} workers may open {} connections, above DB_MAX_CONNECTIONS={}",
+            workers,
+            total,
+            settings.DB_MAX_CONNECTIONS,
+        )
+    return pool_size, max_overflow
+
+
+def create_engine(url: str, label: str) -> AsyncEngine:
+    """Async engine with the configured pool, pre-ping and statement cache."""
+
+    pool_size, max_overflow = pool_limits(worker_count())
+    bind = create_async_engine(
+        make_url(url).update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        ),
+        echo=False,
+        future=True,
+        poolclass=_timed_pool(label),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    # Read through the engine: ``dispose()`` replaces its pool.
+    DB_POOL_SIZE.labels(pool=label).set_function(lambda: _queue_pool(bind).size())
+    DB_POOL_CHECKED_OUT.labels(pool=label).set_function(
+        lambda: _queue_pool(bind).checkedout()
+    )
+    # QueuePool counts unused capacity as negative overflow.
+    DB_POOL_OVERFLOW.labels(pool=label).set_function(
+        lambda: max(0, _queue_pool(bind).overflow())
+    )
+    return bind
+
+
+engine = create_engine(settings.PG_URL, "primary")
+read_engine = (
+    create_engine(settings.PG_REPLICA_URL, "replica")
+    if settings.PG_REPLICA_URL
+    else engine
+)
 
 async_session_factory = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
     class_=AsyncSession,
 )
+# Read-only queries (similarity search); the primary when no replica is set.
+async_read_session_factory = async_sessionmaker(
+    bind=read_engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+)
+
+
+def asyncpg_dsn(bind: AsyncEngine = engine) -> str:
+    """Plain libpq URL of ``bind``'s database, for raw asyncpg connections."""
+
+    url = bind.url.set(drivername="postgresql").difference_update_query(
+        ["prepared_statement_cache_size"]
+    )
+    return url.render_as_string(hide_password=False)
+
+
+async def warm_up(bind: AsyncEngine, connections: int) -> None:
+    """Open ``connections`` pooled connections before the first request needs them."""
+
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(
+            *(stack.enter_async_context(bind.connect()) for _ in range(connections))
+        )
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in conns))
+
+
+async def warm_up_pools() -> None:
+    """Open the first connections of every pool at startup; failures only log."""
+
+    for bind in dict.fromkeys((engine, read_engine)):
+        try:
+            await warm_up(
+                bind, min(settings.DB_POOL_WARMUP_CONNECTIONS, _queue_pool(bind).size())
+            )
+        except Exception as exc:  # pragma: no cover - startup must not fail on it
+            logger.warning("Database pool warm-up failed: {}", exc)
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection."""
+
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
 
 @asynccontextmanager
 async def get_session() -> AsyncIterator[AsyncSession]:
@@ -36,4 +229,16 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         await session.close()
 
 
-__all__ = ["engine", "async_session_factory", "get_session"]
\ No newline at end of file
+__all__ = [
+    "async_read_session_factory",
+    "async_session_factory",
+    "asyncpg_dsn",
+    "asyncpg_pool_max_size",
+    "dispose_engines",
+    "engine",
+    "get_session",
+    "pool_limits",
+    "read_engine",
+    "warm_up_pools",
+    "worker_count",
+]
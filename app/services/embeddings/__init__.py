@@ -0,0 +1,28 @@
+"""Shared infrastructure for query embeddings."""
+
+from .batcher import EmbeddingBatcher
+from .cache import (
+    EMBEDDING_DTYPE,
+    EmbeddingCache,
+    embedding_cache,
+    normalize_text,
+    pack,
+    unpack,
+)
+from .diversity import MMR_SECONDS, mmr, timed_mmr
+from .reduction import normalize_rows, truncate_embeddings
+
+__all__ = [
+    "EMBEDDING_DTYPE",
+    "EmbeddingBatcher",
+    "EmbeddingCache",
+    "MMR_SECONDS",
+    "embedding_cache",
+    "mmr",
+    "normalize_rows",
+    "normalize_text",
+    "pack",
+    "timed_mmr",
+    "truncate_embeddings",
+    "unpack",
+]
@@ -0,0 +1,119 @@
+"""Micro-batching of embedding requests across concurrent callers.
+
+Texts submitted within ``window`` seconds of each other (or until
+``max_batch`` texts are queued) are embedded with a single request; every
+caller awaits only its own vectors.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client import Histogram
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Distinct texts per batched embedding request.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 250),
+)
+EMBEDDING_BATCH_QUEUE_WAIT_SECONDS = Histogram(
+    "embedding_batch_queue_wait_seconds",
+    "Time a text waits in the batcher before its request is sent.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+@dataclass(slots=True)
+class _Pending:
+    text: str
+    future: asyncio.Future[Any]
+    enqueued: float
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent embedding calls into batched requests.
+
+    ``embed`` receives a list of distinct texts and must return one vector
+    per text, in order. The batcher lives on the event loop it is first used
+    from.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], Awaitable[Sequence[Any]]],
+        *,
+        window: float,
+        max_batch: int,
+    ) -> None:
+        if max_batch <= 0:
+            msg = "max_batch must be a positive integer."
+            raise ValueError(msg)
+        self._embed = embed
+        self._window = window
+        self._max_batch = max_batch
+        self._pending: list[_Pending] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def embed(self, texts: Sequence[str]) -> list[Any]:
+        """Embed ``texts`` as part of the next batch and return their vectors."""
+
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = []
+        for text in texts:
+            future: asyncio.Future[Any] = loop.create_future()
+            self._pending.append(_Pending(text, future, now))
+            futures.append(future)
+
+        while len(self._pending) >= self._max_batch:
+            self._dispatch(loop, self._max_batch)
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush, loop)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._timer = None
+        while self._pending:
+            self._dispatch(loop, self._max_batch)
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop, size: int) -> None:
+        batch, self._pending = self._pending[:size], self._pending[size:]
+        if not self._pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = loop.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[_Pending]) -> None:
+        sent = time.perf_counter()
+        for item in batch:
+            EMBEDDING_BATCH_QUEUE_WAIT_SECONDS.observe(sent - item.enqueued)
+
+        texts = list(dict.fromkeys(item.text for item in batch))
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            vectors = await self._embed(texts)
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as exc:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        by_text = dict(zip(texts, vectors, strict=True))
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(by_text[item.text])
+
+
+__all__ = ["EmbeddingBatcher"]
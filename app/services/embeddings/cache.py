@@ -0,0 +1,189 @@
+"""Two-tier cache for query embeddings.
+
+Vectors are stored as packed little-endian float32 bytes, keyed by embedding
+model and normalized text. An in-process LRU (bounded by bytes) sits in
+front of Redis when ``CACHE_BACKEND=redis``; hits are returned as read-only
+NumPy views over the cached bytes, without copying or per-element checks.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import unicodedata
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from aiocache import Cache
+from aiocache.serializers import BaseSerializer
+from cachetools import LRUCache
+from loguru import logger
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.enums import CacheBackend
+
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+EMBEDDING_CACHE_REQUESTS_TOTAL = Counter(
+    "embedding_cache_requests_total",
+    "Embedding cache lookups by tier and result.",
+    ["tier", "result"],
+)
+EMBEDDING_CACHE_BYTES = Gauge(
+    "embedding_cache_bytes",
+    "Bytes of packed vectors held in the in-process embedding cache.",
+)
+EMBEDDING_CACHE_STORED_BYTES_TOTAL = Counter(
+    "embedding_cache_stored_bytes_total",
+    "Bytes of packed vectors written to the embedding cache, by tier.",
+    ["tier"],
+)
+
+
+class _BytesSerializer(BaseSerializer):
+    """Pass packed vectors through to Redis unchanged."""
+
+    DEFAULT_ENCODING = None
+
+    def dumps(self, value: bytes) -> bytes:
+        return value
+
+    def loads(self, value: bytes | None) -> bytes | None:
+        return value
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so equivalent queries share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def pack(vector: Any) -> bytes:
+    """Pack a vector as little-endian float32 bytes."""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack(blob: bytes) -> np.ndarray:
+    """Read-only float32 view over ``blob`` (no copy)."""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+class EmbeddingCache:
+    """Cache of embeddings keyed by model and normalized text."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        remote: Any | None = None,
+        ttl: int | None = None,
+    ) -> None:
+        self._local: LRUCache[str, bytes] = LRUCache(maxsize=max_bytes, getsizeof=len)
+        self._remote = remote
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Cache key for ``text`` embedded with ``model``."""
+        digest = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"{model}:{digest}"
+
+    def _store_local(self, key: str, blob: bytes) -> None:
+        with self._lock:
+            try:
+                self._local[key] = blob
+            except ValueError:  # larger than the whole cache
+                return
+            EMBEDDING_CACHE_BYTES.set(self._local.currsize)
+        EMBEDDING_CACHE_STORED_BYTES_TOTAL.labels(tier="local").inc(len(blob))
+
+    async def get_many(self, model: str, texts: Sequence[str]) -> list[np.ndarray | None]:
+        """Cached vectors for ``texts`` (``None`` where missing), in order."""
+
+        keys = [self.make_key(model, text) for text in texts]
+        with self._lock:
+            blobs: list[bytes | None] = [self._local.get(key) for key in keys]
+
+        missing = [index for index, blob in enumerate(blobs) if blob is None]
+        EMBEDDING_CACHE_REQUESTS_TOTAL.labels(tier="local", result="hit").inc(
+            len(keys) - len(missing)
+        )
+        EMBEDDING_CACHE_REQUESTS_TOTAL.labels(tier="local", result="miss").inc(
+            len(missing)
+        )
+
+        if missing and self._remote is not None:
+            try:
+                remote = await self._remote.multi_get([keys[index] for index in missing])
+            except Exception as exc:  # pragma: no cover - cache must not fail requests
+                logger.warning("Embedding cache lookup failed: {}", exc)
+                remote = [None] * len(missing)
+            hits = 0
+            for index, blob in zip(missing, remote, strict=True):
+                if blob is not None:
+                    hits += 1
+                    blobs[index] = blob
+                    self._store_local(keys[index], blob)
+            EMBEDDING_CACHE_REQUESTS_TOTAL.labels(tier="redis", result="hit").inc(hits)
+            EMBEDDING_CACHE_REQUESTS_TOTAL.labels(tier="redis", result="miss").inc(
+                len(missing) - hits
+            )
+
+        return [None if blob is None else unpack(blob) for blob in blobs]
+
+    async def set_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Any]
+    ) -> list[np.ndarray]:
+        """Store ``vectors`` and return them as views over the cached bytes."""
+
+        keys = [self.make_key(model, text) for text in texts]
+        blobs = [pack(vector) for vector in vectors]
+        for key, blob in zip(keys, blobs, strict=True):
+            self._store_local(key, blob)
+
+        if self._remote is not None and blobs:
+            try:
+                await self._remote.multi_set(
+                    list(zip(keys, blobs, strict=True)), ttl=self._ttl
+                )
+            except Exception as exc:  # pragma: no cover - cache must not fail requests
+                logger.warning("Embedding cache store failed: {}", exc)
+            else:
+                EMBEDDING_CACHE_STORED_BYTES_TOTAL.labels(tier="redis").inc(
+                    sum(len(blob) for blob in blobs)
+                )
+
+        return [unpack(blob) for blob in blobs]
+
+
+def _create_remote() -> Any | None:
+    if settings.CACHE_BACKEND != CacheBackend.REDIS:
+        return None
+    return Cache(
+        cache_class=Cache.REDIS,
+        endpoint=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        password=settings.REDIS_PASSWORD,
+        namespace="embedding",
+        serializer=_BytesSerializer(),
+        db=1,
+    )
+
+
+embedding_cache = EmbeddingCache(
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+    remote=_create_remote(),
+    ttl=settings.EMBEDDING_CACHE_TTL,
+)
+
+
+__all__ = [
+    "EMBEDDING_DTYPE",
+    "EmbeddingCache",
+    "embedding_cache",
+    "normalize_text",
+    "pack",
+    "unpack",
+]
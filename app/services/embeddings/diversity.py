@@ -0,0 +1,93 @@
+"""Maximal Marginal Relevance (MMR) selection of retrieved pages.
+
+Near-duplicate pages (the same formula repeated across suttas) rank next
+to each other and waste context. MMR picks results one at a time, trading
+relevance to the query against similarity to the pages already picked:
+
+    argmax_d  lambda * sim(q, d) - (1 - lambda) * max_{s in selected} sim(d, s)
+
+All pairwise similarities come from one matrix product; each step is a
+vectorized update over the candidates.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+from prometheus_client import Histogram
+
+from .cache import EMBEDDING_DTYPE
+from .reduction import normalize_rows
+
+MMR_SECONDS = Histogram(
+    "rag_mmr_seconds",
+    "Time to decode candidate embeddings and select results with MMR.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+
+def mmr(
+    query: Sequence[float] | np.ndarray,
+    candidates: Sequence[Any] | np.ndarray,
+    k: int,
+    *,
+    lambda_mult: float = 0.5,
+) -> np.ndarray:
+    """Indices of ``k`` rows of ``candidates`` in MMR selection order.
+
+    ``lambda_mult`` of 1 ranks by relevance alone; 0 by diversity alone.
+    """
+
+    if not 0.0 <= lambda_mult <= 1.0:
+        msg = "lambda_mult must be between 0 and 1."
+        raise ValueError(msg)
+
+    vectors = normalize_rows(candidates)
+    k = min(k, len(vectors))
+    selected = np.empty(k, dtype=np.intp)
+    if k == 0:
+        return selected
+    relevance = lambda_mult * (
+        vectors @ normalize_rows(query)
+    )
+    similarity = (1.0 - lambda_mult) * (vectors @ vectors.T)
+    # Weighted similarity of each candidate to its closest selected page.
+    redundancy = np.zeros(len(vectors), dtype=EMBEDDING_DTYPE)
+    available = np.ones(len(vectors), dtype=bool)
+    for step in range(k):
+        scores = np.where(available, relevance - redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        if step == 0:
+            redundancy = similarity[best].copy()
+        else:
+            np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+def timed_mmr(
+    query: Sequence[float] | np.ndarray,
+    embeddings: Sequence[bytes],
+    k: int,
+    *,
+    lambda_mult: float = 0.5,
+) -> np.ndarray:
+    """``mmr`` over packed float32 ``embeddings``, recorded in ``MMR_SECONDS``."""
+
+    started = time.perf_counter()
+    candidates = np.frombuffer(b"".join(embeddings), dtype=EMBEDDING_DTYPE)
+    selected = mmr(
+        query,
+        candidates.reshape(len(embeddings), -1),
+        k,
+        lambda_mult=lambda_mult,
+    )
+    MMR_SECONDS.observe(time.perf_counter() - started)
+    return selected
+
+
+__all__ = ["MMR_SECONDS", "mmr", "timed_mmr"]
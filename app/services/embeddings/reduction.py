@@ -0,0 +1,47 @@
+"""Matryoshka-style dimensionality reduction of embeddings.
+
+``gemini-embedding-001`` is trained so that a prefix of its 3072-d output is
+itself a usable embedding; only full-length vectors come back normalized, so
+truncated ones are rescaled to unit length before cosine search.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from .cache import EMBEDDING_DTYPE
+
+
+def normalize_rows(matrix: Sequence[Any] | np.ndarray) -> np.ndarray:
+    """Rows of ``matrix`` as float32 scaled to unit length (zero rows stay zero)."""
+
+    array = np.asarray(matrix, dtype=EMBEDDING_DTYPE)
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    unit: np.ndarray = array / np.where(norms == 0, 1, norms)
+    return unit
+
+
+def truncate_embeddings(
+    vectors: Sequence[Any] | np.ndarray, dimensions: int
+) -> np.ndarray:
+    """Keep the first ``dimensions`` components of each row and L2-normalize it.
+
+    Accepts one vector or a 2-D batch and returns float32 of the same rank.
+    """
+
+    if dimensions <= 0:
+        msg = "dimensions must be a positive integer."
+        raise ValueError(msg)
+
+    array = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+    if array.shape[-1] < dimensions:
+        msg = f"Cannot truncate {array.shape[-1]}-d embeddings to {dimensions}."
+        raise ValueError(msg)
+
+    return normalize_rows(array[..., :dimensions])
+
+
+__all__ = ["normalize_rows", "truncate_embeddings"]
@@ -0,0 +1,26 @@
+"""Shared infrastructure for LLM clients."""
+
+from .hedging import Cancellation, HedgeCancelledError, Hedger, hedger
+from .usage import (
+    IdentityUsage,
+    TokenUsage,
+    UsageTracker,
+    identity_label,
+    identity_usage,
+    record_usage,
+    usage_tracker_ctx_var,
+)
+
+__all__ = [
+    "Cancellation",
+    "HedgeCancelledError",
+    "Hedger",
+    "IdentityUsage",
+    "TokenUsage",
+    "UsageTracker",
+    "hedger",
+    "identity_label",
+    "identity_usage",
+    "record_usage",
+    "usage_tracker_ctx_var",
+]
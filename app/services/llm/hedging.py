@@ -0,0 +1,228 @@
+"""Request hedging for streamed LLM calls.
+
+A hedged call starts one attempt and waits for its first token. If none
+arrives within a delay derived from recent first-token latencies (a
+percentile, clamped to ``[min, max]``), a duplicate attempt is started and
+whichever yields a first token first wins; the other is cancelled.
+
+Hedges are capped per node by a budget: the fraction of recent eligible
+calls that may fire a duplicate, which bounds the extra cost.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TypeVar
+
+from loguru import logger
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class Cancellation(threading.Event):
+    """Cancellation flag of one attempt.
+
+    Polling only notices cancellation when the attempt next wakes up, so an
+    attempt blocked on I/O can also register callbacks (closing its stream,
+    say) with ``on_cancel``; they run in the thread that cancels it.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._callbacks: list[Callable[[], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on cancellation, or now if already cancelled."""
+
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set(self) -> None:
+        super().set()
+        with self._callbacks_lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Hedge cancel callback failed")
+
+
+# An attempt receives its cancellation to poll between chunks (and register
+# close callbacks with) and a callback to invoke once, when its first token
+# arrives.
+Attempt = Callable[[Cancellation, Callable[[], None]], T]
+
+LLM_HEDGE_ELIGIBLE_TOTAL = Counter(
+    "llm_hedge_eligible_total",
+    "LLM calls eligible for hedging.",
+    ["node"],
+)
+LLM_HEDGE_FIRED_TOTAL = Counter(
+    "llm_hedge_fired_total",
+    "Hedge requests fired because the first token was late.",
+    ["node"],
+)
+LLM_HEDGE_WON_TOTAL = Counter(
+    "llm_hedge_won_total",
+    "Hedge requests that produced a first token before the original.",
+    ["node"],
+)
+
+
+class HedgeCancelledError(RuntimeError):
+    """Raised inside an attempt that lost the race and was cancelled."""
+
+
+class _NodeStats:
+    """Recent first-token latencies and hedge decisions of one node."""
+
+    def __init__(self, window: int) -> None:
+        self.first_token_latencies: deque[float] = deque(maxlen=window)
+        self.hedged: deque[bool] = deque(maxlen=window)
+
+
+class Hedger:
+    """Run attempts with latency-triggered, budgeted duplicates."""
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        min_delay: float = 0.3,
+        max_delay: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 64,
+    ) -> None:
+        self._percentile = percentile
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._window = window
+        self._min_samples = min_samples
+        self._stats: dict[str, _NodeStats] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm-hedge"
+        )
+
+    def _node(self, node: str) -> _NodeStats:
+        with self._lock:
+            return self._stats.setdefault(node, _NodeStats(self._window))
+
+    def delay(self, node: str) -> float | None:
+        """Seconds to wait for a first token before hedging, or ``None`` if unknown."""
+
+        stats = self._node(node)
+        with self._lock:
+            samples = sorted(stats.first_token_latencies)
+        if len(samples) < self._min_samples:
+            return None
+        rank = round(self._percentile / 100 * (len(samples) - 1))
+        return min(max(samples[rank], self._min_delay), self._max_delay)
+
+    def _allow(self, node: str, budget: float) -> bool:
+        stats = self._node(node)
+        with self._lock:
+            return sum(stats.hedged) + 1 <= budget * len(stats.hedged)
+
+    def run(self, node: str, attempt: Attempt[T], *, budget: float) -> T:
+        """Run ``attempt``, hedging it if its first token is late.
+
+        ``budget`` is the fraction of calls of ``node`` that may be hedged;
+        ``0`` runs the attempt once, inline.
+        """
+
+        if budget <= 0:
+            return attempt(Cancellation(), lambda: None)
+
+        LLM_HEDGE_ELIGIBLE_TOTAL.labels(node=node).inc()
+        stats = self._node(node)
+        signals: queue.SimpleQueue[tuple[int, bool]] = queue.SimpleQueue()
+        cancels: list[Cancellation] = []
+        futures: list[Future[T]] = []
+        started: list[float] = []
+
+        def launch() -> None:
+            index = len(futures)
+            cancel = Cancellation()
+            signalled = threading.Event()
+
+            def signal(failed: bool = False) -> None:
+                if not signalled.is_set():
+                    signalled.set()
+                    signals.put((index, failed))
+
+            def target() -> T:
+                try:
+                    result = attempt(cancel, signal)
+                except BaseException:
+                    signal(failed=True)
+                    raise
+                signal()
+                return result
+
+            cancels.append(cancel)
+            started.append(time.perf_counter())
+            context = contextvars.copy_context()
+            futures.append(self._executor.submit(context.run, target))
+
+        launch()
+        delay = self.delay(node)
+        try:
+            first = signals.get(timeout=delay) if delay is not None else signals.get()
+        except queue.Empty:
+            first = None
+
+        hedged = False
+        if first is None:
+            hedged = self._allow(node, budget)
+            if hedged:
+                LLM_HEDGE_FIRED_TOTAL.labels(node=node).inc()
+                launch()
+            first = signals.get()
+
+        winner, failed = first
+        if failed and len(futures) > 1:
+            # The other attempt is still running; let it finish instead.
+            winner, failed = signals.get()
+
+        with self._lock:
+            stats.hedged.append(hedged)
+            if not failed:
+                stats.first_token_latencies.append(
+                    time.perf_counter() - started[winner]
+                )
+
+        for index, cancel in enumerate(cancels):
+            if index != winner:
+                cancel.set()
+        if winner > 0:
+            LLM_HEDGE_WON_TOTAL.labels(node=node).inc()
+
+        return futures[winner].result()
+
+
+hedger = Hedger(
+    percentile=settings.LLM_HEDGE_PERCENTILE,
+    min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+    max_delay=settings.LLM_HEDGE_MAX_DELAY_MS / 1000,
+    window=settings.LLM_HEDGE_WINDOW,
+    min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+)
+
+
+__all__ = ["Cancellation", "HedgeCancelledError", "Hedger", "hedger"]
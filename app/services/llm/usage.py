@@ -0,0 +1,258 @@
+"""Token usage and cost accounting for LLM calls.
+
+Every LLM call reports its usage through :func:`record_usage`, which updates
+the Prometheus counters (per graph node and model) and the
+:class:`UsageTracker` bound to the current request, if any. The rate-limit
+identity is kept out of metric labels, which would grow without bound;
+per-identity totals live in :data:`identity_usage` instead, a table bounded
+to the most recently active identities and served by the monitor API.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+LLM_CALLS_TOTAL = Counter(
+    "llm_calls_total",
+    "Number of LLM calls.",
+    ["node", "model"],
+)
+LLM_TOKENS_TOTAL = Counter(
+    "llm_tokens_total",
+    "LLM tokens consumed, by token type.",
+    ["node", "model", "type"],
+)
+LLM_COST_USD_TOTAL = Counter(
+    "llm_cost_usd_total",
+    "Estimated LLM cost in USD based on LLM_PRICING.",
+    ["node", "model"],
+)
+
+
+@dataclass(slots=True)
+class TokenUsage:
+    """Token counts reported for one or more LLM calls."""
+
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cached_tokens: int = 0
+    calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Billable tokens: prompt, visible output and hidden thinking."""
+        return self.prompt_tokens + self.output_tokens + self.thinking_tokens
+
+    def add(self, other: TokenUsage) -> None:
+        """Accumulate ``other`` into this instance."""
+        self.prompt_tokens += other.prompt_tokens
+        self.output_tokens += other.output_tokens
+        self.thinking_tokens += other.thinking_tokens
+        self.cached_tokens += other.cached_tokens
+        self.calls += other.calls
+
+    def cost_usd(self, model: str) -> float:
+        """Estimate the cost of this usage from ``settings.LLM_PRICING``."""
+
+        pricing = settings.LLM_PRICING.get(model)
+        if not pricing:
+            return 0.0
+        billed_input = self.prompt_tokens - self.cached_tokens
+        billed_cached = self.cached_tokens
+        billed_output = self.output_tokens + self.thinking_tokens
+        return (
+            billed_input * pricing.get("input", 0.0)
+            + billed_cached * pricing.get("cached_input", pricing.get("input", 0.0))
+            + billed_output * pricing.get("output", 0.0)
+        ) / 1_000_000
+
+    def as_dict(self) -> dict[str, int]:
+        """Serializable form, including the derived total."""
+        return {**asdict(self), "total_tokens": self.total_tokens}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None) -> TokenUsage:
+        """Rebuild usage from :meth:`as_dict` output (e.g. a replayed cassette)."""
+
+        if not data:
+            return cls()
+        fields = cls.__dataclass_fields__
+        return cls(**{key: int(value) for key, value in data.items() if key in fields})
+
+    @classmethod
+    def from_gemini(cls, metadata: Any) -> TokenUsage:
+        """Build usage from a ``google-genai`` ``usage_metadata`` object."""
+
+        if metadata is None:
+            return cls()
+        return cls(
+            prompt_tokens=metadata.prompt_token_count or 0,
+            output_tokens=metadata.candidates_token_count or 0,
+            thinking_tokens=metadata.thoughts_token_count or 0,
+            cached_tokens=metadata.cached_content_token_count or 0,
+            calls=1,
+        )
+
+    @classmethod
+    def from_langchain(cls, metadata: dict[str, Any] | None) -> TokenUsage:
+        """Build usage from a LangChain ``AIMessage.usage_metadata`` dict."""
+
+        if not metadata:
+            return cls()
+        output_details = metadata.get("output_token_details") or {}
+        input_details = metadata.get("input_token_details") or {}
+        reasoning = output_details.get("reasoning", 0) or 0
+        return cls(
+            prompt_tokens=metadata.get("input_tokens", 0) or 0,
+            output_tokens=(metadata.get("output_tokens", 0) or 0) - reasoning,
+            thinking_tokens=reasoning,
+            cached_tokens=input_details.get("cache_read", 0) or 0,
+            calls=1,
+        )
+
+
+def identity_label(identity: str | None) -> str:
+    """Return a short, non-reversible label for a rate-limit identity.
+
+    The identity is the bearer token or client IP from ``token_or_ip_key``;
+    neither should appear verbatim in logs.
+    """
+
+    if not identity:
+        return "anonymous"
+    return hashlib.sha256(identity.encode()).hexdigest()[:12]
+
+
+class UsageTracker:
+    """Aggregates token usage per graph node for a single request."""
+
+    def __init__(self, identity: str | None = None) -> None:
+        self.identity = identity
+        self._by_node: dict[str, TokenUsage] = {}
+        self._cost_usd = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, node: str, model: str, usage: TokenUsage) -> None:
+        """Add ``usage`` of one call made by ``node``."""
+
+        with self._lock:
+            self._by_node.setdefault(node, TokenUsage()).add(usage)
+            self._cost_usd += usage.cost_usd(model)
+
+    def summary(self) -> dict[str, Any]:
+        """Per-node and total usage, suitable for the ``usage`` SSE frame."""
+
+        with self._lock:
+            total = TokenUsage()
+            for usage in self._by_node.values():
+                total.add(usage)
+            return {
+                "nodes": {node: usage.as_dict() for node, usage in self._by_node.items()},
+                "total": total.as_dict(),
+                "cost_usd": round(self._cost_usd, 6),
+            }
+
+
+@dataclass(slots=True)
+class _IdentityEntry:
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    cost_usd: float = 0.0
+
+
+class IdentityUsage:
+    """Usage per rate-limit identity, for the most recently active identities.
+
+    At most ``max_identities`` are kept; a new identity evicts the one idle
+    the longest, so memory stays bounded however many clients call. Keys are
+    ``identity_label`` values. Each worker process keeps its own table.
+    """
+
+    def __init__(self, max_identities: int) -> None:
+        self._max_identities = max_identities
+        self._entries: OrderedDict[str, _IdentityEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, identity: str | None, usage: TokenUsage, cost_usd: float) -> None:
+        """Add ``usage`` costing ``cost_usd`` to ``identity``'s totals."""
+
+        label = identity_label(identity)
+        with self._lock:
+            entry = self._entries.get(label)
+            if entry is None:
+                if len(self._entries) >= self._max_identities:
+                    self._entries.popitem(last=False)
+                entry = self._entries[label] = _IdentityEntry()
+            else:
+                self._entries.move_to_end(label)
+            entry.usage.add(usage)
+            entry.cost_usd += cost_usd
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """Up to ``limit`` identities with the highest cost, then token count."""
+
+        with self._lock:
+            rows = [
+                {
+                    "identity": label,
+                    **entry.usage.as_dict(),
+                    "cost_usd": round(entry.cost_usd, 6),
+                }
+                for label, entry in self._entries.items()
+            ]
+        rows.sort(key=lambda row: (row["cost_usd"], row["total_tokens"]), reverse=True)
+        return rows[:limit]
+
+
+identity_usage = IdentityUsage(settings.LLM_USAGE_MAX_IDENTITIES)
+
+# Tracker of the request currently being served (unset outside requests).
+usage_tracker_ctx_var: ContextVar[UsageTracker | None] = ContextVar(
+    "usage_tracker", default=None
+)
+
+
+def record_usage(node: str, model: str, usage: TokenUsage) -> None:
+    """Export ``usage`` as metrics and add it to the current request's tracker."""
+
+    if not usage.calls:
+        return
+
+    tracker = usage_tracker_ctx_var.get()
+    LLM_CALLS_TOTAL.labels(node=node, model=model).inc(usage.calls)
+    for token_type, count in (
+        ("prompt", usage.prompt_tokens),
+        ("output", usage.output_tokens),
+        ("thinking", usage.thinking_tokens),
+        ("cached", usage.cached_tokens),
+    ):
+        if count:
+            LLM_TOKENS_TOTAL.labels(node=node, model=model, type=token_type).inc(count)
+
+    cost = usage.cost_usd(model)
+    if cost:
+        LLM_COST_USD_TOTAL.labels(node=node, model=model).inc(cost)
+
+    if tracker is not None:
+        tracker.record(node, model, usage)
+        identity_usage.record(tracker.identity, usage, cost)
+
+
+__all__ = [
+    "IdentityUsage",
+    "TokenUsage",
+    "UsageTracker",
+    "identity_label",
+    "identity_usage",
+    "record_usage",
+    "usage_tracker_ctx_var",
+]
@@ -0,0 +1,6 @@
+"""Record/replay support for external backends."""
+
+from .cassette import Cassette, CassetteEntry
+from .recorder import CassetteMissError, Recorder, recorder
+
+__all__ = ["Cassette", "CassetteEntry", "CassetteMissError", "Recorder", "recorder"]
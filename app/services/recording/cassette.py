@@ -0,0 +1,90 @@
+"""Cassette files holding recorded backend interactions."""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+
+@dataclass(slots=True)
+class CassetteEntry:
+    """A single recorded request/response pair."""
+
+    key: str
+    request: Any
+    response: Any
+    latency: float
+
+
+class Cassette:
+    """Append-only JSON Lines store of interactions for one backend kind.
+
+    Entries are grouped by request key. A key may have been recorded several
+    times (e.g. identical prompts answered differently); replay cycles through
+    the recordings for that key in order.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[CassetteEntry]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        """Location of the cassette file."""
+        return self._path
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+
+        with self._path.open(encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = CassetteEntry(**json.loads(line))
+                except (TypeError, ValueError) as exc:
+                    logger.warning(
+                        "Skipping malformed cassette line {}:{}: {}",
+                        self._path,
+                        line_number,
+                        exc,
+                    )
+                    continue
+                self._entries[entry.key].append(entry)
+
+    def find(self, key: str) -> CassetteEntry | None:
+        """Return the next recorded entry for ``key`` (round-robin), if any."""
+
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursor[key] % len(entries)
+            self._cursor[key] += 1
+            return entries[index]
+
+    def append(self, entry: CassetteEntry) -> None:
+        """Persist a new entry and make it available for lookups."""
+
+        line = json.dumps(asdict(entry), ensure_ascii=False, default=str)
+        with self._lock:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+            self._entries[entry.key].append(entry)
+
+
+__all__ = ["Cassette", "CassetteEntry"]
@@ -0,0 +1,166 @@
+"""Record/replay wrapper for calls to external backends.
+
+In ``record`` mode every wrapped call is executed for real and its request,
+JSON-serializable response and wall-clock latency are appended to a cassette
+file per backend kind. In ``replay`` mode the response is served from the
+cassette instead, after sleeping according to the configured latency profile,
+so the whole graph can be exercised without network access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.enums import ReplayLatency, ReplayMode
+
+from .cassette import Cassette, CassetteEntry
+
+T = TypeVar("T")
+
+# Values that legitimately change between runs and must not affect the key,
+# e.g. the current date and time injected into the system prompt.
+_KEY_SCRUBBERS: tuple[tuple[re.Pattern[str], str], ...] = (
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?"), "<timestamp>"),
+)
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when no recording matches a request."""
+
+
+class Recorder:
+    """Route backend calls through cassettes according to ``mode``."""
+
+    def __init__(
+        self,
+        *,
+        mode: ReplayMode,
+        cassette_dir: str | Path,
+        latency_profile: ReplayLatency = ReplayLatency.RECORDED,
+        latency_scale: float = 1.0,
+        fixed_latency_ms: dict[str, float] | None = None,
+    ) -> None:
+        self.mode = mode
+        self._cassette_dir = Path(cassette_dir)
+        self._latency_profile = latency_profile
+        self._latency_scale = latency_scale
+        self._fixed_latency_ms = fixed_latency_ms or {}
+        self._cassettes: dict[str, Cassette] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls are being recorded or replayed."""
+        return self.mode != ReplayMode.OFF
+
+    @staticmethod
+    def make_key(kind: str, request: Any) -> str:
+        """Build a stable key from the backend kind and request material."""
+
+        serialized = json.dumps(
+            request, sort_keys=True, ensure_ascii=False, default=str
+        )
+        for pattern, replacement in _KEY_SCRUBBERS:
+            serialized = pattern.sub(replacement, serialized)
+        return hashlib.sha256(f"{kind}:{serialized}".encode()).hexdigest()
+
+    def cassette(self, kind: str) -> Cassette:
+        """Return (and lazily load) the cassette for a backend kind."""
+
+        with self._lock:
+            cassette = self._cassettes.get(kind)
+            if cassette is None:
+                cassette = Cassette(self._cassette_dir / f"{kind}.jsonl")
+                self._cassettes[kind] = cassette
+            return cassette
+
+    def replay_delay(self, kind: str, entry: CassetteEntry) -> float:
+        """Seconds to wait before serving ``entry`` under the latency profile."""
+
+        if self._latency_profile == ReplayLatency.NONE:
+            return 0.0
+        if self._latency_profile == ReplayLatency.FIXED:
+            return self._fixed_latency_ms.get(kind, 0.0) / 1000
+        return entry.latency * self._latency_scale
+
+    def _lookup(self, kind: str, request: Any) -> CassetteEntry:
+        key = self.make_key(kind, request)
+        entry = self.cassette(kind).find(key)
+        if entry is None:
+            msg = f"No recorded '{kind}' interaction matches key {key[:12]}."
+            logger.error(msg)
+            raise CassetteMissError(msg)
+        return entry
+
+    def _store(self, kind: str, request: Any, response: Any, latency: float) -> None:
+        entry = CassetteEntry(
+            key=self.make_key(kind, request),
+            request=request,
+            response=response,
+            latency=latency,
+        )
+        self.cassette(kind).append(entry)
+
+    def call(self, kind: str, request: Any, func: Callable[[], T]) -> T:
+        """Run a blocking backend call through the recorder."""
+
+        if self.mode == ReplayMode.REPLAY:
+            entry = self._lookup(kind, request)
+            delay = self.replay_delay(kind, entry)
+            if delay > 0:
+                time.sleep(delay)
+            return entry.response  # type: ignore[no-any-return]
+
+        started = time.perf_counter()
+        response = func()
+        if self.mode == ReplayMode.RECORD:
+            self._store(kind, request, response, time.perf_counter() - started)
+        return response
+
+    async def acall(
+        self, kind: str, request: Any, func: Callable[[], Awaitable[T]]
+    ) -> T:
+        """Run an async backend call through the recorder."""
+
+        if self.mode == ReplayMode.REPLAY:
+            entry = self._lookup(kind, request)
+            delay = self.replay_delay(kind, entry)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return entry.response  # type: ignore[no-any-return]
+
+        started = time.perf_counter()
+        response = await func()
+        if self.mode == ReplayMode.RECORD:
+            self._store(kind, request, response, time.perf_counter() - started)
+        return response
+
+
+recorder = Recorder(
+    mode=settings.REPLAY_MODE,
+    cassette_dir=settings.REPLAY_CASSETTE_DIR,
+    latency_profile=settings.REPLAY_LATENCY_PROFILE,
+    latency_scale=settings.REPLAY_LATENCY_SCALE,
+    fixed_latency_ms=settings.REPLAY_FIXED_LATENCY_MS,
+)
+
+if recorder.enabled:
+    logger.warning(
+        "External backends run in {} mode (cassettes: {})",
+        recorder.mode.value,
+        settings.REPLAY_CASSETTE_DIR,
+    )
+
+
+__all__ = ["CassetteMissError", "Recorder", "recorder"]
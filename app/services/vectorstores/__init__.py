@@ -1,5 +1,17 @@
 """Vector store service implementations."""
 
-from .interfaces import VectorSearchResult, VectorStoreService
+from .interfaces import (
+    PITAKA_BOOKS,
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+    VectorStoreService,
+)
 
-__all__ = ["VectorSearchResult", "VectorStoreService"]
\ No newline at end of file
+__all__ = [
+    "PITAKA_BOOKS",
+    "SearchFilter",
+    "SearchOptions",
+    "VectorSearchResult",
+    "VectorStoreService",
+]
\ No newline at end of file
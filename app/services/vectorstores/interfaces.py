@@ -6,23 +6,121 @@ from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any, Protocol
 
+from app.core.enums import Pitaka
+
+# Book ranges of each basket, as grouped by tripitika_data/concat_by_pitaka.py.
+PITAKA_BOOKS: dict[Pitaka, tuple[int, int]] = {
+    Pitaka.VINAYA: (1, 8),
+    Pitaka.SUTTA: (9, 33),
+    Pitaka.ABHIDHAMMA: (34, 45),
+}
+
 
 @dataclass(slots=True)
 class VectorSearchResult:
-    """Represents a single vector similarity match."""
+    """Represents a single vector similarity match.
+
+    ``embedding`` holds the packed little-endian float32 vector, only when
+    the search was asked for it.
+    """
 
     id: str
     score: float
     payload: dict[str, Any]
+    embedding: bytes | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class SearchOptions:
+    """Per-query tuning of approximate nearest-neighbour search.
+
+    ``None`` leaves the server setting unchanged; ``exact`` bypasses ANN
+    indexes and scans every vector.
+    """
+
+    ef_search: int | None = None
+    probes: int | None = None
+    exact: bool = False
+
+
+@dataclass(slots=True, frozen=True)
+class SearchFilter:
+    """Restrict a search to a basket and/or inclusive book and page ranges.
+
+    A book range and a ``pitaka`` combine to their intersection.
+    """
+
+    pitaka: Pitaka | None = None
+    book_min: int | None = None
+    book_max: int | None = None
+    page_min: int | None = None
+    page_max: int | None = None
+
+    def book_range(self) -> tuple[int | None, int | None]:
+        """Effective inclusive book bounds (``None`` where unbounded)."""
+
+        low, high = self.book_min, self.book_max
+        if self.pitaka is not None:
+            first, last = PITAKA_BOOKS[self.pitaka]
+            low = first if low is None else max(low, first)
+            high = last if high is None else min(high, last)
+        return low, high
 
 
 class VectorStoreService(Protocol):
     """Abstract service definition for vector database operations."""
 
     async def similarity_search(
-        self, embedding: Sequence[float], *, limit: int
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
     ) -> list[VectorSearchResult]:
         """Return the closest matches for an embedding."""
 
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        """Return the closest matches for each embedding, in input order."""
+
+    async def hybrid_search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        """Return the best matches by fused vector and lexical rank."""
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        """Return the hybrid matches for each (embedding, text) pair, in order."""
+
 
-__all__ = ["VectorSearchResult", "VectorStoreService"]
\ No newline at end of file
+__all__ = [
+    "PITAKA_BOOKS",
+    "SearchFilter",
+    "SearchOptions",
+    "VectorSearchResult",
+    "VectorStoreService",
+]
\ No newline at end of file
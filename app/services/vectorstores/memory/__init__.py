@@ -0,0 +1,6 @@
+"""In-memory NumPy vector store."""
+
+from .ivf import IvfIndex, IvfVectorService
+from .store import NumpyVectorService
+
+__all__ = ["IvfIndex", "IvfVectorService", "NumpyVectorService"]
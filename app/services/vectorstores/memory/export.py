@@ -0,0 +1,181 @@
+"""Export the vector table to the files ``NumpyVectorService`` loads.
+
+Rows are read in keyset batches with the embedding in pgvector's binary
+format and written straight into a memory-mapped ``.npy`` matrix, so the
+export needs little memory whatever the corpus size. The files are written
+to a staging directory next to ``--out`` and renamed into place: workers
+that memory-mapped the previous export keep reading it, and an IVF index
+built for it is dropped with it rather than paired with the new rows:
+
+    python -m app.services.vectorstores.memory.export --out vector_store
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.enums import VectorStorage
+from app.database.session import async_read_session_factory, dispose_engines
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows
+from app.services.vectorstores.pgvector.models import PgVectorDocument, build_payload
+from app.services.vectorstores.pgvector.repository import (
+    PgVectorRepository,
+    decode_embedding,
+)
+
+from .store import (
+    BOOKS_FILE,
+    EMBEDDINGS_FILE,
+    IDS_FILE,
+    PAGES_FILE,
+    PAYLOAD_OFFSETS_FILE,
+    PAYLOADS_FILE,
+    write_payloads,
+)
+
+
+async def export_store(
+    session_factory: async_sessionmaker[AsyncSession],
+    out: Path,
+    *,
+    storage: VectorStorage = settings.VECTOR_STORAGE,
+    batch_size: int = 1000,
+) -> int:
+    """Write every row of the vector table to ``out``; returns the row count."""
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{out.name}-", dir=out.parent))
+    # ``mkdtemp`` creates the directory for its owner only.
+    staging.chmod(0o755)
+    try:
+        written = await _write_store(
+            session_factory, staging, storage=storage, batch_size=batch_size
+        )
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    replace_store(staging, out)
+    return written
+
+
+def replace_store(staging: Path, out: Path) -> None:
+    """Move the export in ``staging`` to ``out``, removing the previous one.
+
+    Files are never rewritten in place, so open memory maps of the previous
+    export stay valid until their workers reload.
+    """
+
+    if not out.exists():
+        staging.rename(out)
+        return
+    retired = Path(tempfile.mkdtemp(prefix=f".{out.name}-old-", dir=out.parent))
+    out.rename(retired / out.name)
+    staging.rename(out)
+    shutil.rmtree(retired)
+
+
+async def _write_store(
+    session_factory: async_sessionmaker[AsyncSession],
+    out: Path,
+    *,
+    storage: VectorStorage,
+    batch_size: int,
+) -> int:
+    repository = PgVectorRepository(session_factory, storage=storage)
+    columns = repository._columns(with_embedding=True)
+    async with session_factory() as session:
+        # One snapshot, so the row count holds for every batch.
+        await session.connection(
+            execution_options={"isolation_level": "REPEATABLE READ"}
+        )
+        rows = await session.scalar(select(func.count()).select_from(PgVectorDocument))
+        if not rows:
+            msg = "The vector table is empty."
+            raise ValueError(msg)
+
+        ids = np.empty(rows, dtype=np.int64)
+        books = np.full(rows, -1, dtype=np.int32)
+        pages = np.full(rows, -1, dtype=np.int32)
+        matrix: np.memmap | None = None
+        offsets = [0]
+        written = 0
+        with (out / PAYLOADS_FILE).open("wb") as payloads:
+            while written < rows:
+                stmt = select(*columns).order_by(PgVectorDocument.id).limit(batch_size)
+                if written:
+                    stmt = stmt.where(PgVectorDocument.id > int(ids[written - 1]))
+                batch = (await session.execute(stmt)).all()
+
+                vectors = normalize_rows(
+                    np.stack(
+                        [
+                            np.frombuffer(
+                                decode_embedding(row.embedding, storage),
+                                dtype=EMBEDDING_DTYPE,
+                            )
+                            for row in batch
+                        ]
+                    )
+                )
+                if matrix is None:
+                    matrix = np.lib.format.open_memmap(
+                        out / EMBEDDINGS_FILE,
+                        mode="w+",
+                        dtype=EMBEDDING_DTYPE,
+                        shape=(rows, vectors.shape[1]),
+                    )
+                matrix[written : written + len(batch)] = vectors
+                batch_payloads = [build_payload(row) for row in batch]
+                for offset, (row, payload) in enumerate(
+                    zip(batch, batch_payloads, strict=True), start=written
+                ):
+                    ids[offset] = row.id
+                    books[offset] = payload["book"]
+                    pages[offset] = payload["page"]
+                write_payloads(payloads, batch_payloads, offsets)
+                written += len(batch)
+                logger.info("Exported {}/{} rows", written, rows)
+
+    if matrix is not None:
+        matrix.flush()
+    np.save(out / IDS_FILE, ids)
+    np.save(out / BOOKS_FILE, books)
+    np.save(out / PAGES_FILE, pages)
+    np.save(out / PAYLOAD_OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+    return written
+
+
+async def _main(out: Path, batch_size: int) -> None:
+    try:
+        rows = await export_store(
+            async_read_session_factory, out, batch_size=batch_size
+        )
+        logger.info("Exported {} rows to {}", rows, out)
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    """Parse arguments and run the export."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--out", type=Path, default=Path(settings.VECTOR_MEMORY_PATH))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.out, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""Quantized inverted-file (IVF) index over an exported NumPy store.
+
+A coarse quantizer (spherical k-means centroids) splits the rows into
+lists; each row is also stored as a compact code, either ``int8`` (one
+byte per dimension, 4x smaller than float32) or ``binary`` (one bit per
+dimension, 32x smaller). A query scans only the ``nprobe`` lists whose
+centroids are closest, ranks their rows by the codes, and rescores a
+shortlist of ``rescore * limit`` rows exactly against the full-precision
+matrix, which stays memory-mapped and is only touched for that shortlist.
+
+The index is written next to the store it was built from:
+
+    python -m app.services.vectorstores.memory.ivf --path vector_store
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import settings
+from app.core.enums import QuantizedCodes
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows
+from app.services.vectorstores.interfaces import (
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+)
+
+from .store import EMBEDDINGS_FILE, NumpyVectorService, top_k
+
+IVF_META_FILE = "ivf.json"
+IVF_ARRAYS = ("centroids", "offsets", "order", "codes", "low", "scale")
+
+
+def default_lists(rows: int) -> int:
+    """Number of IVF lists for ``rows`` vectors, about ``sqrt(rows)``."""
+    return max(1, round(math.sqrt(rows)))
+
+
+def assign(
+    data: np.ndarray, centroids: np.ndarray, *, chunk: int = 8192
+) -> np.ndarray:
+    """Index of the most similar centroid of every row of ``data``."""
+
+    labels = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        block = np.asarray(data[start : start + chunk], dtype=EMBEDDING_DTYPE)
+        labels[start : start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _seed_centroids(data: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++ seeding: each next centroid is drawn far from those chosen."""
+
+    centroids = np.empty((k, data.shape[1]), dtype=EMBEDDING_DTYPE)
+    centroids[0] = data[rng.integers(len(data))]
+    closest = data @ centroids[0]
+    for index in range(1, k):
+        # Cosine distance to the nearest centroid, squared as in k-means++.
+        weights = np.square(np.clip(1.0 - closest, 0.0, None), dtype=np.float64)
+        total = weights.sum()
+        row = rng.choice(len(data), p=weights / total) if total > 0 else index
+        centroids[index] = data[row]
+        np.maximum(closest, data @ centroids[index], out=closest)
+    return centroids
+
+
+def kmeans(
+    data: np.ndarray, k: int, *, iterations: int = 20, seed: int = 0
+) -> np.ndarray:
+    """Unit-length centroids of ``k`` spherical k-means clusters of ``data``.
+
+    Rows of ``data`` are expected to be unit length. Centroids are seeded
+    with k-means++; clusters that run empty are re-seeded from random rows.
+    """
+
+    if not 0 < k <= len(data):
+        msg = f"k must be between 1 and the number of rows ({len(data)})."
+        raise ValueError(msg)
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=EMBEDDING_DTYPE)
+    centroids = _seed_centroids(data, k, rng)
+    for _ in range(iterations):
+        labels = assign(data, centroids)
+        # Sum each cluster's rows in one pass over the label-sorted data.
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        sums = np.add.reduceat(data[order], starts, axis=0)
+        updated = centroids.copy()
+        updated[present] = normalize_rows(sums)
+        empty = np.setdiff1d(np.arange(k), present)
+        if len(empty):
+            updated[empty] = data[rng.choice(len(data), size=len(empty))]
+        elif np.allclose(updated, centroids):
+            break
+        centroids = updated
+    return centroids
+
+
+class IvfIndex:
+    """IVF lists with quantized codes of the rows of one matrix.
+
+    Rows are stored grouped by list: ``order[offsets[i]:offsets[i + 1]]``
+    are the matrix rows of list ``i``, and ``codes`` follows ``order``.
+    """
+
+    def __init__(
+        self,
+        *,
+        kind: QuantizedCodes,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        order: np.ndarray,
+        codes: np.ndarray,
+        low: np.ndarray,
+        scale: np.ndarray,
+    ) -> None:
+        if len(offsets) != len(centroids) + 1 or len(order) != len(codes):
+            msg = "offsets must bound every list and codes must follow order."
+            raise ValueError(msg)
+        self.kind = kind
+        self.centroids = centroids
+        self.offsets = offsets
+        self.order = order
+        self.codes = codes
+        self.low = low
+        self.scale = scale
+
+    @property
+    def lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index (codes, row order and centroids)."""
+
+        return sum(getattr(self, name).nbytes for name in IVF_ARRAYS)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        *,
+        lists: int | None = None,
+        kind: QuantizedCodes = QuantizedCodes.INT8,
+        sample: int = 65536,
+        iterations: int = 20,
+        seed: int = 0,
+    ) -> IvfIndex:
+        """Train centroids on a sample of ``embeddings`` and encode every row."""
+
+        rows = len(embeddings)
+        lists = min(lists or default_lists(rows), rows)
+        rng = np.random.default_rng(seed)
+        size = min(rows, max(sample, lists))
+        picked = np.sort(rng.choice(rows, size=size, replace=False))
+        centroids = kmeans(
+            np.asarray(embeddings[picked]), lists, iterations=iterations, seed=seed
+        )
+        labels = assign(embeddings, centroids)
+        order = np.argsort(labels, kind="stable").astype(np.int64)
+        offsets = np.zeros(lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=lists), out=offsets[1:])
+
+        dimensions = embeddings.shape[1]
+        low = np.zeros(dimensions, dtype=EMBEDDING_DTYPE)
+        scale = np.ones(dimensions, dtype=EMBEDDING_DTYPE)
+        if kind == QuantizedCodes.INT8:
+            low = np.min(embeddings, axis=0).astype(EMBEDDING_DTYPE)
+            spread = np.max(embeddings, axis=0) - low
+            scale = (np.where(spread > 0, spread, 1) / 255).astype(EMBEDDING_DTYPE)
+        codes = np.empty(
+            (rows, dimensions if kind == QuantizedCodes.INT8 else -(-dimensions // 8)),
+            dtype=np.int8 if kind == QuantizedCodes.INT8 else np.uint8,
+        )
+        chunk = 8192
+        for start in range(0, rows, chunk):
+            block = np.asarray(embeddings[order[start : start + chunk]])
+            codes[start : start + chunk] = encode(block, kind, low, scale)
+        return cls(
+            kind=kind,
+            centroids=centroids,
+            offsets=offsets,
+            order=order,
+            codes=codes,
+            low=low,
+            scale=scale,
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Write the index into the store directory ``path``."""
+
+        root = Path(path)
+        for name in IVF_ARRAYS:
+            np.save(root / f"ivf_{name}.npy", getattr(self, name))
+        meta = {"kind": self.kind.value, "lists": self.lists, "rows": len(self.order)}
+        (root / IVF_META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path, *, mmap: bool = True) -> IvfIndex:
+        """Open an index written by ``save``; with ``mmap`` codes stay on disk."""
+
+        root = Path(path)
+        meta = json.loads((root / IVF_META_FILE).read_text(encoding="utf-8"))
+        mode: Literal["r"] | None = "r" if mmap else None
+        arrays = {
+            name: np.load(root / f"ivf_{name}.npy", mmap_mode=mode)
+            for name in IVF_ARRAYS
+        }
+        return cls(kind=QuantizedCodes(meta["kind"]), **arrays)
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        *,
+        nprobe: int,
+        shortlist: int,
+        mask: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Matrix rows of the ``shortlist`` best approximate matches of ``query``.
+
+        ``query`` must be unit length; ``mask`` drops rows failing a filter.
+        """
+
+        probed = top_k(self.centroids @ query, nprobe)
+        spans = [
+            np.arange(self.offsets[index], self.offsets[index + 1]) for index in probed
+        ]
+        positions = np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+        rows: np.ndarray = self.order[positions]
+        if mask is not None:
+            keep = mask[rows]
+            positions, rows = positions[keep], rows[keep]
+        if len(rows) == 0:
+            return rows
+        scores = approximate_scores(
+            self.codes[positions], query, self.kind, self.low, self.scale
+        )
+        best: np.ndarray = rows[top_k(scores, shortlist)]
+        return best
+
+
+def encode(
+    block: np.ndarray, kind: QuantizedCodes, low: np.ndarray, scale: np.ndarray
+) -> np.ndarray:
+    """Codes of the rows of ``block``."""
+
+    codes: np.ndarray
+    if kind == QuantizedCodes.BINARY:
+        codes = np.packbits(block > 0, axis=1)
+    else:
+        levels = np.rint((block - low) / scale)
+        codes = (np.clip(levels, 0, 255) - 128).astype(np.int8)
+    return codes
+
+
+def approximate_scores(
+    codes: np.ndarray,
+    query: np.ndarray,
+    kind: QuantizedCodes,
+    low: np.ndarray,
+    scale: np.ndarray,
+) -> np.ndarray:
+    """Similarity estimates of ``query`` with rows encoded as ``codes``.
+
+    Higher is better. ``int8`` estimates the dot product; ``binary`` is the
+    negated Hamming distance of the sign bits, good only for ranking.
+    """
+
+    scores: np.ndarray
+    if kind == QuantizedCodes.BINARY:
+        bits = np.packbits(query > 0)
+        scores = -np.bitwise_count(codes ^ bits).sum(axis=1, dtype=np.int32)
+    else:
+        # x = low + scale * (code + 128), so q.x is one small matrix-vector product.
+        weights = query * scale
+        offset = float(query @ low) + 128.0 * float(weights.sum())
+        scores = codes.astype(EMBEDDING_DTYPE) @ weights + offset
+    return scores
+
+
+class IvfVectorService(NumpyVectorService):
+    """``NumpyVectorService`` answering queries through an ``IvfIndex``.
+
+    ``SearchOptions.probes`` overrides ``nprobe`` per call and
+    ``SearchOptions.exact`` scans the whole matrix instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: IvfIndex,
+        nprobe: int = 8,
+        rescore: int = 4,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        if len(index.order) != len(self._ids):
+            msg = "The IVF index was built for a different store; rebuild it."
+            raise ValueError(msg)
+        self._index = index
+        self._nprobe = nprobe
+        self._rescore = rescore
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        *,
+        mmap: bool = True,
+        nprobe: int = 8,
+        rescore: int = 4,
+        **kwargs: Any,
+    ) -> IvfVectorService:
+        """Open an exported store and the IVF index built for it."""
+
+        index = IvfIndex.load(path, mmap=mmap)
+        logger.info(
+            "Loaded IVF index with {} lists of {} codes", index.lists, index.kind.value
+        )
+        return super().load(  # type: ignore[return-value]
+            path, mmap=mmap, index=index, nprobe=nprobe, rescore=rescore, **kwargs
+        )
+
+    def _approximate(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int,
+        nprobe: int,
+        filters: SearchFilter | None,
+        with_embedding: bool,
+    ) -> list[list[VectorSearchResult]]:
+        queries = normalize_rows(np.atleast_2d(np.asarray(embeddings)))
+        mask = self._mask(filters)
+        results: list[list[VectorSearchResult]] = []
+        for query in queries:
+            rows = self._index.candidates(
+                query, nprobe=nprobe, shortlist=limit * self._rescore, mask=mask
+            )
+            # Sorted rows read the memory-mapped matrix front to back.
+            rows = np.sort(rows)
+            exact = self._embeddings[rows] @ query
+            results.append(
+                [
+                    self._result(int(rows[best]), exact[best], with_embedding)
+                    for best in top_k(exact, limit)
+                ]
+            )
+        return results
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        if options is not None and options.exact:
+            return await super().similarity_search_many(
+                embeddings, limit=limit, filters=filters, with_embedding=with_embedding
+            )
+        if limit <= 0:
+            msg = "limit must be greater than zero"
+            raise ValueError(msg)
+        if len(embeddings) == 0:
+            return []
+        nprobe = self._nprobe
+        if options is not None and options.probes is not None:
+            nprobe = options.probes
+        return await asyncio.to_thread(
+            self._approximate, embeddings, limit, nprobe, filters, with_embedding
+        )
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        rows = await self.similarity_search_many(
+            [embedding],
+            limit=limit,
+            options=options,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+        return rows[0]
+
+
+__all__ = [
+    "IvfIndex",
+    "IvfVectorService",
+    "approximate_scores",
+    "assign",
+    "default_lists",
+    "encode",
+    "kmeans",
+]
+
+
+def main() -> None:
+    """Parse arguments and build the index for an exported store."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--path", type=Path, default=Path(settings.VECTOR_MEMORY_PATH))
+    parser.add_argument(
+        "--lists", type=int, default=None, help="IVF lists; about sqrt(rows) if unset."
+    )
+    parser.add_argument(
+        "--codes",
+        type=QuantizedCodes,
+        choices=list(QuantizedCodes),
+        default=settings.VECTOR_IVF_CODES,
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    embeddings = np.load(args.path / EMBEDDINGS_FILE, mmap_mode="r")
+    index = IvfIndex.build(
+        embeddings, lists=args.lists, kind=args.codes, iterations=args.iterations
+    )
+    index.save(args.path)
+    logger.info(
+        "Built {} IVF lists of {} codes for {} rows ({:.1f} MiB)",
+        index.lists,
+        index.kind.value,
+        len(index.order),
+        index.nbytes / 2**20,
+    )
+
+
+if __name__ == "__main__":
+    main()
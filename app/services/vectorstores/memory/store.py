@@ -0,0 +1,322 @@
+"""Exact vector search over an in-process NumPy matrix.
+
+All page embeddings are held as one contiguous, L2-normalized float32
+matrix, so a query is a single BLAS matrix-vector product followed by
+``argpartition`` (a matrix-matrix product for batched queries). The matrix
+is usually memory-mapped from a directory written by ``export.py``:
+
+    embeddings.npy        float32 (rows, dimensions), unit rows
+    ids.npy               int64 page ids
+    books.npy             int32 book numbers, -1 where unknown
+    pages.npy             int32 page numbers, -1 where unknown
+    payloads.bin          UTF-8 JSON payloads of every row, concatenated
+    payload_offsets.npy   int64 (rows + 1) byte offsets into payloads.bin
+
+Every file is read-only and memory-mapped, so gunicorn workers share one
+copy of the store through the page cache, and loading it parses nothing:
+a payload is decoded only when its row is returned.
+
+Scores are cosine distances, as ``PgVectorRepository`` reports them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any, BinaryIO, Literal
+
+import numpy as np
+from loguru import logger
+
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows
+from app.services.vectorstores.interfaces import (
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+    VectorStoreService,
+)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+BOOKS_FILE = "books.npy"
+PAGES_FILE = "pages.npy"
+PAYLOADS_FILE = "payloads.bin"
+PAYLOAD_OFFSETS_FILE = "payload_offsets.npy"
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the ``k`` highest ``scores`` per row, best first."""
+
+    k = min(k, scores.shape[-1])
+    if k == 0:
+        return np.empty((*scores.shape[:-1], 0), dtype=np.intp)
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(
+            np.arange(scores.shape[-1]), scores.shape
+        ).copy()
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def encode_payload(payload: dict[str, Any]) -> bytes:
+    """Packed form of one payload."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def write_payloads(
+    handle: BinaryIO, payloads: Iterable[dict[str, Any]], offsets: list[int]
+) -> None:
+    """Append ``payloads`` to ``handle`` and the end offset of each to ``offsets``.
+
+    ``offsets`` starts as ``[0]`` for a new file.
+    """
+
+    for payload in payloads:
+        data = encode_payload(payload)
+        handle.write(data)
+        offsets.append(offsets[-1] + len(data))
+
+
+class PackedPayloads(Sequence[dict[str, Any]]):
+    """Read-only payloads of a store, decoded from ``payloads.bin`` on access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self._blob = blob
+        self._offsets = offsets
+
+    @classmethod
+    def load(cls, path: str | Path, *, mmap: bool = True) -> PackedPayloads:
+        root = Path(path)
+        offsets = np.load(root / PAYLOAD_OFFSETS_FILE, mmap_mode="r" if mmap else None)
+        blob_path = root / PAYLOADS_FILE
+        blob: np.ndarray
+        if mmap and blob_path.stat().st_size:
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            # ``np.memmap`` cannot map an empty file.
+            blob = np.fromfile(blob_path, dtype=np.uint8)
+        return cls(blob, offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self._blob.nbytes + self._offsets.nbytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> dict[str, Any]:  # type: ignore[override]
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        index %= len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        payload: dict[str, Any] = json.loads(self._blob[start:end].tobytes())
+        return payload
+
+
+class NumpyVectorService(VectorStoreService):
+    """Vector store service answering similarity queries from memory.
+
+    Search is exact, so ``SearchOptions`` have no effect. Hybrid search is
+    delegated to ``fallback``.
+    """
+
+    def __init__(
+        self,
+        *,
+        ids: np.ndarray,
+        embeddings: np.ndarray,
+        books: np.ndarray,
+        pages: np.ndarray,
+        payloads: Sequence[dict[str, Any]],
+        fallback: VectorStoreService | None = None,
+    ) -> None:
+        lengths = {len(ids), len(embeddings), len(books), len(pages), len(payloads)}
+        if len(lengths) > 1:
+            msg = "ids, embeddings, books, pages and payloads must have equal length."
+            raise ValueError(msg)
+        self._ids = ids
+        self._embeddings = embeddings
+        self._books = books
+        self._pages = pages
+        self._payloads = payloads
+        self._fallback = fallback
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        *,
+        mmap: bool = True,
+        fallback: VectorStoreService | None = None,
+        **kwargs: Any,
+    ) -> NumpyVectorService:
+        """Open an exported store; with ``mmap`` every file stays on disk.
+
+        Load before gunicorn forks (``preload_app``) and the mapped pages
+        are shared by all workers. Extra ``kwargs`` go to the constructor
+        of subclasses.
+        """
+
+        root = Path(path)
+        mode: Literal["r"] | None = "r" if mmap else None
+        embeddings = np.load(root / EMBEDDINGS_FILE, mmap_mode=mode)
+        if embeddings.dtype != EMBEDDING_DTYPE:
+            embeddings = embeddings.astype(EMBEDDING_DTYPE)
+        logger.info(
+            "Loaded {} vectors of {} dimensions from {}", *embeddings.shape, root
+        )
+        return cls(
+            ids=np.load(root / IDS_FILE, mmap_mode=mode),
+            embeddings=embeddings,
+            books=np.load(root / BOOKS_FILE, mmap_mode=mode),
+            pages=np.load(root / PAGES_FILE, mmap_mode=mode),
+            payloads=PackedPayloads.load(root, mmap=mmap),
+            fallback=fallback,
+            **kwargs,
+        )
+
+    def _mask(self, filters: SearchFilter | None) -> np.ndarray | None:
+        """Rows matching ``filters``; ``None`` means every row."""
+
+        if filters is None:
+            return None
+        mask = self._books >= 0
+        bounds = (
+            (self._books, filters.book_range()),
+            (self._pages, (filters.page_min, filters.page_max)),
+        )
+        for field, (low, high) in bounds:
+            if low is not None:
+                mask &= field >= low
+            if high is not None:
+                mask &= field <= high
+        return mask
+
+    def _search(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int,
+        filters: SearchFilter | None,
+        with_embedding: bool,
+    ) -> list[list[VectorSearchResult]]:
+        queries = normalize_rows(np.atleast_2d(np.asarray(embeddings)))
+        # (queries, rows) cosine similarities in one BLAS call. Filtered rows
+        # are masked afterwards: cheaper than gathering a sub-matrix.
+        scores = queries @ self._embeddings.T
+        mask = self._mask(filters)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        best = top_k(scores, limit)
+
+        results: list[list[VectorSearchResult]] = []
+        for query_scores, indices in zip(scores, best, strict=True):
+            hits = []
+            for index in indices:
+                similarity = query_scores[index]
+                if similarity == -np.inf:
+                    break
+                hits.append(self._result(int(index), similarity, with_embedding))
+            results.append(hits)
+        return results
+
+    def _result(
+        self, index: int, similarity: float, with_embedding: bool
+    ) -> VectorSearchResult:
+        """Search result for row ``index`` with cosine ``similarity``."""
+
+        return VectorSearchResult(
+            id=str(self._ids[index]),
+            score=float(1.0 - similarity),
+            payload=self._payloads[index],
+            embedding=self._embeddings[index].tobytes() if with_embedding else None,
+        )
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        rows = await self.similarity_search_many(
+            [embedding], limit=limit, filters=filters, with_embedding=with_embedding
+        )
+        return rows[0]
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        if limit <= 0:
+            msg = "limit must be greater than zero"
+            raise ValueError(msg)
+        if len(embeddings) == 0:
+            return []
+        # BLAS releases the GIL; keep the event loop free meanwhile.
+        return await asyncio.to_thread(
+            self._search, embeddings, limit, filters, with_embedding
+        )
+
+    def _require_fallback(self) -> VectorStoreService:
+        if self._fallback is None:
+            msg = "Hybrid search needs a fallback vector store service."
+            raise NotImplementedError(msg)
+        return self._fallback
+
+    async def hybrid_search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        return await self._require_fallback().hybrid_search(
+            embedding,
+            text,
+            limit=limit,
+            options=options,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        return await self._require_fallback().hybrid_search_many(
+            embeddings,
+            texts,
+            limit=limit,
+            options=options,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+
+
+__all__ = [
+    "NumpyVectorService",
+    "PackedPayloads",
+    "encode_payload",
+    "top_k",
+    "write_payloads",
+]
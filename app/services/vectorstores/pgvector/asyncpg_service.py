@@ -0,0 +1,319 @@
+"""Similarity search over a raw asyncpg pool, bypassing the ORM.
+
+Statements are plain SQL built once per filter shape; asyncpg prepares each
+on first use per pooled connection and reuses it from its statement cache.
+Query vectors travel in pgvector's binary format and rows are turned into
+``VectorSearchResult`` objects directly. Hybrid search is delegated to
+``fallback``. Selected with ``VECTOR_BACKEND=asyncpg``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+import asyncpg
+from cachetools import LRUCache
+from pgvector.asyncpg import HalfVector, Vector, register_vector
+from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
+
+from app.core.enums import VectorDistance, VectorStorage
+from app.services.recording import recorder
+from app.services.vectorstores.interfaces import (
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+    VectorStoreService,
+)
+
+from .models import PAYLOAD_COLUMNS, TABLE_NAME, parse_description
+from .repository import PgVectorRepository, decode_embedding
+from .service import _check_limit, _digest, _recorded_search, _request
+
+_OPERATORS = {VectorDistance.COSINE: "<=>", VectorDistance.INNER_PRODUCT: "<#>"}
+_VECTOR_TYPES = {VectorStorage.VECTOR: Vector, VectorStorage.HALFVEC: HalfVector}
+
+
+def filter_sql(filters: SearchFilter | None) -> str:
+    """``WHERE`` clause for ``filters``, with bounds inlined like the repository's."""
+
+    conditions = PgVectorRepository._conditions(filters)
+    if not conditions:
+        return ""
+    compiled = and_(*conditions).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    return f"WHERE {compiled} "
+
+
+def query_vectors(
+    embeddings: Sequence[Sequence[float]], storage: VectorStorage
+) -> list[Vector | HalfVector]:
+    """``embeddings`` as pgvector values, bound as one element each of ``$1``.
+
+    asyncpg encodes any sized element of an array parameter (a list or an
+    ndarray) as a sub-array, so bare vectors would become a 2-D array.
+    """
+
+    vector_type = _VECTOR_TYPES[storage]
+    return [vector_type(embedding) for embedding in embeddings]
+
+
+def similarity_sql(
+    table: str,
+    *,
+    distance: VectorDistance,
+    storage: VectorStorage,
+    filters: SearchFilter | None = None,
+    with_embedding: bool = False,
+) -> str:
+    """Top-``$2`` matches of each vector in ``$1`` (an array), in one statement.
+
+    Columns and scores match ``PgVectorRepository``: inner product is
+    reported as ``1 + <#>``, the cosine distance of unit vectors.
+    """
+
+    operator = _OPERATORS[distance]
+    order = f"{table}.embedding {operator} q.query"
+    score = f"1 + ({order})" if distance == VectorDistance.INNER_PRODUCT else order
+    columns = ", ".join(f"{table}.{name}" for name in PAYLOAD_COLUMNS)
+    embedding = (
+        f", {storage.value}_send({table}.embedding) AS embedding"
+        if with_embedding
+        else ""
+    )
+    return (
+        "SELECT q.query_index, m.* "
+        f"FROM unnest($1::{storage.value}[]) WITH ORDINALITY AS q(query, query_index) "
+        "CROSS JOIN LATERAL ("
+        f"SELECT {table}.id, CASE WHEN {table}.book IS NULL "
+        f"THEN {table}.description END AS description, {columns}, "
+        f"{score} AS score{embedding} "
+        f"FROM {table} {filter_sql(filters)}"
+        f"ORDER BY {order} LIMIT $2"
+        ") AS m "
+        "ORDER BY q.query_index, m.score"
+    )
+
+
+def _payload(record: Any) -> dict[str, Any]:
+    if record["book"] is None:
+        return parse_description(record["description"])
+    return {
+        "book": record["book"],
+        "page": record["page"],
+        "header": record["header"] or "",
+        "contents": record["contents"] or [],
+        "footnotes": record["footnotes"] or [],
+    }
+
+
+class AsyncpgVectorService(VectorStoreService):
+    """Vector store service running prepared similarity queries on asyncpg."""
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        fallback: VectorStoreService,
+        distance: VectorDistance = VectorDistance.COSINE,
+        storage: VectorStorage = VectorStorage.VECTOR,
+        min_size: int = 1,
+        max_size: int = 10,
+    ) -> None:
+        self._dsn = dsn
+        self._fallback = fallback
+        self._distance = distance
+        self._storage = storage
+        self._min_size = min_size
+        self._max_size = max_size
+        self._table = TABLE_NAME
+        # Filters come from tool arguments, so keep only recent shapes.
+        self._statements: LRUCache[tuple[SearchFilter | None, bool], str] = (
+            LRUCache(maxsize=128)
+        )
+        self._pool: asyncpg.Pool | None = None
+        self._lock = asyncio.Lock()
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self._dsn,
+                        min_size=self._min_size,
+                        max_size=self._max_size,
+                        init=register_vector,
+                    )
+        return self._pool
+
+    def _statement(self, filters: SearchFilter | None, with_embedding: bool) -> str:
+        key = (filters, with_embedding)
+        sql = self._statements.get(key)
+        if sql is None:
+            sql = self._statements[key] = similarity_sql(
+                self._table,
+                distance=self._distance,
+                storage=self._storage,
+                filters=filters,
+                with_embedding=with_embedding,
+            )
+        return sql
+
+    def _to_result(self, record: Any) -> VectorSearchResult:
+        blob = record.get("embedding")
+        return VectorSearchResult(
+            id=str(record["id"]),
+            score=float(record["score"]),
+            payload=_payload(record),
+            embedding=None if blob is None else decode_embedding(blob, self._storage),
+        )
+
+    async def _search(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        limit: int,
+        options: SearchOptions | None,
+        filters: SearchFilter | None,
+        with_embedding: bool,
+    ) -> list[list[VectorSearchResult]]:
+        sql = self._statement(filters, with_embedding)
+        queries = query_vectors(embeddings, self._storage)
+        gucs = {}
+        if options is not None:
+            gucs = {
+                "hnsw.ef_search": options.ef_search,
+                "ivfflat.probes": options.probes,
+                "enable_indexscan": "off" if options.exact else None,
+            }
+        gucs = {name: str(value) for name, value in gucs.items() if value is not None}
+
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            if gucs:
+                async with conn.transaction():
+                    for name, value in gucs.items():
+                        await conn.execute(
+                            "SELECT set_config($1, $2, true)", name, value
+                        )
+                    records = await conn.fetch(sql, queries, limit)
+            else:
+                records = await conn.fetch(sql, queries, limit)
+
+        rows: list[list[VectorSearchResult]] = [[] for _ in embeddings]
+        for record in records:
+            rows[record["query_index"] - 1].append(self._to_result(record))
+        return rows
+
+    @staticmethod
+    async def _recorded(
+        request: dict[str, Any],
+        search: Callable[[], Awaitable[list[list[VectorSearchResult]]]],
+        *,
+        single: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        """Run ``search`` directly, or through the recorder when it is enabled.
+
+        Cassettes have the shape ``PgVectorService`` writes, so either backend
+        replays the other's recordings.
+        """
+
+        if not recorder.enabled:
+            return await search()
+        return await _recorded_search(request, search, single=single)
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        _check_limit(limit)
+
+        request = _request(
+            limit, options, filters, with_embedding, embedding=_digest(embedding)
+        )
+        rows = await self._recorded(
+            request,
+            lambda: self._search([embedding], limit, options, filters, with_embedding),
+            single=True,
+        )
+        return rows[0]
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        _check_limit(limit)
+        if not embeddings:
+            return []
+
+        request = _request(
+            limit,
+            options,
+            filters,
+            with_embedding,
+            embeddings=[_digest(embedding) for embedding in embeddings],
+        )
+        return await self._recorded(
+            request,
+            lambda: self._search(embeddings, limit, options, filters, with_embedding),
+        )
+
+    async def hybrid_search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        return await self._fallback.hybrid_search(
+            embedding,
+            text,
+            limit=limit,
+            options=options,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        return await self._fallback.hybrid_search_many(
+            embeddings,
+            texts,
+            limit=limit,
+            options=options,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+__all__ = ["AsyncpgVectorService", "filter_sql", "query_vectors", "similarity_sql"]
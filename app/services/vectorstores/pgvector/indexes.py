@@ -0,0 +1,410 @@
+"""ANN index management for the vector table.
+
+Builds, rebuilds and drops HNSW or IVFFlat indexes on ``embedding`` without
+blocking reads (``CONCURRENTLY``, outside a transaction). The operator class
+must match ``VECTOR_DISTANCE`` for queries to use the index:
+
+    python -m app.services.vectorstores.pgvector.indexes create --type hnsw
+    python -m app.services.vectorstores.pgvector.indexes rebuild --type hnsw
+    python -m app.services.vectorstores.pgvector.indexes list
+
+``--pitaka`` builds partial indexes covering one basket each, so searches
+filtered to a basket walk a graph of that basket only instead of
+post-filtering the global one; ``filters`` adds the ``(book, page)`` btree
+used for narrow book/page ranges:
+
+    python -m app.services.vectorstores.pgvector.indexes create \\
+        --pitaka vinaya sutta abhidhamma
+    python -m app.services.vectorstores.pgvector.indexes filters
+
+``lexical`` enables ``pg_trgm`` and adds the GIN trigram index hybrid search
+ranks page text with.
+
+Search-time recall is tuned per query (``hnsw.ef_search`` /
+``ivfflat.probes``) through ``SearchOptions``.
+
+pgvector indexes at most 2000 dimensions of ``vector`` and 4000 of
+``halfvec``. The shipped 3072-d ``vector`` column must be reduced first
+(``migrations --reduce-dimensions 768``) or stored as ``halfvec``
+(``migrations --reduce-dimensions 3072 --storage halfvec``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.core.enums import Pitaka, VectorDistance, VectorIndexType, VectorStorage
+from app.database.session import engine
+from app.services.vectorstores.interfaces import PITAKA_BOOKS
+
+from .models import TABLE_NAME
+
+_OPERATOR_SUFFIX = {
+    VectorDistance.COSINE: "cosine_ops",
+    VectorDistance.INNER_PRODUCT: "ip_ops",
+}
+
+# Most dimensions pgvector's HNSW and IVFFlat indexes accept, per column type.
+MAX_INDEX_DIMENSIONS = {VectorStorage.VECTOR: 2000, VectorStorage.HALFVEC: 4000}
+
+
+class IndexDimensionsError(ValueError):
+    """Raised when the embedding column is too wide for an ANN index."""
+
+
+def check_index_dimensions(dimensions: int | None, storage: VectorStorage) -> None:
+    """Raise ``IndexDimensionsError`` unless ``storage(dimensions)`` is indexable."""
+
+    limit = MAX_INDEX_DIMENSIONS[storage]
+    if dimensions is not None and 0 < dimensions <= limit:
+        return
+    column = f"{storage.value}({dimensions})" if dimensions else storage.value
+    msg = (
+        f"pgvector cannot index embedding {column}: ANN indexes need declared "
+        f"dimensions, at most {limit} for {storage.value}. Reduce them with "
+        "`python -m app.services.vectorstores.pgvector.migrations "
+        "--reduce-dimensions 768`"
+    )
+    if dimensions and dimensions <= MAX_INDEX_DIMENSIONS[VectorStorage.HALFVEC]:
+        msg += " or store them as halfvec with `--storage halfvec`"
+    raise IndexDimensionsError(msg + ".")
+
+
+def operator_class(distance: VectorDistance, storage: VectorStorage) -> str:
+    """pgvector operator class indexing ``storage`` columns for ``distance``."""
+    return f"{storage.value}_{_OPERATOR_SUFFIX[distance]}"
+
+
+def _table(table: str | None) -> str:
+    """``table`` quoted, or the vector table when ``None``."""
+    return engine.dialect.identifier_preparer.quote(table or TABLE_NAME)
+
+
+def index_name(
+    index_type: VectorIndexType,
+    distance: VectorDistance,
+    pitaka: Pitaka | None = None,
+    *,
+    table: str | None = None,
+) -> str:
+    """Name of the index of ``index_type`` serving ``distance`` queries.
+
+    ``table`` defaults to the vector table, e.g. a shadow table being built.
+    """
+    table = table or TABLE_NAME
+    name = f"{table}_embedding_{index_type.value}_{_OPERATOR_SUFFIX[distance]}"
+    return name if pitaka is None else f"{name}_{pitaka.value}"
+
+
+def pitaka_predicate(pitaka: Pitaka) -> str:
+    """Partial index predicate of ``pitaka``, in the form the repository filters by."""
+    first, last = PITAKA_BOOKS[pitaka]
+    return f"book >= {first} AND book <= {last}"
+
+
+def default_lists(rows: int) -> int:
+    """IVFFlat list count recommended by pgvector: rows/1000, sqrt(rows) past 1M."""
+    if rows > 1_000_000:
+        return max(1, round(math.sqrt(rows)))
+    return max(1, rows // 1000)
+
+
+def create_index_sql(
+    index_type: VectorIndexType,
+    distance: VectorDistance,
+    storage: VectorStorage,
+    *,
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int = 100,
+    pitaka: Pitaka | None = None,
+    table: str | None = None,
+) -> str:
+    """``CREATE INDEX CONCURRENTLY`` statement for the embedding column."""
+
+    if index_type == VectorIndexType.HNSW:
+        with_clause = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        with_clause = f"lists = {int(lists)}"
+    name = index_name(index_type, distance, pitaka, table=table)
+    sql = (
+        f"CREATE INDEX CONCURRENTLY {name} "
+        f"ON {_table(table)} USING {index_type.value} "
+        f"(embedding {operator_class(distance, storage)}) WITH ({with_clause})"
+    )
+    if pitaka is not None:
+        sql += f" WHERE {pitaka_predicate(pitaka)}"
+    return sql
+
+
+async def embedding_column(
+    conn: AsyncConnection, table: str | None = None
+) -> tuple[VectorStorage, int | None]:
+    """Storage type and declared dimensions of ``table.embedding``."""
+
+    row = (
+        await conn.execute(
+            text(
+                "SELECT t.typname, a.atttypmod FROM pg_attribute a "
+                "JOIN pg_type t ON t.oid = a.atttypid "
+                "WHERE a.attrelid = CAST(:table AS regclass) "
+                "AND a.attname = 'embedding'"
+            ),
+            {"table": _table(table)},
+        )
+    ).one()
+    # pgvector keeps the dimensions in the type modifier; -1 when undeclared.
+    return VectorStorage(row[0]), row[1] if row[1] > 0 else None
+
+
+async def _index_valid(conn: AsyncConnection, name: str) -> bool | None:
+    """``pg_index.indisvalid`` of ``name``, or ``None`` if it does not exist."""
+    valid: bool | None = await conn.scalar(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {"name": name},
+    )
+    return valid
+
+
+async def create_index(
+    bind: AsyncEngine,
+    index_type: VectorIndexType,
+    distance: VectorDistance,
+    *,
+    m: int = settings.VECTOR_HNSW_M,
+    ef_construction: int = settings.VECTOR_HNSW_EF_CONSTRUCTION,
+    lists: int | None = settings.VECTOR_IVFFLAT_LISTS,
+    maintenance_work_mem: str | None = None,
+    pitaka: Pitaka | None = None,
+    table: str | None = None,
+) -> str:
+    """Create the index unless a valid one exists; returns its name.
+
+    An invalid index left by an interrupted concurrent build is dropped and
+    rebuilt. ``maintenance_work_mem`` (e.g. ``"2GB"``) speeds up HNSW builds
+    that would otherwise spill to disk. With ``pitaka`` the index is partial,
+    covering that basket's books only. ``table`` defaults to the vector table.
+    The operator class follows the column's storage type as the catalog
+    reports it. Raises ``IndexDimensionsError`` before any DDL when the column is wider
+    than pgvector can index.
+    """
+
+    name = index_name(index_type, distance, pitaka, table=table)
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        valid = await _index_valid(conn, name)
+        if valid:
+            logger.info("Index {} already exists", name)
+            return name
+        column_storage, dimensions = await embedding_column(conn, table)
+        check_index_dimensions(dimensions, column_storage)
+        if valid is False:
+            logger.warning("Dropping invalid index {} left by a failed build", name)
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+        if index_type == VectorIndexType.IVFFLAT and lists is None:
+            where = "" if pitaka is None else f" WHERE {pitaka_predicate(pitaka)}"
+            rows = await conn.scalar(
+                text(f"SELECT count(*) FROM {_table(table)}{where}")
+            )
+            lists = default_lists(rows or 0)
+        if maintenance_work_mem:
+            await conn.execute(
+                text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                {"value": maintenance_work_mem},
+            )
+
+        logger.info("Building {} index {}", index_type.value, name)
+        await conn.execute(
+            text(
+                create_index_sql(
+                    index_type,
+                    distance,
+                    column_storage,
+                    m=m,
+                    ef_construction=ef_construction,
+                    lists=lists or 100,
+                    pitaka=pitaka,
+                    table=table,
+                )
+            )
+        )
+    return name
+
+
+async def rebuild_index(
+    bind: AsyncEngine,
+    index_type: VectorIndexType,
+    distance: VectorDistance,
+    pitaka: Pitaka | None = None,
+) -> None:
+    """Rebuild the index without blocking reads, e.g. after bulk loads.
+
+    IVFFlat lists are fixed at build time, so rebuild after the corpus grows
+    or changes distribution.
+    """
+
+    name = index_name(index_type, distance, pitaka)
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"REINDEX INDEX CONCURRENTLY {name}"))
+    logger.info("Rebuilt index {}", name)
+
+
+async def drop_index(
+    bind: AsyncEngine,
+    index_type: VectorIndexType,
+    distance: VectorDistance,
+    pitaka: Pitaka | None = None,
+) -> None:
+    """Drop the index without blocking reads."""
+
+    name = index_name(index_type, distance, pitaka)
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    logger.info("Dropped index {}", name)
+
+
+async def create_filter_index(bind: AsyncEngine, *, table: str | None = None) -> str:
+    """Create the ``(book, page)`` btree used by narrow metadata filters."""
+
+    name = f"{table or TABLE_NAME}_book_page_idx"
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if await _index_valid(conn, name) is False:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        await conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {_table(table)} (book, page)"
+            )
+        )
+    logger.info("Filter index {} ready", name)
+    return name
+
+
+async def create_lexical_index(bind: AsyncEngine, *, table: str | None = None) -> str:
+    """Create the GIN trigram index on ``description`` used by hybrid search."""
+
+    name = f"{table or TABLE_NAME}_description_trgm_idx"
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        if await _index_valid(conn, name) is False:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        await conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {_table(table)} USING gin (description gin_trgm_ops)"
+            )
+        )
+    logger.info("Lexical index {} ready", name)
+    return name
+
+
+async def list_indexes(
+    bind: AsyncEngine, *, table: str | None = None
+) -> list[tuple[str, str, bool, int]]:
+    """Name, definition, validity and size in bytes of the table's indexes.
+
+    ``table`` defaults to the vector table.
+    """
+
+    async with bind.connect() as conn:
+        result = await conn.execute(
+            text(
+                "SELECT c.relname, pg_get_indexdef(i.indexrelid), i.indisvalid, "
+                "pg_relation_size(i.indexrelid) FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = CAST(:table AS regclass) ORDER BY c.relname"
+            ),
+            {"table": _table(table)},
+        )
+        return [tuple(row) for row in result.all()]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    # No --pitaka: the single index over the whole table.
+    scopes = args.pitaka or [None]
+    try:
+        if args.command == "create":
+            for pitaka in scopes:
+                await create_index(
+                    engine,
+                    args.type,
+                    args.distance,
+                    m=args.m,
+                    ef_construction=args.ef_construction,
+                    lists=args.lists,
+                    maintenance_work_mem=args.maintenance_work_mem,
+                    pitaka=pitaka,
+                )
+        elif args.command == "rebuild":
+            for pitaka in scopes:
+                await rebuild_index(engine, args.type, args.distance, pitaka)
+        elif args.command == "drop":
+            for pitaka in scopes:
+                await drop_index(engine, args.type, args.distance, pitaka)
+        elif args.command == "filters":
+            await create_filter_index(engine)
+        elif args.command == "lexical":
+            await create_lexical_index(engine)
+        else:
+            for name, definition, valid, size in await list_indexes(engine):
+                status = "valid" if valid else "INVALID"
+                print(f"{name:<48} {status:<8} {size / 2**20:8.1f}MB  {definition}")
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the index command."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "command",
+        choices=["create", "rebuild", "drop", "filters", "lexical", "list"],
+    )
+    parser.add_argument(
+        "--type",
+        type=VectorIndexType,
+        choices=list(VectorIndexType),
+        default=settings.VECTOR_INDEX_TYPE,
+    )
+    parser.add_argument(
+        "--distance",
+        type=VectorDistance,
+        choices=list(VectorDistance),
+        default=settings.VECTOR_DISTANCE,
+    )
+    parser.add_argument(
+        "--pitaka",
+        type=Pitaka,
+        nargs="+",
+        choices=list(Pitaka),
+        help="Partial indexes, one per basket, instead of one over all pages.",
+    )
+    parser.add_argument("--m", type=int, default=settings.VECTOR_HNSW_M)
+    parser.add_argument(
+        "--ef-construction", type=int, default=settings.VECTOR_HNSW_EF_CONSTRUCTION
+    )
+    parser.add_argument("--lists", type=int, default=settings.VECTOR_IVFFLAT_LISTS)
+    parser.add_argument("--maintenance-work-mem", help="e.g. 2GB, for this build only.")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
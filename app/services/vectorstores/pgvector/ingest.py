@@ -0,0 +1,412 @@
+"""Bulk ingestion of pages and embeddings into the vector table.
+
+Pages are read from the extracted book files (``tripitika_data/books``),
+embedded in concurrent batches and streamed into a temporary staging table
+with asyncpg binary ``COPY``; one ``INSERT ... ON CONFLICT`` then upserts
+them by id, and rows of pages no longer in the source are deleted in the
+same transaction. Ids are derived from each page's book and page number, so
+they survive pages being added or removed elsewhere. ``content_hash``
+(sha256 of ``description``) makes re-runs idempotent: unchanged pages are
+neither re-embedded nor rewritten. Indexes
+are built after the load; the ANN index is skipped with a warning while the
+column is wider than pgvector can index (3072-d ``vector`` by default):
+
+    python -m app.services.vectorstores.pgvector.ingest --books tripitika_data/books
+
+An ``embedding.csv`` written by ``rag_ingestion_pipeline`` (``id``,
+``description``, ``embedding``) is loaded the same way without calling the
+embedding API; its positional ids are replaced by the derived ones:
+
+    python -m app.services.vectorstores.pgvector.ingest --csv embedding.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import sys
+import time
+from collections.abc import AsyncIterator, Collection, Iterable, Iterator
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Any
+
+import asyncpg
+import numpy as np
+from google import genai
+from loguru import logger
+from pgvector.asyncpg import register_vector
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.enums import VectorIndexType
+from app.database.session import async_session_factory, asyncpg_dsn, engine
+from app.services.embeddings import truncate_embeddings
+from app.workflows.pipelines import RagService
+
+from .indexes import (
+    IndexDimensionsError,
+    create_filter_index,
+    create_index,
+    create_lexical_index,
+    drop_index,
+    rebuild_index,
+)
+from .migrations import add_payload_columns, quoted_table
+from .models import PAYLOAD_COLUMNS, parse_description
+from .repository import PgVectorRepository
+from .service import PgVectorService
+
+COLUMNS = ("id", "description", "embedding", *PAYLOAD_COLUMNS, "content_hash")
+STAGING_TABLE = "ingest_staging"
+# Ids are ``book * PAGE_ID_STRIDE + page``; books have fewer pages than this.
+PAGE_ID_STRIDE = 10_000
+
+
+@dataclass(slots=True)
+class IngestRecord:
+    """One page as copied into the staging table, in ``COLUMNS`` order."""
+
+    id: int
+    description: str
+    embedding: Any
+    book: int
+    page: int
+    header: str
+    contents: list[str]
+    footnotes: list[str]
+    content_hash: bytes
+
+
+def page_description(page: dict[str, Any]) -> str:
+    """Text stored in ``description`` and embedded for a page.
+
+    Same cleanup as ``rag_ingestion_pipeline/CalculateEmbeddings.ipynb``, so
+    existing rows keep their hashes.
+    """
+
+    return (
+        str(page)
+        .replace("\ufffd", "")
+        .replace("\\x93", '"')
+        .replace("\\x94", '"')
+    )
+
+
+def content_hash(description: str) -> bytes:
+    """Digest of a page's stored text."""
+    return hashlib.sha256(description.encode()).digest()
+
+
+def page_id(book: int, page: int) -> int:
+    """Stable id of ``page`` of ``book``."""
+
+    if not 0 <= page < PAGE_ID_STRIDE:
+        msg = f"Page {page} of book {book} does not fit the id scheme."
+        raise ValueError(msg)
+    return book * PAGE_ID_STRIDE + page
+
+
+def iter_pages(root: Path) -> Iterator[tuple[int, str]]:
+    """``(id, description)`` of every page, in book order."""
+
+    for path in sorted(root.glob("book*")):
+        if path.is_file():
+            for page in json.loads(path.read_text(encoding="utf-8")):
+                row_id = page_id(int(page["book"]), int(page["page"]))
+                yield row_id, page_description(page)
+
+
+def iter_csv(path: Path) -> Iterator[tuple[int, str, np.ndarray]]:
+    """``(id, description, embedding)`` rows of a pipeline ``embedding.csv``."""
+
+    csv.field_size_limit(sys.maxsize)
+    with path.open(encoding="utf-8", newline="") as handle:
+        for _, description, embedding in csv.reader(handle):
+            page = parse_description(description)
+            yield (
+                page_id(page["book"], page["page"]),
+                description,
+                np.asarray(json.loads(embedding), dtype=np.float32),
+            )
+
+
+def build_record(row_id: int, description: str, embedding: Any) -> IngestRecord:
+    """Staging row with the payload columns parsed from ``description``."""
+
+    payload = parse_description(description)
+    return IngestRecord(
+        row_id,
+        description,
+        embedding,
+        payload["book"],
+        payload["page"],
+        payload["header"],
+        payload["contents"],
+        payload["footnotes"],
+        content_hash(description),
+    )
+
+
+def upsert_sql(table: str, *, only_changed: bool = True) -> str:
+    """Move staged rows into ``table``.
+
+    With ``only_changed`` existing rows are rewritten only when their text
+    changed.
+    """
+
+    columns = ", ".join(COLUMNS)
+    updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in COLUMNS[1:])
+    sql = (
+        f"INSERT INTO {table} AS target ({columns}) "
+        f"SELECT {columns} FROM {STAGING_TABLE} "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    )
+    if only_changed:
+        sql += " WHERE target.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+    return sql
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    batch: list[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _embedded_pages(
+    pages: Iterable[tuple[int, str]],
+    embed: Any,
+    *,
+    batch_size: int,
+    concurrency: int,
+) -> AsyncIterator[IngestRecord]:
+    """Embed ``concurrency`` batches at a time and yield their records."""
+
+    for group in _batched(_batched(pages, batch_size), concurrency):
+        vectors = await asyncio.gather(
+            *(embed([description for _, description in batch]) for batch in group)
+        )
+        for batch, embeddings in zip(group, vectors, strict=True):
+            for (row_id, description), embedding in zip(
+                batch, embeddings, strict=True
+            ):
+                yield build_record(row_id, description, embedding)
+
+
+async def copy_and_upsert(
+    conn: asyncpg.Connection,
+    records: AsyncIterator[IngestRecord],
+    *,
+    only_changed: bool = True,
+    keep_ids: Collection[int] | None = None,
+) -> tuple[int, int]:
+    """Binary-``COPY`` ``records`` into staging and upsert them in one transaction.
+
+    ``keep_ids`` are the ids of every source page, staged or skipped as
+    unchanged; once ``records`` are consumed, rows with other ids are deleted
+    in the same transaction. Nothing is deleted when it is empty. Returns the
+    number of rows staged and the number written.
+    """
+
+    table = quoted_table()
+    async with conn.transaction():
+        await conn.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        status = await conn.copy_records_to_table(
+            STAGING_TABLE,
+            records=(astuple(record) async for record in records),
+            columns=list(COLUMNS),
+        )
+        staged = int(status.split()[-1])
+        status = await conn.execute(upsert_sql(table, only_changed=only_changed))
+        written = int(status.split()[-1])
+        if keep_ids:
+            status = await conn.execute(
+                f"DELETE FROM {table} WHERE id <> ALL($1::int4[])", list(keep_ids)
+            )
+            logger.info(
+                "Deleted {} rows of pages no longer in the source", status.split()[-1]
+            )
+    return staged, written
+
+
+async def build_indexes(bind: AsyncEngine, *, rebuild: bool) -> None:
+    """Create the ANN, filter and trigram indexes, rebuilding IVFFlat if asked.
+
+    A column too wide for an ANN index is left to exact search, with a
+    warning, instead of failing the load.
+    """
+
+    index_type = settings.VECTOR_INDEX_TYPE
+    try:
+        await create_index(bind, index_type, settings.VECTOR_DISTANCE)
+    except IndexDimensionsError as exc:
+        logger.warning("Skipping the {} index: {}", index_type.value, exc)
+    else:
+        if rebuild and index_type == VectorIndexType.IVFFLAT:
+            # IVFFlat centroids are fixed at build time.
+            await rebuild_index(bind, index_type, settings.VECTOR_DISTANCE)
+    await create_filter_index(bind)
+    await create_lexical_index(bind)
+
+
+def _embedding_service(
+    client: genai.Client, *, dimensions: int | None = settings.EMBEDDING_DIMENSIONS
+) -> RagService:
+    return RagService(
+        vector_service=PgVectorService(PgVectorRepository(async_session_factory)),
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=dimensions,
+    )
+
+
+async def _csv_records(
+    rows: Iterable[tuple[int, str, np.ndarray]], *, batch_size: int
+) -> AsyncIterator[IngestRecord]:
+    """Records of precomputed embeddings, reduced to ``EMBEDDING_DIMENSIONS``."""
+
+    dimensions = settings.EMBEDDING_DIMENSIONS
+    for batch in _batched(rows, batch_size):
+        embeddings = [embedding for _, _, embedding in batch]
+        if dimensions is not None:
+            embeddings = list(truncate_embeddings(np.stack(embeddings), dimensions))
+        for (row_id, description, _), embedding in zip(
+            batch, embeddings, strict=True
+        ):
+            yield build_record(row_id, description, embedding)
+
+
+async def ingest(
+    *,
+    books: Path | None = None,
+    csv_path: Path | None = None,
+    batch_size: int = settings.EMBEDDING_BATCH_MAX_SIZE,
+    concurrency: int = 8,
+    force: bool = False,
+    build_index: bool = True,
+) -> tuple[int, int]:
+    """Load pages from ``books`` (embedding them) or from ``csv_path``.
+
+    Pages whose ``content_hash`` matches the stored row are skipped unless
+    ``force``. Returns the number of rows staged and written.
+    """
+
+    await add_payload_columns(async_session_factory)
+    table = quoted_table()
+    conn = await asyncpg.connect(asyncpg_dsn())
+    client: genai.Client | None = None
+    try:
+        await register_vector(conn)
+        known: dict[int, bytes | None] = {}
+        if not force:
+            rows = await conn.fetch(f"SELECT id, content_hash FROM {table}")
+            known = {row["id"]: row["content_hash"] for row in rows}
+        empty = not await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {table})")
+        if empty:
+            # One build after the load is far cheaper than inserting every
+            # row into the ANN index.
+            await drop_index(
+                engine, settings.VECTOR_INDEX_TYPE, settings.VECTOR_DISTANCE
+            )
+
+        # Every source id, including unchanged pages that are not staged.
+        source_ids: set[int] = set()
+
+        def changed(row: tuple[Any, ...]) -> bool:
+            source_ids.add(row[0])
+            return known.get(row[0]) != content_hash(row[1])
+
+        if csv_path is not None:
+            records = _csv_records(
+                filter(changed, iter_csv(csv_path)), batch_size=batch_size
+            )
+        elif books is not None:
+            client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+            records = _embedded_pages(
+                filter(changed, iter_pages(books)),
+                _embedding_service(client).calculate_embeddings,
+                batch_size=batch_size,
+                concurrency=concurrency,
+            )
+        else:
+            msg = "Either books or csv_path must be given."
+            raise ValueError(msg)
+
+        started = time.perf_counter()
+        staged, written = await copy_and_upsert(
+            conn, records, only_changed=not force, keep_ids=source_ids
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        await conn.close()
+        if client is not None:
+            await client.aio.aclose()
+
+    logger.info(
+        "Staged {} rows and wrote {} in {:.1f}s ({:.0f} rows/s)",
+        staged,
+        written,
+        elapsed,
+        staged / elapsed if elapsed else 0.0,
+    )
+    if build_index:
+        await build_indexes(engine, rebuild=written > 0 and not empty)
+    return staged, written
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        await ingest(
+            books=args.books,
+            csv_path=args.csv,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            force=args.force,
+            build_index=not args.skip_index,
+        )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the ingestion."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--books", type=Path, help="Directory of book*.json files.")
+    source.add_argument("--csv", type=Path, help="Precomputed embedding.csv.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.EMBEDDING_BATCH_MAX_SIZE,
+        help="Pages per embedding request.",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Embedding requests in flight."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Re-embed and rewrite unchanged pages."
+    )
+    parser.add_argument(
+        "--skip-index", action="store_true", help="Do not build indexes after load."
+    )
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
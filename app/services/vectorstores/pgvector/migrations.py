@@ -0,0 +1,205 @@
+"""One-shot migrations of the vector table.
+
+Adds ``book``, ``page``, ``header``, ``contents`` and ``footnotes`` and
+backfills them from the page ``repr`` stored in ``description``, in keyset
+batches so it can be interrupted and resumed:
+
+    python -m app.services.vectorstores.pgvector.migrations --batch-size 500
+
+With ``--reduce-dimensions`` the stored embeddings are also truncated and
+renormalized in place (irreversibly; measure recall first with
+``benchmarks.embedding_dimensions``):
+
+    python -m app.services.vectorstores.pgvector.migrations \
+        --reduce-dimensions 768 --storage halfvec
+
+The column type cannot change under an HNSW or IVFFlat index, so those are
+dropped first and must be recreated with ``indexes create`` afterwards. The
+table is locked while it is rewritten; ``reindex build --dimensions N
+--storage S`` does the same reduction on a shadow table without downtime.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from loguru import logger
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.enums import VectorStorage
+from app.database.session import async_session_factory, engine
+
+from .models import PgVectorDocument, parse_description
+
+
+def quoted_table() -> str:
+    """The vector table's name, quoted for raw SQL."""
+    return engine.dialect.identifier_preparer.format_table(PgVectorDocument.__table__)
+
+
+async def add_payload_columns(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    """Add the typed payload and ``content_hash`` columns if missing."""
+
+    async with session_factory() as session:
+        await session.execute(
+            text(
+                f"ALTER TABLE {quoted_table()} "
+                "ADD COLUMN IF NOT EXISTS book INTEGER, "
+                "ADD COLUMN IF NOT EXISTS page INTEGER, "
+                "ADD COLUMN IF NOT EXISTS header TEXT, "
+                "ADD COLUMN IF NOT EXISTS contents TEXT[], "
+                "ADD COLUMN IF NOT EXISTS footnotes TEXT[], "
+                "ADD COLUMN IF NOT EXISTS content_hash BYTEA"
+            )
+        )
+        await session.commit()
+
+
+async def backfill_payload_columns(
+    session_factory: async_sessionmaker[AsyncSession], *, batch_size: int = 500
+) -> int:
+    """Populate the payload columns of rows that have not been backfilled.
+
+    Returns the number of rows updated. Rows whose ``description`` cannot be
+    parsed are logged and left for the read-time fallback.
+    """
+
+    updated = 0
+    last_id: int | None = None
+    while True:
+        stmt = (
+            select(PgVectorDocument.id, PgVectorDocument.description)
+            .where(PgVectorDocument.book.is_(None))
+            .order_by(PgVectorDocument.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(PgVectorDocument.id > last_id)
+
+        async with session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return updated
+
+            values = []
+            for row_id, description in rows:
+                try:
+                    values.append({"id": row_id, **parse_description(description)})
+                except (ValueError, SyntaxError, KeyError, TypeError) as exc:
+                    logger.warning(
+                        "Skipping row {}: unparsable description ({})", row_id, exc
+                    )
+
+            if values:
+                await session.execute(update(PgVectorDocument), values)
+                await session.commit()
+
+        updated += len(values)
+        last_id = rows[-1][0]
+        logger.info("Backfilled {} rows (last id {})", updated, last_id)
+
+
+async def reduce_embeddings(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    dimensions: int,
+    storage: VectorStorage,
+) -> list[str]:
+    """Truncate stored embeddings to ``dimensions`` and store them as ``storage``.
+
+    Each vector keeps its first ``dimensions`` components and is rescaled to
+    unit length (Matryoshka truncation), matching what the embedding API
+    returns for the same ``output_dimensionality``. Requires pgvector 0.7+.
+
+    HNSW and IVFFlat indexes on the table are dropped in the same transaction
+    and their names returned; recreate them for the new column type.
+    """
+
+    if dimensions <= 0:
+        msg = "dimensions must be a positive integer."
+        raise ValueError(msg)
+
+    column_type = f"{VectorStorage(storage).value}({dimensions})"
+    async with session_factory() as session:
+        ann_indexes = list(
+            (
+                await session.execute(
+                    text(
+                        "SELECT c.relname FROM pg_index i "
+                        "JOIN pg_class c ON c.oid = i.indexrelid "
+                        "JOIN pg_am a ON a.oid = c.relam "
+                        "WHERE i.indrelid = CAST(:table AS regclass) "
+                        "AND a.amname IN ('hnsw', 'ivfflat') ORDER BY c.relname"
+                    ),
+                    {"table": quoted_table()},
+                )
+            ).scalars()
+        )
+        for name in ann_indexes:
+            quoted = engine.dialect.identifier_preparer.quote(name)
+            await session.execute(text(f"DROP INDEX {quoted}"))
+        await session.execute(
+            text(
+                f"ALTER TABLE {quoted_table()} "
+                f"ALTER COLUMN embedding TYPE {column_type} "
+                f"USING l2_normalize(subvector(embedding::vector, 1, {dimensions}))"
+                f"::{column_type}"
+            )
+        )
+        await session.commit()
+    logger.info("Embeddings reduced to {}", column_type)
+    if ann_indexes:
+        logger.warning(
+            "Dropped ANN indexes {}; recreate them with "
+            "`python -m app.services.vectorstores.pgvector.indexes create`",
+            ", ".join(ann_indexes),
+        )
+    return ann_indexes
+
+
+async def _migrate(
+    batch_size: int, dimensions: int | None, storage: VectorStorage
+) -> None:
+    try:
+        await add_payload_columns(async_session_factory)
+        updated = await backfill_payload_columns(
+            async_session_factory, batch_size=batch_size
+        )
+        logger.info("Payload column migration complete: {} rows backfilled", updated)
+        if dimensions is not None:
+            await reduce_embeddings(
+                async_session_factory, dimensions=dimensions, storage=storage
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the migration."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--reduce-dimensions",
+        type=int,
+        help="Truncate stored embeddings to this many dimensions.",
+    )
+    parser.add_argument(
+        "--storage",
+        type=VectorStorage,
+        choices=list(VectorStorage),
+        default=VectorStorage.VECTOR,
+        help="Column type used with --reduce-dimensions.",
+    )
+    args = parser.parse_args()
+    asyncio.run(_migrate(args.batch_size, args.reduce_dimensions, args.storage))
+
+
+if __name__ == "__main__":
+    main()
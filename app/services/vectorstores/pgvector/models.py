@@ -2,29 +2,96 @@
 
 from __future__ import annotations
 
-import uuid
-from datetime import datetime
+import ast
 from typing import Any
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import DateTime, String
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy import Integer, LargeBinary, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.config import settings
+from app.core.enums import VectorStorage
 from app.database import Base
 
+# Name of the ``PgVectorDocument`` table, for raw SQL and index names.
+TABLE_NAME: str = settings.VECTOR_TABLE_NAME
+
+# Typed page fields, backfilled from ``description`` by ``migrations.py``.
+PAYLOAD_COLUMNS = ("book", "page", "header", "contents", "footnotes")
+
+
+def embedding_type(
+    storage: VectorStorage = settings.VECTOR_STORAGE,
+    dimensions: int | None = settings.EMBEDDING_DIMENSIONS,
+) -> Vector | HALFVEC:
+    """Column type holding embeddings of ``dimensions`` stored as ``storage``."""
+
+    if storage == VectorStorage.HALFVEC:
+        return HALFVEC(dimensions)
+    return Vector(dimensions)
+
+
+def parse_description(description: str) -> dict[str, Any]:
+    """Parse the ``repr`` of a page dict stored in ``description``.
+
+    Only needed for rows written before the typed payload columns existed.
+    """
+
+    page = ast.literal_eval(description)
+    return {
+        "book": int(page["book"]),
+        "page": int(page["page"]),
+        "header": page.get("header", ""),
+        "contents": list(page.get("contents", [])),
+        "footnotes": list(page.get("footnotes", [])),
+    }
+
+
+def build_payload(row: Any) -> dict[str, Any]:
+    """Page fields of a document or projected row with the payload columns.
+
+    Rows that have not been backfilled yet fall back to parsing
+    ``description``.
+    """
+
+    if row.book is None:
+        return parse_description(row.description)
+    return {
+        "book": row.book,
+        "page": row.page,
+        "header": row.header or "",
+        "contents": row.contents or [],
+        "footnotes": row.footnotes or [],
+    }
+
 
 class PgVectorDocument(Base):
     """Model representing a single document stored in PGVector."""
 
-    __tablename__ = settings.VECTOR_TABLE_NAME
+    __tablename__ = TABLE_NAME
 
-    id: Mapped[int] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=int
-    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     description: Mapped[str] = mapped_column(String, nullable=False)
-    embedding: Mapped[list[float]] = mapped_column(Vector(), nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(embedding_type(), nullable=False)
+    book: Mapped[int | None] = mapped_column(Integer)
+    page: Mapped[int | None] = mapped_column(Integer)
+    header: Mapped[str | None] = mapped_column(Text)
+    contents: Mapped[list[str] | None] = mapped_column(ARRAY(Text))
+    footnotes: Mapped[list[str] | None] = mapped_column(ARRAY(Text))
+    # sha256 of ``description``; lets re-ingestion skip unchanged pages.
+    content_hash: Mapped[bytes | None] = mapped_column(LargeBinary)
+
+    def payload(self) -> dict[str, Any]:
+        """Page fields of this document, read from the typed columns."""
+        return build_payload(self)
 
 
-__all__ = ["PgVectorDocument"]
\ No newline at end of file
+__all__ = [
+    "PAYLOAD_COLUMNS",
+    "PgVectorDocument",
+    "TABLE_NAME",
+    "build_payload",
+    "embedding_type",
+    "parse_description",
+]
@@ -0,0 +1,544 @@
+"""Blue/green rebuild of the vector table while the API keeps serving.
+
+Rows of the live table are streamed through a server-side cursor (one
+``REPEATABLE READ`` snapshot) into a shadow table, ``<table>_shadow``, with
+one binary ``COPY``. On the way, embeddings are kept, truncated to new
+``--dimensions`` or re-embedded with the configured model (``--reembed``),
+and stored as ``--storage``. The shadow table then gets its primary key and
+the same ANN, filter and trigram indexes as the live one, built
+``CONCURRENTLY``. It is validated against the snapshot's row count, valid
+indexes and the recall of the ANN index on sampled rows, and prewarmed with
+``pg_prewarm`` so the first queries after the swap do not hit a cold index:
+
+    python -m app.services.vectorstores.pgvector.reindex build --dimensions 768
+
+The swap renames the live table (and its indexes) to ``<table>_previous``
+and the shadow table to ``<table>``, in one short transaction, so a query
+sees either the old table or the complete new one. Swap right away with
+``build --swap``. When the query embedding settings change as well, run
+``swap`` once the new settings are rolled out; ``rollback`` swaps the
+previous table back:
+
+    python -m app.services.vectorstores.pgvector.reindex swap
+    python -m app.services.vectorstores.pgvector.reindex rollback
+
+Writes to the live table during a build are not carried over; pause
+ingestion until the swap.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg
+import numpy as np
+from google import genai
+from loguru import logger
+from pgvector.asyncpg import register_vector
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.enums import Pitaka, VectorDistance, VectorIndexType, VectorStorage
+from app.database.session import async_session_factory, asyncpg_dsn, engine
+from app.services.embeddings import EMBEDDING_DTYPE, truncate_embeddings
+
+from .asyncpg_service import query_vectors, similarity_sql
+from .indexes import (
+    _index_valid,
+    create_filter_index,
+    create_index,
+    create_lexical_index,
+)
+from .ingest import COLUMNS, _embedding_service
+from .migrations import add_payload_columns
+from .models import TABLE_NAME, embedding_type
+from .repository import decode_embedding
+
+SHADOW_SUFFIX = "_shadow"
+PREVIOUS_SUFFIX = "_previous"
+
+
+class ReindexError(RuntimeError):
+    """Raised when the shadow table fails validation; the live table is untouched."""
+
+
+@dataclass(slots=True)
+class Validation:
+    """Checks run on the shadow table before it may replace the live one."""
+
+    source_rows: int
+    shadow_rows: int
+    invalid_indexes: list[str]
+    recall: float | None
+
+    def errors(self, min_recall: float) -> list[str]:
+        """Reasons the shadow table must not be swapped in; empty if none."""
+
+        problems = []
+        if self.shadow_rows != self.source_rows:
+            problems.append(
+                f"shadow has {self.shadow_rows} rows, the snapshot {self.source_rows}"
+            )
+        if self.invalid_indexes:
+            problems.append(f"invalid indexes: {', '.join(self.invalid_indexes)}")
+        if self.recall is not None and self.recall < min_recall:
+            problems.append(f"sample recall {self.recall:.3f} < {min_recall:.3f}")
+        return problems
+
+
+def _quote(name: str) -> str:
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def renamed_index(name: str, table: str, new_table: str) -> str:
+    """``name`` with its ``table`` prefix replaced, as indexes follow their table."""
+
+    if name.startswith(f"{table}_"):
+        return new_table + name[len(table) :]
+    return name
+
+
+def shadow_ddl(table: str, shadow: str, column_type: str) -> list[str]:
+    """Statements creating an empty, index-free ``shadow`` shaped like ``table``."""
+
+    return [
+        f"DROP TABLE IF EXISTS {_quote(shadow)}",
+        f"CREATE TABLE {_quote(shadow)} (LIKE {_quote(table)} INCLUDING DEFAULTS)",
+        f"ALTER TABLE {_quote(shadow)} ALTER COLUMN embedding TYPE {column_type}",
+    ]
+
+
+def swap_statements(
+    table: str,
+    replacement: str,
+    retired: str,
+    *,
+    live_indexes: Sequence[str],
+    replacement_indexes: Sequence[str],
+) -> list[str]:
+    """Statements putting ``replacement`` in place of ``table``, kept as ``retired``.
+
+    Indexes are renamed with their tables, so the next build finds the
+    canonical names free. Run them in one transaction.
+    """
+
+    statements = [
+        f"DROP TABLE IF EXISTS {_quote(retired)}",
+        f"LOCK TABLE {_quote(table)}, {_quote(replacement)} IN ACCESS EXCLUSIVE MODE",
+        f"ALTER TABLE {_quote(table)} RENAME TO {_quote(retired)}",
+    ]
+    statements += [
+        f"ALTER INDEX {_quote(name)} RENAME TO "
+        f"{_quote(renamed_index(name, table, retired))}"
+        for name in live_indexes
+        if renamed_index(name, table, retired) != name
+    ]
+    statements.append(f"ALTER TABLE {_quote(replacement)} RENAME TO {_quote(table)}")
+    statements += [
+        f"ALTER INDEX {_quote(name)} RENAME TO "
+        f"{_quote(renamed_index(name, replacement, table))}"
+        for name in replacement_indexes
+        if renamed_index(name, replacement, table) != name
+    ]
+    return statements
+
+
+async def _index_names(conn: asyncpg.Connection, table: str) -> list[str]:
+    rows = await conn.fetch(
+        "SELECT indexname FROM pg_indexes WHERE tablename = $1 ORDER BY indexname",
+        table,
+    )
+    return [row["indexname"] for row in rows]
+
+
+async def _dimensions(conn: asyncpg.Connection, table: str) -> int | None:
+    """Declared dimensions of ``table.embedding`` (pgvector's type modifier)."""
+
+    typmod = await conn.fetchval(
+        "SELECT atttypmod FROM pg_attribute "
+        "WHERE attrelid = $1::regclass AND attname = 'embedding'",
+        table,
+    )
+    return typmod if typmod and typmod > 0 else None
+
+
+async def _stream(
+    conn: asyncpg.Connection,
+    table: str,
+    storage: VectorStorage,
+    batch_size: int,
+) -> AsyncIterator[list[list[Any]]]:
+    """Batches of live rows, ``COLUMNS`` order, embeddings as float32 arrays.
+
+    Must run inside a transaction: the cursor lives on the server and
+    fetches ``batch_size`` rows per round trip.
+    """
+
+    columns = ", ".join(
+        f"{storage.value}_send(embedding)" if name == "embedding" else name
+        for name in COLUMNS
+    )
+    cursor = conn.cursor(
+        f"SELECT {columns} FROM {_quote(table)} ORDER BY id", prefetch=batch_size
+    )
+    embedding = COLUMNS.index("embedding")
+    batch: list[list[Any]] = []
+    async for record in cursor:
+        row = list(record)
+        row[embedding] = np.frombuffer(
+            decode_embedding(row[embedding], storage), dtype=EMBEDDING_DTYPE
+        )
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _transformed(
+    batches: AsyncIterator[list[list[Any]]],
+    *,
+    dimensions: int | None,
+    embed: Any | None,
+    concurrency: int,
+) -> AsyncIterator[tuple[Any, ...]]:
+    """Rows with their embeddings re-embedded (``embed``) or truncated."""
+
+    embedding = COLUMNS.index("embedding")
+    description = COLUMNS.index("description")
+
+    async def convert(batch: list[list[Any]]) -> list[list[Any]]:
+        if embed is not None:
+            vectors = await embed([row[description] for row in batch])
+        elif dimensions is not None:
+            stacked = np.stack([row[embedding] for row in batch])
+            vectors = list(truncate_embeddings(stacked, dimensions))
+        else:
+            return batch
+        for row, vector in zip(batch, vectors, strict=True):
+            row[embedding] = vector
+        return batch
+
+    group: list[list[list[Any]]] = []
+    async for batch in batches:
+        group.append(batch)
+        if len(group) == concurrency:
+            for converted in await asyncio.gather(*map(convert, group)):
+                for row in converted:
+                    yield tuple(row)
+            group = []
+    for converted in await asyncio.gather(*map(convert, group)):
+        for row in converted:
+            yield tuple(row)
+
+
+async def sample_recall(
+    conn: asyncpg.Connection,
+    table: str,
+    *,
+    distance: VectorDistance,
+    storage: VectorStorage,
+    samples: int,
+    k: int,
+    ef_search: int | None = None,
+    probes: int | None = None,
+) -> float | None:
+    """Recall@k of the ANN index against an exact scan, sampled rows as queries."""
+
+    rows = await conn.fetch(
+        f"SELECT {storage.value}_send(embedding) AS embedding "
+        f"FROM {_quote(table)} ORDER BY random() LIMIT $1",
+        samples,
+    )
+    if not rows:
+        return None
+    queries = query_vectors(
+        [
+            np.frombuffer(
+                decode_embedding(row["embedding"], storage), EMBEDDING_DTYPE
+            ).tolist()
+            for row in rows
+        ],
+        storage,
+    )
+    sql = similarity_sql(table, distance=distance, storage=storage)
+
+    async def search(gucs: dict[str, Any]) -> list[set[int]]:
+        found: list[set[int]] = [set() for _ in queries]
+        async with conn.transaction():
+            for name, value in gucs.items():
+                if value is not None:
+                    await conn.execute(
+                        "SELECT set_config($1, $2, true)", name, str(value)
+                    )
+            for record in await conn.fetch(sql, queries, k):
+                found[record["query_index"] - 1].add(record["id"])
+        return found
+
+    exact = await search({"enable_indexscan": "off"})
+    approximate = await search({"hnsw.ef_search": ef_search, "ivfflat.probes": probes})
+    hits = sum(len(a & e) for a, e in zip(approximate, exact, strict=True))
+    return hits / max(1, sum(len(e) for e in exact))
+
+
+async def prewarm(conn: asyncpg.Connection, table: str) -> None:
+    """Load ``table`` and its indexes into shared buffers, if pg_prewarm exists."""
+
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+    except asyncpg.PostgresError as exc:
+        logger.warning("pg_prewarm unavailable, swapping in cold: {}", exc)
+        return
+    for relation in [table, *await _index_names(conn, table)]:
+        blocks = await conn.fetchval("SELECT pg_prewarm($1::regclass)", relation)
+        logger.info("Prewarmed {} ({} blocks)", relation, blocks)
+
+
+async def swap(
+    conn: asyncpg.Connection,
+    table: str,
+    replacement: str,
+    retired: str,
+    *,
+    lock_timeout: str = "5s",
+) -> None:
+    """Atomically put ``replacement`` in place of ``table``, keeping it as ``retired``.
+
+    Gives up after ``lock_timeout`` instead of queueing reads behind the
+    rename for long.
+    """
+
+    async with conn.transaction():
+        await conn.execute("SELECT set_config('lock_timeout', $1, true)", lock_timeout)
+        statements = swap_statements(
+            table,
+            replacement,
+            retired,
+            live_indexes=await _index_names(conn, table),
+            replacement_indexes=await _index_names(conn, replacement),
+        )
+        for statement in statements:
+            await conn.execute(statement)
+    logger.info("Swapped {} in as {}; the old table is {}", replacement, table, retired)
+
+
+async def build(
+    *,
+    reembed: bool = False,
+    dimensions: int | None = None,
+    storage: VectorStorage = settings.VECTOR_STORAGE,
+    source_storage: VectorStorage = settings.VECTOR_STORAGE,
+    index_type: VectorIndexType = settings.VECTOR_INDEX_TYPE,
+    distance: VectorDistance = settings.VECTOR_DISTANCE,
+    pitakas: Sequence[Pitaka] = (),
+    batch_size: int = 1000,
+    concurrency: int = 8,
+    maintenance_work_mem: str | None = None,
+    samples: int = 20,
+    k: int = 10,
+    min_recall: float = 0.9,
+    swap_in: bool = False,
+) -> Validation:
+    """Build, validate and prewarm the shadow table; swap it in if ``swap_in``.
+
+    Raises ``ReindexError`` (leaving the shadow table for inspection) when
+    validation fails.
+    """
+
+    table = TABLE_NAME
+    shadow = table + SHADOW_SUFFIX
+    await add_payload_columns(async_session_factory)
+
+    source = await asyncpg.connect(asyncpg_dsn())
+    target = await asyncpg.connect(asyncpg_dsn())
+    client: genai.Client | None = None
+    try:
+        dimensions = dimensions or (
+            settings.EMBEDDING_DIMENSIONS if reembed else None
+        )
+        column_type = embedding_type(
+            storage, dimensions or await _dimensions(source, table)
+        ).compile(dialect=postgresql.dialect())
+        for statement in shadow_ddl(table, shadow, column_type):
+            await target.execute(statement)
+        await register_vector(target)
+
+        embed = None
+        if reembed:
+            client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+            # Same size as the shadow column, not EMBEDDING_DIMENSIONS.
+            embed = _embedding_service(
+                client, dimensions=dimensions
+            ).calculate_embeddings
+
+        started = time.perf_counter()
+        async with source.transaction(isolation="repeatable_read", readonly=True):
+            source_rows = await source.fetchval(
+                f"SELECT count(*) FROM {_quote(table)}"
+            )
+            status = await target.copy_records_to_table(
+                shadow,
+                records=_transformed(
+                    _stream(source, table, source_storage, batch_size),
+                    dimensions=None if reembed else dimensions,
+                    embed=embed,
+                    concurrency=concurrency,
+                ),
+                columns=list(COLUMNS),
+            )
+        copied = int(status.split()[-1])
+        logger.info(
+            "Copied {} rows into {} in {:.1f}s",
+            copied,
+            shadow,
+            time.perf_counter() - started,
+        )
+
+        await target.execute(f"ALTER TABLE {_quote(shadow)} ADD PRIMARY KEY (id)")
+        await target.execute(f"ANALYZE {_quote(shadow)}")
+        names = [
+            await create_index(
+                engine,
+                index_type,
+                distance,
+                maintenance_work_mem=maintenance_work_mem,
+                pitaka=pitaka,
+                table=shadow,
+            )
+            for pitaka in [None, *pitakas]
+        ]
+        names.append(await create_filter_index(engine, table=shadow))
+        names.append(await create_lexical_index(engine, table=shadow))
+
+        async with engine.connect() as conn:
+            invalid = [name for name in names if not await _index_valid(conn, name)]
+        validation = Validation(
+            source_rows=source_rows,
+            shadow_rows=await target.fetchval(f"SELECT count(*) FROM {_quote(shadow)}"),
+            invalid_indexes=invalid,
+            recall=await sample_recall(
+                target,
+                shadow,
+                distance=distance,
+                storage=storage,
+                samples=samples,
+                k=k,
+                ef_search=settings.VECTOR_HNSW_EF_SEARCH,
+                probes=settings.VECTOR_IVFFLAT_PROBES,
+            ),
+        )
+        logger.info("Shadow table validation: {}", validation)
+        problems = validation.errors(min_recall)
+        if problems:
+            msg = f"{shadow} failed validation: {'; '.join(problems)}"
+            raise ReindexError(msg)
+
+        await prewarm(target, shadow)
+        if swap_in:
+            await swap(target, table, shadow, table + PREVIOUS_SUFFIX)
+        return validation
+    finally:
+        await source.close()
+        await target.close()
+        if client is not None:
+            await client.aio.aclose()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    table = TABLE_NAME
+    shadow, previous = table + SHADOW_SUFFIX, table + PREVIOUS_SUFFIX
+    try:
+        if args.command == "build":
+            await build(
+                reembed=args.reembed,
+                dimensions=args.dimensions,
+                storage=args.storage,
+                index_type=args.type,
+                distance=args.distance,
+                pitakas=args.pitaka or (),
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                maintenance_work_mem=args.maintenance_work_mem,
+                samples=args.samples,
+                k=args.k,
+                min_recall=args.min_recall,
+                swap_in=args.swap,
+            )
+        else:
+            conn = await asyncpg.connect(asyncpg_dsn())
+            try:
+                if args.command == "swap":
+                    await swap(conn, table, shadow, previous)
+                else:
+                    # The current table becomes the shadow, free to rebuild.
+                    await swap(conn, table, previous, shadow)
+            finally:
+                await conn.close()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the reindex command."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=["build", "swap", "rollback"])
+    parser.add_argument(
+        "--reembed",
+        action="store_true",
+        help="Re-embed descriptions with GOOGLE_GENAI_EMBED_MODEL.",
+    )
+    parser.add_argument(
+        "--dimensions", type=int, help="Truncate (or re-embed) to this many dimensions."
+    )
+    parser.add_argument(
+        "--storage",
+        type=VectorStorage,
+        choices=list(VectorStorage),
+        default=settings.VECTOR_STORAGE,
+    )
+    parser.add_argument(
+        "--type",
+        type=VectorIndexType,
+        choices=list(VectorIndexType),
+        default=settings.VECTOR_INDEX_TYPE,
+    )
+    parser.add_argument(
+        "--distance",
+        type=VectorDistance,
+        choices=list(VectorDistance),
+        default=settings.VECTOR_DISTANCE,
+    )
+    parser.add_argument(
+        "--pitaka",
+        type=Pitaka,
+        nargs="+",
+        choices=list(Pitaka),
+        help="Also build partial ANN indexes, one per basket.",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Embedding requests in flight."
+    )
+    parser.add_argument("--maintenance-work-mem", help="e.g. 2GB, for index builds.")
+    parser.add_argument(
+        "--samples", type=int, default=20, help="Sampled rows for the recall check."
+    )
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument(
+        "--swap", action="store_true", help="Swap the shadow table in once valid."
+    )
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
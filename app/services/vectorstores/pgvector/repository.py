@@ -3,47 +3,454 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
-from typing import Iterable
+from dataclasses import dataclass
+from typing import Any
 
-from sqlalchemy import Select, select
+import numpy as np
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    LargeBinary,
+    Select,
+    SQLColumnExpression,
+    String,
+    case,
+    cast,
+    column,
+    func,
+    literal,
+    select,
+    true,
+    union_all,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from .models import PgVectorDocument
+from app.core.enums import VectorDistance, VectorStorage
+from app.services.embeddings import EMBEDDING_DTYPE
+from app.services.vectorstores.interfaces import SearchFilter, SearchOptions
+
+from .models import PAYLOAD_COLUMNS, PgVectorDocument, build_payload
+
+# Columns needed to build a hit. ``description`` duplicates the payload columns
+# and is only sent for rows not backfilled yet; the embedding only on request.
+_HIT_COLUMNS = (
+    PgVectorDocument.id,
+    case(
+        (PgVectorDocument.book.is_(None), PgVectorDocument.description)
+    ).label("description"),
+    *(PgVectorDocument.__table__.c[name] for name in PAYLOAD_COLUMNS),
+)
+
+
+@dataclass(slots=True)
+class SimilarityHit:
+    """One search match; ``embedding`` is packed float32 bytes when requested."""
+
+    id: int
+    score: float
+    payload: dict[str, Any]
+    embedding: bytes | None = None
+
+
+def decode_embedding(blob: bytes, storage: VectorStorage) -> bytes:
+    """Convert pgvector's binary send format to packed float32 bytes.
+
+    The format is a 2-byte dimension count, 2 unused bytes and big-endian
+    float32 (``vector``) or float16 (``halfvec``) components.
+    """
+
+    component = ">f2" if storage == VectorStorage.HALFVEC else ">f4"
+    vector = np.frombuffer(blob, dtype=component, offset=4)
+    return vector.astype(EMBEDDING_DTYPE).tobytes()
 
 
 class PgVectorRepository:
     """Repository handling read operations against the PGVector table."""
 
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        distance: VectorDistance = VectorDistance.COSINE,
+        storage: VectorStorage = VectorStorage.VECTOR,
+        hybrid_candidates: int = 50,
+        rrf_k: int = 60,
+        trigram_threshold: float | None = None,
+    ) -> None:
         self._session_factory = session_factory
+        self._distance = distance
+        self._storage = storage
+        self._hybrid_candidates = hybrid_candidates
+        self._rrf_k = rrf_k
+        self._trigram_threshold = trigram_threshold
+
+    def _rank(self, query: Any) -> tuple[ColumnElement[float], ColumnElement[float]]:
+        """Ordering expression and cosine-distance score for ``query``.
+
+        Ordering uses the raw operator so an index with the matching operator
+        class applies. Inner product (``<#>`` is its negation) is reported as
+        ``1 + <#>``, the cosine distance of unit vectors, so scores stay
+        comparable whichever operator is configured.
+        """
+
+        if self._distance == VectorDistance.INNER_PRODUCT:
+            order = PgVectorDocument.embedding.max_inner_product(query)
+            return order, literal(1.0) + order
+        order = PgVectorDocument.embedding.cosine_distance(query)
+        return order, order
+
+    def _columns(self, with_embedding: bool) -> list[SQLColumnExpression[Any]]:
+        """Projected columns of a hit, without the text-encoded embedding.
+
+        With ``with_embedding`` the vector is added in pgvector's binary send
+        format, which is smaller than its text form and cheap to decode.
+        """
+
+        columns: list[SQLColumnExpression[Any]] = list(_HIT_COLUMNS)
+        if with_embedding:
+            send = getattr(func, f"{self._storage.value}_send")
+            columns.append(
+                send(PgVectorDocument.embedding, type_=LargeBinary).label("embedding")
+            )
+        return columns
+
+    def _to_hit(self, row: Any) -> SimilarityHit:
+        blob = row._mapping.get("embedding")
+        return SimilarityHit(
+            id=row.id,
+            score=float(row.score),
+            payload=build_payload(row),
+            embedding=None if blob is None else decode_embedding(blob, self._storage),
+        )
+
+    @staticmethod
+    def _conditions(filters: SearchFilter | None) -> list[ColumnElement[bool]]:
+        """``WHERE`` clauses restricting the search to ``filters``.
+
+        Bounds are rendered inline rather than bound, so the planner can match
+        the per-pitaka partial indexes (``indexes.py --pitaka``) in cached,
+        generic plans too. Rows without backfilled payload columns never match.
+        """
+
+        if filters is None:
+            return []
+
+        conditions: list[ColumnElement[bool]] = []
+        bounds = (
+            (PgVectorDocument.book, filters.book_range()),
+            (PgVectorDocument.page, (filters.page_min, filters.page_max)),
+        )
+        for field, (low, high) in bounds:
+            if low is not None:
+                conditions.append(field >= literal(int(low), literal_execute=True))
+            if high is not None:
+                conditions.append(field <= literal(int(high), literal_execute=True))
+        return conditions
+
+    @staticmethod
+    async def _apply_options(
+        session: AsyncSession,
+        options: SearchOptions | None,
+        extra: dict[str, Any] | None = None,
+    ) -> None:
+        """Apply per-query search settings for the current transaction only."""
+
+        gucs = dict(extra or {})
+        if options is not None:
+            gucs.update(
+                {
+                    "hnsw.ef_search": options.ef_search,
+                    "ivfflat.probes": options.probes,
+                    "enable_indexscan": "off" if options.exact else None,
+                }
+            )
+        for name, value in gucs.items():
+            if value is not None:
+                # set_config(..., true) is SET LOCAL with bindable values.
+                await session.execute(
+                    select(func.set_config(name, str(value), true()))
+                )
 
     def _build_similarity_query(
-        self, embedding: Sequence[float], *, limit: int
-    ) -> Select[tuple[PgVectorDocument, float]]:
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> Select[Any]:
         """Prepare the similarity search query."""
 
-        distance = PgVectorDocument.embedding.cosine_distance(list(embedding))
+        order, score = self._rank(list(embedding))
         return (
-            select(PgVectorDocument, distance.label("score"))
-            .order_by(distance)
+            select(*self._columns(with_embedding), score.label("score"))
+            .where(*self._conditions(filters))
+            .order_by(order)
             .limit(limit)
         )
 
-    async def similarity_search(
-        self, embedding: Sequence[float], *, limit: int
-    ) -> list[tuple[PgVectorDocument, float]]:
-        """Fetch the closest documents to the given embedding."""
+    def _build_multi_similarity_query(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> Select[Any]:
+        """Prepare one query returning the top ``limit`` matches of every embedding.
+
+        The query vectors are sent as a ``VALUES`` list and each one is
+        searched in a ``LATERAL`` subquery, so all searches share a round trip.
+        """
+
+        queries = values(
+            column("query_index", Integer),
+            column("embedding", PgVectorDocument.embedding.type),
+            name="queries",
+        ).data([(index, list(embedding)) for index, embedding in enumerate(embeddings)])
+        # VALUES parameters arrive untyped (text); cast them for the operator.
+        order, score = self._rank(
+            cast(queries.c.embedding, PgVectorDocument.embedding.type)
+        )
+        matches = (
+            select(*self._columns(with_embedding), score.label("score"))
+            .where(*self._conditions(filters))
+            .order_by(order)
+            .limit(limit)
+            .lateral("matches")
+        )
+        return (
+            select(queries.c.query_index, *matches.c)
+            .select_from(queries)
+            .join(matches, true())
+            .order_by(queries.c.query_index, matches.c.score)
+        )
+
+    def _build_hybrid_select(
+        self,
+        query_vector: Any,
+        query_text: Any,
+        *,
+        limit: int,
+        filters: SearchFilter | None,
+        with_embedding: bool,
+        correlate: Any | None = None,
+    ) -> Select[Any]:
+        """Fuse vector and trigram rankings with reciprocal rank fusion.
 
-        stmt = self._build_similarity_query(embedding, limit=limit)
+        The top ``hybrid_candidates`` of each ranking are combined as
+        ``sum(1 / (rrf_k + rank))``; trigram matching uses ``<%`` (word
+        similarity against the page text), which the GIN trigram index on
+        ``description`` serves. Scores are negated RRF, so lower stays better.
+        ``correlate`` names the outer ``VALUES`` the query expressions come from.
+        """
 
+        correlated = () if correlate is None else (correlate,)
+        conditions = self._conditions(filters)
+        order, _ = self._rank(query_vector)
+        vector_ranked = (
+            select(
+                PgVectorDocument.id.label("id"),
+                func.row_number().over(order_by=order).label("rank"),
+            )
+            .where(*conditions)
+            .order_by(order)
+            .limit(self._hybrid_candidates)
+            .correlate(*correlated)
+            .subquery("vector_ranked")
+        )
+        similarity = func.word_similarity(query_text, PgVectorDocument.description)
+        lexical_ranked = (
+            select(
+                PgVectorDocument.id.label("id"),
+                func.row_number().over(order_by=similarity.desc()).label("rank"),
+            )
+            .where(query_text.op("<%")(PgVectorDocument.description), *conditions)
+            .order_by(similarity.desc())
+            .limit(self._hybrid_candidates)
+            .correlate(*correlated)
+            .subquery("lexical_ranked")
+        )
+        ranked = union_all(
+            select(vector_ranked.c.id, vector_ranked.c.rank),
+            select(lexical_ranked.c.id, lexical_ranked.c.rank),
+        ).subquery("ranked")
+        rrf = func.sum(literal(1.0) / (literal(self._rrf_k) + ranked.c.rank))
+        fused = (
+            select(ranked.c.id, rrf.label("rrf"))
+            .group_by(ranked.c.id)
+            .order_by(rrf.desc())
+            .limit(limit)
+            .subquery("fused")
+        )
+        return (
+            select(*self._columns(with_embedding), (-fused.c.rrf).label("score"))
+            .join_from(PgVectorDocument, fused, PgVectorDocument.id == fused.c.id)
+            .order_by(fused.c.rrf.desc())
+        )
+
+    def _build_hybrid_query(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> Select[Any]:
+        """Prepare the hybrid search of one query in a single statement."""
+
+        query_vector = literal(list(embedding), PgVectorDocument.embedding.type)
+        return self._build_hybrid_select(
+            query_vector,
+            literal(text, String),
+            limit=limit,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+
+    def _build_multi_hybrid_query(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> Select[Any]:
+        """Prepare the hybrid search of every query in one ``LATERAL`` statement."""
+
+        queries = values(
+            column("query_index", Integer),
+            column("embedding", PgVectorDocument.embedding.type),
+            column("query_text", String),
+            name="queries",
+        ).data(
+            [
+                (index, list(embedding), text)
+                for index, (embedding, text) in enumerate(
+                    zip(embeddings, texts, strict=True)
+                )
+            ]
+        )
+        matches = self._build_hybrid_select(
+            cast(queries.c.embedding, PgVectorDocument.embedding.type),
+            cast(queries.c.query_text, String),
+            limit=limit,
+            filters=filters,
+            with_embedding=with_embedding,
+            correlate=queries,
+        ).lateral("matches")
+        return (
+            select(queries.c.query_index, *matches.c)
+            .select_from(queries)
+            .join(matches, true())
+            .order_by(queries.c.query_index, matches.c.score)
+        )
+
+    async def _fetch(
+        self, stmt: Select[Any], options: SearchOptions | None, *, hybrid: bool = False
+    ) -> list[Any]:
+        extra = {}
+        if hybrid and self._trigram_threshold is not None:
+            extra["pg_trgm.word_similarity_threshold"] = self._trigram_threshold
         async with self._session_factory() as session:
+            await self._apply_options(session, options, extra)
             result = await session.execute(stmt)
-            records = result.all()
+            return list(result.all())
+
+    def _group(self, records: list[Any], count: int) -> list[list[SimilarityHit]]:
+        rows: list[list[SimilarityHit]] = [[] for _ in range(count)]
+        for record in records:
+            rows[record.query_index].append(self._to_hit(record))
+        return rows
 
-        rows: Iterable[tuple[PgVectorDocument, float]] = (
-            (document, float(score)) for document, score in records
+    async def hybrid_search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[SimilarityHit]:
+        """Fetch the best documents by fused vector and trigram rank."""
+
+        stmt = self._build_hybrid_query(
+            embedding, text, limit=limit, filters=filters, with_embedding=with_embedding
+        )
+        records = await self._fetch(stmt, options, hybrid=True)
+        return [self._to_hit(record) for record in records]
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[SimilarityHit]]:
+        """Hybrid search of each (embedding, text) pair in a single statement."""
+
+        if not embeddings:
+            return []
+
+        stmt = self._build_multi_hybrid_query(
+            embeddings,
+            texts,
+            limit=limit,
+            filters=filters,
+            with_embedding=with_embedding,
+        )
+        records = await self._fetch(stmt, options, hybrid=True)
+        return self._group(records, len(embeddings))
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[SimilarityHit]]:
+        """Fetch the closest documents to each embedding in a single statement."""
+
+        if not embeddings:
+            return []
+
+        stmt = self._build_multi_similarity_query(
+            embeddings, limit=limit, filters=filters, with_embedding=with_embedding
+        )
+
+        records = await self._fetch(stmt, options)
+        return self._group(records, len(embeddings))
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[SimilarityHit]:
+        """Fetch the closest documents to the given embedding.
+
+        Only the id, payload columns and score are selected unless
+        ``with_embedding`` is set.
+        """
+
+        stmt = self._build_similarity_query(
+            embedding, limit=limit, filters=filters, with_embedding=with_embedding
         )
-        return list(rows)
+
+        records = await self._fetch(stmt, options)
+        return [self._to_hit(record) for record in records]
 
 
-__all__ = ["PgVectorRepository"]
\ No newline at end of file
+__all__ = ["PgVectorRepository", "SimilarityHit", "decode_embedding"]
@@ -2,13 +2,126 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+import base64
+import hashlib
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import asdict
+from typing import Any, Protocol
 
 from loguru import logger
 
-from app.services.vectorstores.interfaces import VectorSearchResult, VectorStoreService
+from app.core.config import settings
+from app.services.embeddings import pack
+from app.services.recording import recorder
+from app.services.vectorstores.interfaces import (
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+    VectorStoreService,
+)
 
-from .repository import PgVectorRepository
+from .repository import PgVectorRepository, SimilarityHit
+
+
+def _digest(embedding: Sequence[float]) -> str:
+    """Stable record/replay key for a query vector (hash of its float32 bytes)."""
+    return hashlib.sha256(pack(embedding)).hexdigest()
+
+
+class _Hit(Protocol):
+    """A match as either backend returns it: a ``SimilarityHit`` or a result."""
+
+    @property
+    def id(self) -> int | str: ...
+
+    @property
+    def score(self) -> float: ...
+
+    @property
+    def payload(self) -> dict[str, Any]: ...
+
+    @property
+    def embedding(self) -> bytes | None: ...
+
+
+def _to_record(hit: _Hit) -> dict[str, Any]:
+    """JSON-serializable form of a hit, as stored in cassettes."""
+
+    record: dict[str, Any] = {
+        "id": str(hit.id),
+        "score": hit.score,
+        "payload": hit.payload,
+    }
+    if hit.embedding is not None:
+        record["embedding"] = base64.b64encode(hit.embedding).decode()
+    return record
+
+
+def _check_limit(limit: int) -> None:
+    if limit <= 0:
+        msg = "limit must be greater than zero"
+        logger.error(msg)
+        raise ValueError(msg)
+
+
+def _request(
+    limit: int,
+    options: SearchOptions | None,
+    filters: SearchFilter | None,
+    with_embedding: bool,
+    **query: Any,
+) -> dict[str, Any]:
+    """Record/replay key of a search; optional fields only appear when set."""
+
+    request: dict[str, Any] = {
+        "table": settings.VECTOR_TABLE_NAME,
+        "limit": limit,
+        **query,
+    }
+    if options is not None:
+        request["options"] = asdict(options)
+    if filters is not None:
+        request["filters"] = asdict(filters)
+    if with_embedding:
+        request["with_embedding"] = True
+    return request
+
+
+def _from_record(record: dict[str, Any]) -> VectorSearchResult:
+    embedding = record.get("embedding")
+    return VectorSearchResult(
+        id=record["id"],
+        score=record["score"],
+        payload=record["payload"],
+        embedding=None if embedding is None else base64.b64decode(embedding),
+    )
+
+
+def _to_result(hit: SimilarityHit) -> VectorSearchResult:
+    return VectorSearchResult(
+        id=str(hit.id), score=hit.score, payload=hit.payload, embedding=hit.embedding
+    )
+
+
+async def _recorded_search(
+    request: dict[str, Any],
+    search: Callable[[], Awaitable[Sequence[Sequence[_Hit]]]],
+    *,
+    single: bool = False,
+) -> list[list[VectorSearchResult]]:
+    """Run ``search`` through the recorder, round-tripping hits as cassette records.
+
+    A ``single`` query is stored as one list of records, not a list of lists.
+    """
+
+    async def _records() -> Any:
+        rows = [[_to_record(hit) for hit in hits] for hits in await search()]
+        return rows[0] if single else rows
+
+    records = await recorder.acall("pgvector", request, _records)
+    if single:
+        records = [records]
+    return [[_from_record(record) for record in matches] for matches in records]
 
 
 class PgVectorService(VectorStoreService):
@@ -17,30 +130,142 @@ class PgVectorService(VectorStoreService):
     def __init__(self, repository: PgVectorRepository) -> None:
         self._repository = repository
 
+    @staticmethod
+    async def _recorded(
+        request: dict[str, Any],
+        search: Callable[[], Awaitable[list[list[SimilarityHit]]]],
+        *,
+        single: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        """Run ``search`` directly, or through the recorder when it is enabled."""
+
+        if not recorder.enabled:
+            return [[_to_result(hit) for hit in hits] for hits in await search()]
+        return await _recorded_search(request, search, single=single)
+
     async def similarity_search(
-        self, embedding: Sequence[float], *, limit: int
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        _check_limit(limit)
+
+        async def _search() -> list[list[SimilarityHit]]:
+            hits = await self._repository.similarity_search(
+                embedding,
+                limit=limit,
+                options=options,
+                filters=filters,
+                with_embedding=with_embedding,
+            )
+            return [hits]
+
+        request = _request(
+            limit, options, filters, with_embedding, embedding=_digest(embedding)
+        )
+        rows = await self._recorded(request, _search, single=True)
+        return rows[0]
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        _check_limit(limit)
+
+        async def _search() -> list[list[SimilarityHit]]:
+            return await self._repository.similarity_search_many(
+                embeddings,
+                limit=limit,
+                options=options,
+                filters=filters,
+                with_embedding=with_embedding,
+            )
+
+        request = _request(
+            limit,
+            options,
+            filters,
+            with_embedding,
+            embeddings=[_digest(embedding) for embedding in embeddings],
+        )
+        return await self._recorded(request, _search)
+
+    async def hybrid_search(
+        self,
+        embedding: Sequence[float],
+        text: str,
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
     ) -> list[VectorSearchResult]:
-        if limit <= 0:
-            msg = "limit must be greater than zero"
-            logger.error(msg)
-            raise ValueError(msg)
-
-        rows = await self._repository.similarity_search(embedding, limit=limit)
-
-        results: list[VectorSearchResult] = []
-        for document, score in rows:
-            payload = {
-                "content": document.description,
-            }
-            results.append(
-                VectorSearchResult(
-                    id=str(document.id),
-                    score=score,
-                    payload=payload,
-                )
+        _check_limit(limit)
+
+        async def _search() -> list[list[SimilarityHit]]:
+            hits = await self._repository.hybrid_search(
+                embedding,
+                text,
+                limit=limit,
+                options=options,
+                filters=filters,
+                with_embedding=with_embedding,
+            )
+            return [hits]
+
+        request = _request(
+            limit,
+            options,
+            filters,
+            with_embedding,
+            mode="hybrid",
+            embedding=_digest(embedding),
+            text=text,
+        )
+        rows = await self._recorded(request, _search, single=True)
+        return rows[0]
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        _check_limit(limit)
+
+        async def _search() -> list[list[SimilarityHit]]:
+            return await self._repository.hybrid_search_many(
+                embeddings,
+                texts,
+                limit=limit,
+                options=options,
+                filters=filters,
+                with_embedding=with_embedding,
             )
 
-        return results
+        request = _request(
+            limit,
+            options,
+            filters,
+            with_embedding,
+            mode="hybrid",
+            embeddings=[_digest(embedding) for embedding in embeddings],
+            texts=list(texts),
+        )
+        return await self._recorded(request, _search)
 
 
-__all__ = ["PgVectorService"]
\ No newline at end of file
+__all__ = ["PgVectorService"]
@@ -10,7 +10,7 @@ from loguru import logger
 from app import settings
 
 from ..local_model_client import LocalModelClient
-from ..model_map import LLMModelMap
+from ..profiles import get_generation_profile
 from ..prompts import RAG_PROMPT, SYSTEM_PROMPT
 from ..states import AgentState
 from .vertex_gemini_client import VertexGeminiClient
@@ -21,7 +21,7 @@ class AnswerGenerator:
 
     def __init__(self) -> None:
         if settings.USE_LOCAL_MODEL:
-            self.llm = LocalModelClient()
+            self.llm = LocalModelClient(node="answer_generation")
         else:
             #from langchain_openai import ChatOpenAI
             #from pydantic import SecretStr
@@ -42,9 +42,8 @@ class AnswerGenerator:
             #     # other params...
             # )
 
-            self.llm = VertexGeminiClient(
-                model=LLMModelMap.ANSWER_GENERATOR.value,
-                temperature=0.0,
+            self.llm = VertexGeminiClient.from_profile(
+                get_generation_profile("answer_generation"), node="answer_generation"
             )
 
     def generate(self, state: AgentState) -> dict[str, list[AIMessage]]:
@@ -96,7 +95,8 @@ class AnswerGenerator:
             # prompt = ChatPromptTemplate.from_messages(conversation)
             # answer = self.llm.invoke(prompt.format())
             # answer_content = answer.content
-            answer_content = self.llm.invoke(conversation)
+            # Streamed so a slow first token can be hedged (see hedge_budget).
+            answer_content = self.llm.invoke(conversation, stream=True)
 
         logger.info(f"Final Answer Generated:\n{answer_content}")
 
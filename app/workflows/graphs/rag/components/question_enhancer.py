@@ -8,7 +8,7 @@ from pydantic import BaseModel, Field
 from app import settings
 
 from ..local_model_client import LocalModelClient
-from ..model_map import LLMModelMap
+from ..profiles import get_generation_profile
 from ..states import AgentState
 from .vertex_gemini_client import VertexGeminiClient
 
@@ -29,7 +29,7 @@ class QuestionEnhancer:
 
     def __init__(self) -> None:
         if settings.USE_LOCAL_MODEL:
-            self.llm = LocalModelClient()
+            self.llm = LocalModelClient(node="question_enhancer")
         else:
             #from langchain_openai import ChatOpenAI
             #from pydantic import SecretStr
@@ -56,9 +56,8 @@ class QuestionEnhancer:
             #     strict=True,
             # )
 
-            self.llm = VertexGeminiClient(
-                model=LLMModelMap.QUESTION_ENHANCER.value,
-                temperature=0.0,
+            self.llm = VertexGeminiClient.from_profile(
+                get_generation_profile("question_enhancer"), node="question_enhancer"
             )
 
     def enhance(self, state: AgentState) -> dict:
@@ -87,27 +86,9 @@ class QuestionEnhancer:
             f"Enhancing question with {'local' if settings.USE_LOCAL_MODEL else 'VertexAI'} model..."
         )
 
-        if settings.USE_LOCAL_MODEL:
-            response_content = self.llm.invoke(conversation)
-
-            # Parse the response to extract questions
-            lines = response_content.strip().split("\n")
-            refined_questions = [line.strip() for line in lines if line.strip()][:2]
-
-            # Ensure we have exactly 2 questions
-            while len(refined_questions) < 2:
-                refined_questions.append(
-                    f"Enhanced question {len(refined_questions) + 1}"
-                )
-
-            response = EnhancedQuestionsResult(refined_questions=refined_questions[:2])
-        else:
-            # enhancer_prompt = ChatPromptTemplate.from_messages(conversation)
-            # response_data = (enhancer_prompt | self.llm).invoke({})
-            # response = EnhancedQuestionsResult.model_validate(response_data)
-            response = self.llm.invoke_structured(
-                conversation, schema=EnhancedQuestionsResult
-            )
+        response = self.llm.invoke_structured(
+            conversation, schema=EnhancedQuestionsResult
+        )
 
         logger.info(f"Generated enhanced questions: {response.refined_questions}")
 
@@ -1,5 +1,7 @@
 """Question rewriter components"""
 
+from typing import Literal
+
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from loguru import logger
@@ -8,9 +10,9 @@ from pydantic import BaseModel, Field
 from app import settings
 
 from ..local_model_client import LocalModelClient
-from ..model_map import LLMModelMap
 from ..states import AgentState
 
+from ..profiles import get_generation_profile
 from ..prompts import QUESTION_REWRITER_PROMPT
 from .vertex_gemini_client import VertexGeminiClient
 
@@ -30,6 +32,14 @@ class RefinedQueryResult(BaseModel):
     require_tripitika: bool = Field(
         description="Indicates whether the input question required retrieval augmented generation due to being domain specific on Thai tripitika text."
     )
+    pitaka: Literal["all", "vinaya", "sutta", "abhidhamma"] = Field(
+        default="all",
+        description=(
+            "The Tipitaka basket the question is clearly limited to: vinaya "
+            "(monastic discipline), sutta (discourses) or abhidhamma (higher "
+            "teachings). Use all when the basket is not explicit or unsure."
+        )
+    )
 
 
 class QuestionRewriter:
@@ -37,7 +47,7 @@ class QuestionRewriter:
 
     def __init__(self) -> None:
         if settings.USE_LOCAL_MODEL:
-            self.llm = LocalModelClient()
+            self.llm = LocalModelClient(node="question_rewriter")
         else:
             #from langchain_openai import ChatOpenAI
             #from pydantic import SecretStr
@@ -65,9 +75,8 @@ class QuestionRewriter:
             #     strict=True,
             # )
 
-            self.llm = VertexGeminiClient(
-                model=LLMModelMap.QUESTION_REWRITER.value,
-                temperature=0.0
+            self.llm = VertexGeminiClient.from_profile(
+                get_generation_profile("question_rewriter"), node="question_rewriter"
             )
 
     @staticmethod
@@ -106,44 +115,23 @@ class QuestionRewriter:
             f"Rewriting question with {'local' if settings.USE_LOCAL_MODEL else 'Vertex AI'} model..."
         )
 
-        if settings.USE_LOCAL_MODEL:
-            # For local models, we'll use a simpler approach
-            response_content = self.llm.invoke(conversation)
-
-            # Simple parsing for local models
-            refined_question = response_content.strip()
-            require_enhancement = (
-                "complex" in response_content.lower()
-                or "enhance" in response_content.lower()
-            )
-            require_triptika = (
-                "tripitika" in response_content.lower()
-                or "thai" in response_content.lower()
-            )
-
-            response = RefinedQueryResult(
-                refined_question=refined_question,
-                require_enhancement=require_enhancement,
-                require_tripitika=require_tripitika
-            )
-        else:
-            # rephrase_prompt = ChatPromptTemplate.from_messages(conversation)
-            # response_data = (rephrase_prompt | self.llm).invoke({})
-            # response = RefinedQueryResult.model_validate(response_data)
-            response = self.llm.invoke_structured(
-                conversation, schema=RefinedQueryResult
-            )
+        # Both backends constrain decoding to the schema, so the routing flags
+        # come straight from the model rather than from keyword heuristics.
+        response = self.llm.invoke_structured(conversation, schema=RefinedQueryResult)
 
         refined_question = response.refined_question
         require_enhancement = response.require_enhancement
         require_tripitika = response.require_tripitika
+        pitaka = response.pitaka
 
         logger.info(f"Refined question: {refined_question}")
         logger.info(f"Enhancement required: {require_enhancement}")
         logger.info(f"Tripitika required: {require_tripitika}")
+        logger.info(f"Pitaka filter: {pitaka}")
 
         return {
             "refined_question": refined_question,
             "require_enhancement": require_enhancement,
-            "require_tripitika" : require_tripitika
+            "require_tripitika" : require_tripitika,
+            "pitaka": pitaka,
         }
@@ -11,25 +11,42 @@ from ..tools import RAG_TOOL
 class RagExecutor:
     """Agent component responsible for executing rag based on refined or enhanced questions."""
 
+    @staticmethod
+    def _query(state: AgentState) -> str | list[str]:
+        """The refined question, or all enhanced questions for one batched retrieval."""
+        questions = state["refined_questions"]
+        if len(questions) > 1:
+            return list(questions)
+        return questions[0] if questions else state["refined_question"]
+
+    @staticmethod
+    def _request(state: AgentState) -> dict[str, Any]:
+        """Tool input: the query plus the basket inferred by the rewriter."""
+        return {
+            "query": RagExecutor._query(state),
+            "pitaka": state.get("pitaka", "all"),
+        }
+
+    @staticmethod
+    def _collect(response: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+        results = [
+            item for item in response.get("results") or [] if item.get("content")
+        ]
+        logger.info(f"Rag completed with {len(results)} result sets.")
+        return {"search_results": results}
+
     def search(self, state: AgentState) -> dict[str, list[dict[str, Any]]]:
         """
         Executes rag search queries using available questions in the state.
-        """
-        questions = (
-            state["refined_questions"]
-            if state["refined_questions"]
-            else [state["refined_question"]]
-        )
-        results = []
-
-        for query in questions:
-            logger.info(f"Performing rag search for: {query}")
-            result = RAG_TOOL.invoke({"query": query})
 
-            for item in result.get("results"):
-                if item.get("content"):
-                    results.append(item)
-
-        logger.info(f"Rag completed with {len(results)} result sets.")
-
-        return {"search_results": results}
+        Synchronous graph runs only; ``asearch`` is used on the event loop.
+        """
+        request = self._request(state)
+        logger.info(f"Performing rag search for: {request}")
+        return self._collect(RAG_TOOL.invoke(request))
+
+    async def asearch(self, state: AgentState) -> dict[str, list[dict[str, Any]]]:
+        """Executes the rag search queries as one batched retrieval, asynchronously."""
+        request = self._request(state)
+        logger.info(f"Performing rag search for: {request}")
+        return self._collect(await RAG_TOOL.ainvoke(request))
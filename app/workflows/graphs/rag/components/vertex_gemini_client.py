@@ -2,18 +2,40 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
-from collections.abc import Iterable
+import socket
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from functools import partial
 from typing import Any, Type
 
 import google.genai as genai
-from google.genai.types import Content, GenerateContentConfig, Part, Schema
+import httpx
+from google.genai.types import (
+    Content,
+    GenerateContentConfig,
+    HttpOptions,
+    Part,
+    Schema,
+    ThinkingConfig,
+)
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 from google.cloud import aiplatform_v1
 
 from app import settings
+from app.services.llm import (
+    Cancellation,
+    HedgeCancelledError,
+    TokenUsage,
+    hedger,
+    record_usage,
+)
+from app.services.recording import recorder
+
+from ..profiles import GenerationProfile
 
 
 _ROLE_MAP = {
@@ -22,6 +44,27 @@ _ROLE_MAP = {
     AIMessage: "model",
 }
 
+# Set by a hedged stream so its HTTP response can be shut down on cancel.
+_on_stream_response: ContextVar[Callable[[httpx.Response], None] | None] = ContextVar(
+    "_on_stream_response", default=None
+)
+
+
+def _track_response(response: httpx.Response) -> None:
+    register = _on_stream_response.get()
+    if register is not None:
+        register(response)
+
+
+def _abort_response(response: httpx.Response) -> None:
+    """Shut down the socket under ``response`` so a blocked read returns."""
+
+    stream = response.extensions.get("network_stream")
+    sock = stream.get_extra_info("socket") if stream is not None else None
+    if sock is not None:
+        with contextlib.suppress(OSError):
+            sock.shutdown(socket.SHUT_RDWR)
+
 
 class VertexGeminiClient:
     """Thin wrapper around the Google Generative AI Vertex client.
@@ -39,27 +82,45 @@ class VertexGeminiClient:
         max_output_tokens: int | None = None,
         top_k: int | None = None,
         top_p: float | None = None,
+        thinking_budget: int | None = None,
+        stop_sequences: list[str] | None = None,
+        hedge_budget: float = 0.0,
+        node: str = "default",
     ) -> None:
         self.model = model
+        self.node = node
         self.temperature = temperature
         self.max_output_tokens = max_output_tokens
         self.top_k = top_k
         self.top_p = top_p
+        self.thinking_budget = thinking_budget
+        self.stop_sequences = stop_sequences
+        self.hedge_budget = hedge_budget
         self._client = genai.Client(
             vertexai=True,
-            api_key=settings.GOOGLE_GENAI_API_KEY
+            api_key=settings.GOOGLE_GENAI_API_KEY,
+            http_options=HttpOptions(
+                client_args={"event_hooks": {"response": [_track_response]}}
+            ),
         )
 
+    @classmethod
+    def from_profile(cls, profile: GenerationProfile, *, node: str) -> VertexGeminiClient:
+        """Create a client for ``node`` configured from a generation profile."""
+
+        return cls(node=node, **profile.model_dump())
+
     def invoke(self, messages: list[BaseMessage], *, stream: bool = False) -> str:
-        """Generate a text response from Gemini."""
+        """Generate a text response from Gemini.
+
+        With ``stream=True`` the response is consumed through
+        ``generate_content_stream`` and hedged according to ``hedge_budget``;
+        the joined text is returned either way.
+        """
 
         config = self._build_config()
-        response = self._client.models.generate_content(
-            model=self.model,
-            contents=self._convert_messages(messages),
-            config=config
-        )
-        output_text = response.text.strip()
+        response = self._generate(messages, config, stream=stream)
+        output_text: str = response["text"].strip()
         logger.debug("Vertex AI response received", output=output_text)
         return output_text
 
@@ -68,17 +129,11 @@ class VertexGeminiClient:
     ) -> BaseModel:
         """Generate a structured response that conforms to ``schema``."""
 
-        
         json_schema = schema.model_json_schema()
         config = self._build_config(response_schema=json_schema)
-        
-        response = self._client.models.generate_content(
-            model=self.model,
-            contents=self._convert_messages(messages),
-            config=config,
-        )
-        #logger.debug(self._convert_messages(messages))
-        raw_output = response.text.strip()
+
+        response = self._generate(messages, config)
+        raw_output = response["text"].strip()
         logger.debug("Vertex AI structured response", output=raw_output)
 
         if not raw_output:
@@ -97,6 +152,108 @@ class VertexGeminiClient:
             logger.error("Structured output validation error", error=str(exc))
             raise
 
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        config: GenerateContentConfig,
+        *,
+        stream: bool = False,
+    ) -> dict[str, Any]:
+        """Call ``generate_content`` through the record/replay layer.
+
+        Only the serializable parts of the response that callers rely on are
+        returned, so recorded cassettes can stand in for the live endpoint.
+        Token usage is reported for every call, replayed ones included.
+        """
+
+        contents = self._convert_messages(messages)
+        request: dict[str, Any] = {
+            "model": self.model,
+            "node": self.node,
+            "contents": [
+                content.model_dump(mode="json", exclude_none=True)
+                for content in contents
+            ],
+            "config": config.model_dump(mode="json", exclude_none=True),
+        }
+        if stream:
+            request["stream"] = True
+
+        def _call() -> dict[str, Any]:
+            if stream:
+                return hedger.run(
+                    self.node,
+                    lambda cancel, on_first_token: self._consume_stream(
+                        contents, config, cancel, on_first_token
+                    ),
+                    budget=self.hedge_budget,
+                )
+            response = self._client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config,
+            )
+            usage = TokenUsage.from_gemini(response.usage_metadata)
+            return {"text": response.text or "", "usage": usage.as_dict()}
+
+        response = recorder.call("gemini", request, _call)
+        record_usage(self.node, self.model, TokenUsage.from_dict(response.get("usage")))
+        return response
+
+    def _consume_stream(
+        self,
+        contents: list[Content],
+        config: GenerateContentConfig,
+        cancel: Cancellation | None = None,
+        on_first_token: Callable[[], None] | None = None,
+    ) -> dict[str, Any]:
+        """Join a streamed response; usage arrives with the final chunks.
+
+        A losing hedge attempt is stopped through ``cancel``: it is polled
+        between chunks, and cancelling also shuts down the response's
+        connection, so an attempt still waiting for a chunk fails at once
+        instead of holding its stream and worker until the server answers.
+        ``on_first_token`` fires on the first chunk carrying text.
+        """
+
+        parts: list[str] = []
+        usage_metadata = None
+        token = None
+        if cancel is not None:
+            token = _on_stream_response.set(
+                lambda response: cancel.on_cancel(partial(_abort_response, response))
+            )
+        chunks = self._client.models.generate_content_stream(
+            model=self.model,
+            contents=contents,
+            config=config,
+        )
+        try:
+            for chunk in chunks:
+                if cancel is not None and cancel.is_set():
+                    raise HedgeCancelledError(f"Hedged call for {self.node} cancelled")
+                if chunk.text:
+                    if not parts and on_first_token is not None:
+                        on_first_token()
+                    parts.append(chunk.text)
+                if chunk.usage_metadata is not None:
+                    usage_metadata = chunk.usage_metadata
+        except (httpx.HTTPError, OSError) as exc:
+            if cancel is not None and cancel.is_set():
+                raise HedgeCancelledError(
+                    f"Hedged call for {self.node} cancelled"
+                ) from exc
+            raise
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            if token is not None:
+                _on_stream_response.reset(token)
+
+        usage = TokenUsage.from_gemini(usage_metadata)
+        return {"text": "".join(parts), "usage": usage.as_dict()}
+
     def _build_config(self, response_schema: dict[str, Any] | None = None) -> GenerateContentConfig:
         """Build a ``GenerateContentConfig`` with optional structured output schema."""
 
@@ -109,6 +266,12 @@ class VertexGeminiClient:
             config_kwargs["top_k"] = self.top_k
         if self.top_p is not None:
             config_kwargs["top_p"] = self.top_p
+        if self.stop_sequences:
+            config_kwargs["stop_sequences"] = self.stop_sequences
+        if self.thinking_budget is not None:
+            config_kwargs["thinking_config"] = ThinkingConfig(
+                thinking_budget=self.thinking_budget
+            )
 
         if response_schema is not None:
             config_kwargs["response_mime_type"] = "application/json"
@@ -181,4 +344,6 @@ class VertexGeminiClient:
         if schema_type == "number":
             return Schema(type='NUMBER', description=schema_description)
         # Default to string for unknown primitive types.
-        return Schema(type='STRING', description=schema_description)
\ No newline at end of file
+        return Schema(
+            type='STRING', description=schema_description, enum=schema_dict.get("enum")
+        )
\ No newline at end of file
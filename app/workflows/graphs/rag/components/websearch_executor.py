@@ -1,5 +1,6 @@
 """Web search component that retrieves search results for enhanced or rephrased questions."""
 
+import asyncio
 from typing import Any
 
 from loguru import logger
@@ -11,25 +12,42 @@ from ..tools import SEARCH_TOOL
 class WebSearchExecutor:
     """Agent component responsible for executing web searches based on refined or enhanced questions."""
 
-    def search(self, state: AgentState) -> dict[str, list[dict[str, Any]]]:
-        """
-        Executes web search queries using available questions in the state.
-        """
-        questions = (
+    @staticmethod
+    def _questions(state: AgentState) -> list[str]:
+        return (
             state["refined_questions"]
             if state["refined_questions"]
             else [state["refined_question"]]
         )
-        results = []
-
-        for query in questions:
-            logger.info(f"Performing web search for: {query}")
-            result = SEARCH_TOOL.invoke({"query": query})
-
-            for item in result.get("results"):
-                if item.get("content"):
-                    results.append(item)
 
+    @staticmethod
+    def _collect(responses: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+        results = [
+            item
+            for response in responses
+            for item in response.get("results") or []
+            if item.get("content")
+        ]
         logger.info(f"Web search completed with {len(results)} result sets.")
-
         return {"search_results": results}
+
+    def search(self, state: AgentState) -> dict[str, list[dict[str, Any]]]:
+        """
+        Executes web search queries using available questions in the state.
+
+        Synchronous graph runs only; ``asearch`` is used on the event loop.
+        """
+        responses = []
+        for query in self._questions(state):
+            logger.info(f"Performing web search for: {query}")
+            responses.append(SEARCH_TOOL.invoke({"query": query}))
+        return self._collect(responses)
+
+    async def asearch(self, state: AgentState) -> dict[str, list[dict[str, Any]]]:
+        """Executes the web search queries concurrently on the event loop."""
+        questions = self._questions(state)
+        logger.info(f"Performing web search for: {questions}")
+        responses = await asyncio.gather(
+            *(SEARCH_TOOL.ainvoke({"query": query}) for query in questions)
+        )
+        return self._collect(list(responses))
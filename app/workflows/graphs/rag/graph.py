@@ -1,5 +1,6 @@
 """LangGraph agent graph setup using class-based node components."""
 
+from langchain_core.runnables import RunnableLambda
 from langfuse import Langfuse, get_client
 from langfuse.langchain import CallbackHandler
 from langgraph.checkpoint.memory import InMemorySaver
@@ -47,8 +48,16 @@ class RagAgentGraph:
         # Register functional nodes
         self.workflow.add_node("question_rewriter", self.rewriter.rewrite)
         self.workflow.add_node("question_enhancer", self.enhancer.enhance)
-        self.workflow.add_node("websearch", self.searcher.search)
-        self.workflow.add_node("retrieval", self.retriever.search)
+        # Search and retrieval are natively async, so racing search providers
+        # can cancel the loser; ``search`` only serves synchronous runs.
+        self.workflow.add_node(
+            "websearch",
+            RunnableLambda(self.searcher.search, afunc=self.searcher.asearch),
+        )
+        self.workflow.add_node(
+            "retrieval",
+            RunnableLambda(self.retriever.search, afunc=self.retriever.asearch),
+        )
         self.workflow.add_node("answer_generation", self.answerer.generate)
 
         # Define flow
@@ -1,74 +1,136 @@
 """Local model client for LM Studio integration."""
 
-from langchain_core.messages import BaseMessage
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from typing import Any, TypeVar
+
+import httpx
+from langchain_core.messages import BaseMessage, BaseMessageChunk
 from langchain_openai import ChatOpenAI
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from app import settings
+from app.services.llm import TokenUsage, record_usage
+
+_ERROR_REPLY = "I apologize, but I encountered an error processing your request."
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@lru_cache(maxsize=1)
+def _shared_chat_model() -> ChatOpenAI:
+    """Return the process-wide chat model and its pooled HTTP clients.
+
+    Created lazily so each (forked) worker gets its own connection pool.
+    """
+
+    limits = httpx.Limits(
+        max_connections=settings.LOCAL_MODEL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LOCAL_MODEL_MAX_CONNECTIONS,
+    )
+    timeout = httpx.Timeout(settings.LOCAL_MODEL_TIMEOUT)
+    return ChatOpenAI(
+        base_url=settings.LOCAL_MODEL_URL + "/v1",
+        api_key="not-needed",  # LM Studio doesn't require API key
+        model=settings.LOCAL_MODEL_NAME,
+        temperature=0.7,
+        max_tokens=2000,
+        http_client=httpx.Client(limits=limits, timeout=timeout),
+        http_async_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+    )
 
 
 class LocalModelClient:
     """Client for interacting with local LM Studio model."""
 
-    def __init__(self) -> None:
-        self.client = ChatOpenAI(
-            base_url=settings.LOCAL_MODEL_URL + "/v1",
-            api_key="not-needed",  # LM Studio doesn't require API key
-            model="local-model",  # Model name doesn't matter for local
-            temperature=0.7,
-            max_tokens=2000,
+    def __init__(self, node: str = "default") -> None:
+        self.node = node
+        self.client = _shared_chat_model()
+
+    def _record(self, message: Any) -> None:
+        record_usage(
+            self.node,
+            self.client.model_name,
+            TokenUsage.from_langchain(getattr(message, "usage_metadata", None)),
         )
 
-    def invoke(self, messages: list[BaseMessage]) -> str:
-        """Invoke the local model with messages."""
+    def invoke(self, messages: list[BaseMessage], *, stream: bool = False) -> str:
+        """Invoke the local model with messages.
+
+        ``stream=True`` mirrors ``VertexGeminiClient.invoke``: the response is
+        streamed (local calls are not hedged) and the joined text returned.
+        """
         try:
-            response = self.client.invoke(messages)
-            return response.content
+            response: BaseMessage | None
+            if stream:
+                final: BaseMessageChunk | None = None
+                for chunk in self.client.stream(messages, stream_usage=True):
+                    final = chunk if final is None else final + chunk
+                response = final
+            else:
+                response = self.client.invoke(messages)
+            self._record(response)
+            return str(response.content) if response is not None else ""
         except Exception as e:
             logger.error(f"Error invoking local model: {e}")
-            return "I apologize, but I encountered an error processing your request."
+            return _ERROR_REPLY
 
-    def invoke_with_structured_output(
-        self, messages: list[BaseMessage], schema: BaseModel
-    ) -> BaseModel:
-        """Invoke the local model with structured output."""
+    async def ainvoke(self, messages: list[BaseMessage]) -> str:
+        """Invoke the local model without blocking the event loop."""
         try:
-            # For local models, we'll use a simpler approach
-            response = self.client.invoke(messages)
-            content = response.content
-
-            # Parse the response to extract structured data
-            # This is a simplified approach - you might need to adjust based on your model's output format
-            return self._parse_structured_response(content, schema)
+            response = await self.client.ainvoke(messages)
+            self._record(response)
+            return str(response.content)
         except Exception as e:
-            logger.error(f"Error invoking local model with structured output: {e}")
-            # Return default values
-            return schema.model_validate({})
+            logger.error(f"Error invoking local model: {e}")
+            return _ERROR_REPLY
+
+    async def astream(self, messages: list[BaseMessage]) -> AsyncIterator[str]:
+        """Stream the response text chunk by chunk."""
+        final = None
+        async for chunk in self.client.astream(messages, stream_usage=True):
+            final = chunk if final is None else final + chunk
+            if chunk.content:
+                yield str(chunk.content)
+        if final is not None:
+            self._record(final)
+
+    def _structured(self, schema: type[BaseModel]) -> Any:
+        # Ask the OpenAI-compatible server to constrain decoding to the schema
+        # instead of parsing JSON out of free text.
+        return self.client.with_structured_output(
+            schema, method="json_schema", strict=True, include_raw=True
+        )
+
+    def _invalid(self, error: object) -> ValueError:
+        msg = f"Local model returned invalid structured output: {error}"
+        logger.error(msg)
+        return ValueError(msg)
 
-    def _parse_structured_response(self, content: str, schema: BaseModel) -> BaseModel:
-        """Parse the model response to extract structured data."""
-        # This is a simplified parser - you might need to adjust based on your model's output
+    def _parse_structured(self, result: dict[str, Any], schema: type[T]) -> T:
+        self._record(result.get("raw"))
+        parsed = result.get("parsed")
+        if result.get("parsing_error") is not None or not isinstance(parsed, schema):
+            raise self._invalid(result.get("parsing_error"))
+        return parsed
+
+    def invoke_structured(self, messages: list[BaseMessage], schema: type[T]) -> T:
+        """Generate a response constrained to ``schema`` (JSON schema mode)."""
         try:
-            # Try to extract JSON-like content
-            import json
-            import re
-
-            # Look for JSON in the response
-            json_match = re.search(r"\{.*\}", content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                data = json.loads(json_str)
-                return schema.model_validate(data)
-
-            # Fallback: try to extract key-value pairs
-            data = {}
-            for field in schema.model_fields:
-                # Simple extraction - you might need more sophisticated parsing
-                if field in content.lower():
-                    data[field] = "extracted_value"  # Simplified
-
-            return schema.model_validate(data)
-        except Exception as e:
-            logger.warning(f"Failed to parse structured response: {e}")
-            return schema.model_validate({})
+            result = self._structured(schema).invoke(messages)
+        except ValidationError as e:
+            # The OpenAI client validates the content itself before
+            # ``include_raw`` can report it as a parsing error.
+            raise self._invalid(e) from e
+        return self._parse_structured(result, schema)
+
+    async def ainvoke_structured(
+        self, messages: list[BaseMessage], schema: type[T]
+    ) -> T:
+        """Async variant of :meth:`invoke_structured`."""
+        try:
+            result = await self._structured(schema).ainvoke(messages)
+        except ValidationError as e:
+            raise self._invalid(e) from e
+        return self._parse_structured(result, schema)
@@ -0,0 +1,62 @@
+"""Per-node generation profiles for the RAG graph LLM calls."""
+
+from pydantic import BaseModel, Field
+
+from app import settings
+
+from .model_map import LLMModelMap
+
+
+class GenerationProfile(BaseModel):
+    """Generation parameters applied to every LLM call made by a graph node."""
+
+    model: str
+    temperature: float = 0.0
+    thinking_budget: int | None = Field(
+        default=None,
+        description="Thinking token budget; 0 disables thinking, None keeps the model default.",
+    )
+    max_output_tokens: int | None = None
+    top_k: int | None = None
+    top_p: float | None = None
+    stop_sequences: list[str] | None = None
+    hedge_budget: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Fraction of streamed calls that may fire a hedge request; 0 disables hedging.",
+    )
+
+
+# Routing and query expansion emit a few short fields, so hidden reasoning only
+# adds latency there. The answer keeps the model's default thinking.
+DEFAULT_PROFILES: dict[str, GenerationProfile] = {
+    "question_rewriter": GenerationProfile(
+        model=LLMModelMap.QUESTION_REWRITER.value,
+        thinking_budget=0,
+        max_output_tokens=512,
+    ),
+    "question_enhancer": GenerationProfile(
+        model=LLMModelMap.QUESTION_ENHANCER.value,
+        thinking_budget=0,
+        max_output_tokens=256,
+    ),
+    "answer_generation": GenerationProfile(
+        model=LLMModelMap.ANSWER_GENERATOR.value,
+    ),
+}
+
+
+def get_generation_profile(node: str) -> GenerationProfile:
+    """Return the profile for ``node`` with ``LLM_GENERATION_PROFILES`` overrides applied."""
+
+    base = DEFAULT_PROFILES.get(
+        node, GenerationProfile(model=LLMModelMap.ANSWER_GENERATOR.value)
+    )
+    overrides = settings.LLM_GENERATION_PROFILES.get(node)
+    if not overrides:
+        return base
+    return GenerationProfile.model_validate({**base.model_dump(), **overrides})
+
+
+__all__ = ["DEFAULT_PROFILES", "GenerationProfile", "get_generation_profile"]
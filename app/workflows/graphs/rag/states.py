@@ -13,6 +13,7 @@ class AgentState(TypedDict):
     refined_question: str
     require_enhancement: bool
     require_tripitika: bool
+    pitaka: str  # basket inferred by the rewriter, or "all"
     refined_questions: list[str]
     search_results: list[dict]
     messages: Annotated[list[BaseMessage], operator.add]
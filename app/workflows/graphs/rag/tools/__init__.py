@@ -9,14 +9,35 @@ from .duckduckgo_search_tool import DUCKDUCKGO_SEARCH_TOOL
 # Import both search tools
 from .tavily_search_tool import TAVILY_SEARCH_TOOL
 
+from .racing_search_tool import RacingSearchTool
+
 from .rag_tool import RAG_TOOL
 
 # Select search tool based on configuration
-if settings.SEARCH_PROVIDER.lower() == "duckduckgo":
-    SEARCH_TOOL: BaseTool = DUCKDUCKGO_SEARCH_TOOL
+_provider = settings.SEARCH_PROVIDER.lower()
+SEARCH_TOOL: BaseTool
+if _provider in ("race", "adaptive"):
+    SEARCH_TOOL = RacingSearchTool(
+        providers={
+            "duckduckgo": DUCKDUCKGO_SEARCH_TOOL,
+            "tavily": TAVILY_SEARCH_TOOL,
+        },
+        min_results=settings.SEARCH_RACE_MIN_RESULTS,
+        adaptive=_provider == "adaptive",
+        explore_every=settings.SEARCH_RACE_EXPLORE_EVERY,
+    )
+elif _provider == "duckduckgo":
+    SEARCH_TOOL = DUCKDUCKGO_SEARCH_TOOL
 else:
-    SEARCH_TOOL: BaseTool = TAVILY_SEARCH_TOOL
+    SEARCH_TOOL = TAVILY_SEARCH_TOOL
 
 TOOLS: list[BaseTool] = [SEARCH_TOOL]
 
-__all__ = ["TOOLS", "SEARCH_TOOL", "TAVILY_SEARCH_TOOL", "DUCKDUCKGO_SEARCH_TOOL", "RAG_TOOL"]
+__all__ = [
+    "TOOLS",
+    "SEARCH_TOOL",
+    "TAVILY_SEARCH_TOOL",
+    "DUCKDUCKGO_SEARCH_TOOL",
+    "RAG_TOOL",
+    "RacingSearchTool",
+]
@@ -1,13 +1,45 @@
 """DuckDuckGo search tool for websearch."""
 
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+from cachetools import TTLCache
 from duckduckgo_search import DDGS
 from langchain_core.tools import BaseTool
 from loguru import logger
 from pydantic import Field
 
 from app import settings
+from app.services.recording import recorder
+
+# ``DDGS`` wraps a blocking HTTP client that is not safe to share between
+# threads, so searches run on a bounded pool where each worker owns a client.
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.DUCKDUCKGO_MAX_WORKERS, thread_name_prefix="ddgs"
+)
+_clients = threading.local()
+
+# Results shared by every tool instance in the process, keyed on the
+# normalized query and ``max_results``.
+_CACHE: TTLCache[tuple[str, int], dict[str, Any]] = TTLCache(
+    maxsize=settings.DUCKDUCKGO_CACHE_SIZE, ttl=settings.DUCKDUCKGO_CACHE_TTL
+)
+_CACHE_LOCK = threading.Lock()
+
+
+def _client() -> DDGS:
+    """Return the ``DDGS`` client owned by the current worker thread."""
+    client = getattr(_clients, "ddgs", None)
+    if client is None:
+        client = _clients.ddgs = DDGS()
+    return client
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.split()).casefold()
 
 
 class DuckDuckGoSearchTool(BaseTool):
@@ -17,24 +49,28 @@ class DuckDuckGoSearchTool(BaseTool):
     description: str = "Search the web using DuckDuckGo"
     max_results: int = Field(default=10, description="Maximum number of search results")
 
-    def __init__(self, **kwargs) -> None:
-        super().__init__(**kwargs)
-        self._ddgs = None  # Initialize lazily
+    def _cache_key(self, query: str) -> tuple[str, int]:
+        return _normalize(query), self.max_results
 
-    @property
-    def ddgs(self) -> DDGS:
-        """Lazy initialization of DDGS instance."""
-        if self._ddgs is None:
-            self._ddgs = DDGS()
-        return self._ddgs
+    def _cached(self, query: str) -> dict[str, Any] | None:
+        with _CACHE_LOCK:
+            cached = _CACHE.get(self._cache_key(query))
+        if cached is None:
+            return None
+        logger.debug(f"DuckDuckGo cache hit for: {query}")
+        return {**cached, "query": query, "results": list(cached["results"])}
 
-    def _run(self, query: str) -> dict[str, Any] | None:
+    def _search(self, query: str) -> dict[str, Any]:
         """Execute DuckDuckGo search and return results in Tavily-compatible format."""
         try:
             logger.info(f"Performing DuckDuckGo search for: {query}")
 
             # Perform the search
-            results = list(self.ddgs.text(query, max_results=self.max_results))
+            results = recorder.call(
+                "duckduckgo",
+                {"query": query, "max_results": self.max_results},
+                lambda: list(_client().text(query, max_results=self.max_results)),
+            )
 
             # Transform results to match Tavily format
             formatted_results = []
@@ -51,11 +87,14 @@ class DuckDuckGoSearchTool(BaseTool):
                 f"DuckDuckGo search completed with {len(formatted_results)} results"
             )
 
-            return {
+            response = {
                 "results": formatted_results,
                 "query": query,
                 "source": "DuckDuckGo",
             }
+            with _CACHE_LOCK:
+                _CACHE[self._cache_key(query)] = response
+            return {**response, "results": list(formatted_results)}
 
         except Exception as e:
             logger.error(f"Error in DuckDuckGo search: {e}")
@@ -66,9 +105,22 @@ class DuckDuckGoSearchTool(BaseTool):
                 "source": "DuckDuckGo",
             }
 
+    def _run(self, query: str) -> dict[str, Any] | None:
+        """Search on the worker pool, blocking the calling thread."""
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        context = contextvars.copy_context()
+        return _EXECUTOR.submit(context.run, self._search, query).result()
+
     async def _arun(self, query: str) -> dict[str, Any] | None:
-        """Async version of the search."""
-        return self._run(query)
+        """Search on the worker pool without blocking the event loop."""
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_EXECUTOR, context.run, self._search, query)
 
 
 # Create the DuckDuckGo search tool instance
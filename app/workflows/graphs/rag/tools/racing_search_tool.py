@@ -0,0 +1,247 @@
+"""Web search tool that races several providers and keeps the first good answer."""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from loguru import logger
+from prometheus_client import Counter, Histogram
+from pydantic import ConfigDict, Field, PrivateAttr
+
+SEARCH_PROVIDER_LATENCY_SECONDS = Histogram(
+    "search_provider_latency_seconds",
+    "Latency of completed web search provider calls.",
+    ["provider"],
+)
+SEARCH_PROVIDER_CALLS_TOTAL = Counter(
+    "search_provider_calls_total",
+    "Web search provider calls by outcome (win, poor, error, cancelled, late).",
+    ["provider", "outcome"],
+)
+
+# Racing from sync callers runs each provider on its own thread.
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="search-race")
+
+# Weight of the latest observation in the latency moving average.
+_EWMA_ALPHA = 0.2
+
+# Finished results below the quality bar, with their latencies, by provider.
+_Finished = dict[str, tuple[dict[str, Any], float]]
+
+
+@dataclass(slots=True)
+class ProviderStats:
+    """Latency and outcome statistics of one search provider."""
+
+    calls: int = 0
+    wins: int = 0
+    latency_ewma: float | None = None
+
+    @property
+    def win_rate(self) -> float:
+        """Fraction of calls whose result was used."""
+        return self.wins / self.calls if self.calls else 0.0
+
+    def observe_latency(self, seconds: float) -> None:
+        """Fold a completed call's latency into the moving average."""
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += _EWMA_ALPHA * (seconds - self.latency_ewma)
+
+
+class RacingSearchTool(BaseTool):
+    """Query several search tools concurrently and return the first good result.
+
+    A result is good when at least ``min_results`` items have content. The
+    remaining calls are cancelled once one is good. If none is good, the
+    result with the most usable items is returned.
+
+    With ``adaptive=True`` only the provider with the best record is queried,
+    and the others are raced only when it returns a poor result or on every
+    ``explore_every``-th call to keep their statistics fresh.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str = "web_search"
+    description: str = "Search the web using the fastest available provider"
+    providers: dict[str, BaseTool]
+    min_results: int = Field(default=3, description="Items with content for a good result")
+    adaptive: bool = False
+    explore_every: int = Field(
+        default=10, ge=1, description="Race every provider on every N-th call"
+    )
+
+    _stats: dict[str, ProviderStats] = PrivateAttr(default_factory=dict)
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def stats(self) -> dict[str, ProviderStats]:
+        """Snapshot of per-provider statistics."""
+        with self._lock:
+            return {
+                name: ProviderStats(s.calls, s.wins, s.latency_ewma)
+                for name, s in self._stats.items()
+            }
+
+    def _usable(self, result: Any) -> int:
+        if not isinstance(result, dict):
+            return -1
+        return sum(1 for item in result.get("results") or [] if item.get("content"))
+
+    def _observe(self, name: str, outcome: str, latency: float | None = None) -> None:
+        SEARCH_PROVIDER_CALLS_TOTAL.labels(provider=name, outcome=outcome).inc()
+        if latency is not None:
+            SEARCH_PROVIDER_LATENCY_SECONDS.labels(provider=name).observe(latency)
+        with self._lock:
+            stats = self._stats.setdefault(name, ProviderStats())
+            stats.calls += 1
+            stats.wins += outcome == "win"
+            if latency is not None:
+                stats.observe_latency(latency)
+
+    def _rank(self) -> list[str]:
+        """Provider names to query, in order, for the next call."""
+
+        names = list(self.providers)
+        if not self.adaptive or len(names) < 2:
+            return names
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.explore_every == 0 or any(
+                name not in self._stats for name in names
+            ):
+                return names
+
+            def score(name: str) -> tuple[float, float]:
+                stats = self._stats[name]
+                return (-stats.win_rate, stats.latency_ewma or float("inf"))
+
+            best = min(names, key=score)
+        return [best]
+
+    def _settle(
+        self, name: str, result: Any, latency: float, done: _Finished
+    ) -> dict[str, Any] | None:
+        """Record a finished call; return its result if it is good."""
+
+        if not isinstance(result, dict):
+            logger.warning(f"Search provider {name} failed: {result}")
+            self._observe(name, "error", latency)
+            return None
+        if self._usable(result) >= self.min_results:
+            self._observe(name, "win", latency)
+            for other, (_, other_latency) in done.items():
+                self._observe(other, "poor", other_latency)
+            return result
+        done[name] = (result, latency)
+        return None
+
+    async def _arun(self, query: str) -> dict[str, Any]:
+        """Race the providers on the running event loop."""
+
+        ranked = self._rank()
+        remaining = [name for name in self.providers if name not in ranked]
+        done: _Finished = {}
+
+        for names in (ranked, remaining):
+            if not names:
+                continue
+            started = time.perf_counter()
+
+            async def call(
+                name: str, started: float = started
+            ) -> tuple[str, Any, float]:
+                try:
+                    result = await self.providers[name].ainvoke({"query": query})
+                except Exception as e:
+                    result = e
+                return name, result, time.perf_counter() - started
+
+            pending = {asyncio.create_task(call(name), name=name) for name in names}
+            try:
+                while pending:
+                    finished, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in finished:
+                        name, result, latency = task.result()
+                        winner = self._settle(name, result, latency, done)
+                        if winner is not None:
+                            return winner
+            finally:
+                for task in pending:
+                    task.cancel()
+                    self._observe(task.get_name(), "cancelled")
+
+        return self._finish(query, done)
+
+    def _run(self, query: str) -> dict[str, Any]:
+        """Race the providers on threads for sync callers.
+
+        Threads cannot be interrupted: losing calls that already started
+        finish in the background, are recorded as ``late`` and their results
+        discarded. Only calls still queued are cancelled.
+        """
+
+        ranked = self._rank()
+        remaining = [name for name in self.providers if name not in ranked]
+        done: _Finished = {}
+
+        for names in (ranked, remaining):
+            if not names:
+                continue
+            started = time.perf_counter()
+            futures: dict[Future[Any], str] = {}
+            for name in names:
+                context = contextvars.copy_context()
+                tool = self.providers[name]
+                futures[_EXECUTOR.submit(context.run, tool.invoke, {"query": query})] = name
+
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures[future]
+                    error = future.exception()
+                    result = error if error is not None else future.result()
+                    latency = time.perf_counter() - started
+                    winner = self._settle(name, result, latency, done)
+                    if winner is not None:
+                        for other in pending:
+                            self._abandon(futures[other], other, started)
+                        return winner
+
+        return self._finish(query, done)
+
+    def _abandon(self, name: str, future: Future[Any], started: float) -> None:
+        """Cancel a losing call, or record it as late once its thread finishes."""
+
+        if future.cancel():
+            self._observe(name, "cancelled")
+            return
+        with self._lock:
+            # It lost this race; adaptive ranking need not wait for its result.
+            self._stats.setdefault(name, ProviderStats())
+
+        def finished(_: Future[Any]) -> None:
+            self._observe(name, "late", time.perf_counter() - started)
+
+        future.add_done_callback(finished)
+
+    def _finish(self, query: str, done: _Finished) -> dict[str, Any]:
+        """Best of the finished results when none met the quality bar."""
+
+        best = max(done, key=lambda name: self._usable(done[name][0]), default=None)
+        for name, (_, latency) in done.items():
+            self._observe(name, "win" if name == best else "poor", latency)
+        if best is not None:
+            return done[best][0]
+        logger.error(f"All web search providers failed for: {query}")
+        return {"results": [], "query": query, "error": "All search providers failed"}
@@ -1,32 +1,73 @@
 """Rag tool to match search format form search tool"""
-from app import settings
 
 import asyncio
-from typing import Any, Sequence
+from collections.abc import Coroutine
+from typing import Any
 
-import ast
 from langchain_core.tools import BaseTool
 from loguru import logger
 from pydantic import Field
-import threading
-import time
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 from app import settings
-from app.database.session import async_session_factory
+from app.database.session import (
+    async_read_session_factory,
+    asyncpg_dsn,
+    asyncpg_pool_max_size,
+    dispose_engines,
+    read_engine,
+    worker_count,
+)
+from app.services.embeddings import embedding_cache
+from app.core.enums import Pitaka, VectorBackend
+from app.services.vectorstores import SearchFilter, SearchOptions, VectorStoreService
+from app.services.vectorstores.memory import IvfVectorService, NumpyVectorService
+from app.services.vectorstores.pgvector.asyncpg_service import AsyncpgVectorService
 from app.services.vectorstores.pgvector.repository import PgVectorRepository
 from app.services.vectorstores.pgvector.service import PgVectorService
 from google import genai
 
 from ....pipelines import RagService, RagServiceError
 
-def _create_vector_service() -> PgVectorService:
-    """Instantiate the PGVector service layer."""
-
-    repository = PgVectorRepository(async_session_factory)
-    return PgVectorService(repository)
+def _create_vector_service() -> VectorStoreService:
+    """Instantiate the vector store service selected by ``VECTOR_BACKEND``."""
+
+    # Retrieval is read-only, so it goes to the replica when one is configured.
+    repository = PgVectorRepository(
+        async_read_session_factory,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+        hybrid_candidates=settings.RAG_HYBRID_CANDIDATES,
+        rrf_k=settings.RAG_HYBRID_RRF_K,
+        trigram_threshold=settings.RAG_HYBRID_TRIGRAM_THRESHOLD,
+    )
+    service = PgVectorService(repository)
+    if settings.VECTOR_BACKEND == VectorBackend.ASYNCPG:
+        return AsyncpgVectorService(
+            asyncpg_dsn(read_engine),
+            fallback=service,
+            distance=settings.VECTOR_DISTANCE,
+            storage=settings.VECTOR_STORAGE,
+            min_size=settings.VECTOR_ASYNCPG_POOL_MIN_SIZE,
+            max_size=asyncpg_pool_max_size(worker_count()),
+        )
+    if settings.VECTOR_BACKEND == VectorBackend.NUMPY:
+        return NumpyVectorService.load(
+            settings.VECTOR_MEMORY_PATH,
+            mmap=settings.VECTOR_MEMORY_MMAP,
+            fallback=service,
+        )
+    if settings.VECTOR_BACKEND == VectorBackend.IVF:
+        return IvfVectorService.load(
+            settings.VECTOR_MEMORY_PATH,
+            mmap=settings.VECTOR_MEMORY_MMAP,
+            nprobe=settings.VECTOR_IVF_NPROBE,
+            rescore=settings.VECTOR_IVF_RESCORE,
+            fallback=service,
+        )
+    return service
 
-def _create_genai_service() -> genai.client.AsyncClient:
+def _create_genai_service() -> genai.Client:
     """Instantiate the PGVector service layer."""
     client = genai.Client(
         vertexai=True,
@@ -36,8 +77,8 @@ def _create_genai_service() -> genai.client.AsyncClient:
 
 def _create_rag_service(
     *,
-    client: genai.client.AsyncClient,
-    vector_service: PgVectorService,
+    client: genai.Client,
+    vector_service: VectorStoreService,
     default_top_k: int,
 ) -> RagService:
     """Compose the ``RagService`` configured for Google embeddings."""
@@ -47,7 +88,45 @@ def _create_rag_service(
         client=client,
         timeout=settings.RAG_EMBEDDING_TIMEOUT,
         default_top_k=default_top_k,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+        embedding_cache=embedding_cache if settings.EMBEDDING_CACHE_ENABLED else None,
+        batch_window=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        search_mode=settings.RAG_SEARCH_MODE,
+        mmr_lambda=settings.RAG_MMR_LAMBDA,
+        mmr_candidates=settings.RAG_MMR_CANDIDATES,
+    )
+
+def _search_options(
+    ef_search: int | None, probes: int | None
+) -> SearchOptions | None:
+    """ANN tuning for one call, falling back to the configured defaults."""
+
+    ef_search = ef_search or settings.VECTOR_HNSW_EF_SEARCH
+    probes = probes or settings.VECTOR_IVFFLAT_PROBES
+    if ef_search is None and probes is None:
+        return None
+    return SearchOptions(ef_search=ef_search, probes=probes)
+
+def _search_filter(
+    pitaka: Pitaka | str | None,
+    book_min: int | None,
+    book_max: int | None,
+    page_min: int | None,
+    page_max: int | None,
+) -> SearchFilter | None:
+    """Metadata filter for one call; ``None`` searches all pages (pitaka ``"all"``)."""
+
+    basket = None if pitaka in (None, "", "all") else Pitaka(pitaka)
+    search_filter = SearchFilter(
+        pitaka=basket,
+        book_min=book_min,
+        book_max=book_max,
+        page_min=page_min,
+        page_max=page_max,
     )
+    return None if search_filter == SearchFilter() else search_filter
 
 class RagTool(BaseTool):
     """Tool that retrieves similar documents using the internal RAG pipeline."""
@@ -65,8 +144,8 @@ class RagTool(BaseTool):
     def __init__(
         self,
         *,
-        client: genai.client.AsyncClient | None = None,
-        vector_service: PgVectorService | None = None,
+        client: genai.Client | None = None,
+        vector_service: VectorStoreService | None = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
@@ -84,87 +163,135 @@ class RagTool(BaseTool):
             vector_service=self._vector_service,
             default_top_k=self.top_k,
         )
+        # Event loop the tool is awaited on (the application's loop); the
+        # pooled database connections belong to it.
         self._loop: asyncio.AbstractEventLoop | None = None
-        self._loop_thread: threading.Thread | None = None
-        self._loop_lock = threading.Lock()
-
-    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
-        """Create (and if necessary start) a dedicated event loop for sync calls."""
-
-        with self._loop_lock:
-            if self._loop and self._loop.is_running():
-                return self._loop
-
-            loop = asyncio.new_event_loop()
-
-            def _run_loop() -> None:
-                asyncio.set_event_loop(loop)
-                loop.run_forever()
-
-            thread = threading.Thread(target=_run_loop, daemon=True)
-            thread.start()
-
-            self._loop = loop
-            self._loop_thread = thread
-
-            # Wait until the loop is running before returning.
-            while not loop.is_running():
-                time.sleep(0.001)
-
-            return loop
 
+    def _run(
+        self,
+        query: str | list[str],
+        top_k: int | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        pitaka: Pitaka | str | None = None,
+        book_min: int | None = None,
+        book_max: int | None = None,
+        page_min: int | None = None,
+        page_max: int | None = None,
+        **_: Any,
+    ) -> dict[str, Any]:
+        """Synchronous entry point kept for compatibility; prefer ``ainvoke``.
 
-    def _run(self, query: str, top_k: int | None = None, **_: Any) -> dict[str, Any]:
-        """Synchronous entry point that proxies to the async implementation."""
+        From a worker thread the query is scheduled on the loop the tool was
+        last awaited on, so it shares that loop's connection pool. Without a
+        running application loop (e.g. scripts) each call runs on a fresh
+        loop and closes the pooled connections it opened before returning,
+        since they cannot be reused from another loop.
+        """
 
         try:
             asyncio.get_running_loop()
         except RuntimeError:
-            loop = self._ensure_loop()
-            future = asyncio.run_coroutine_threadsafe(
-                self._arun(query, top_k=top_k), loop
-            )
-            try:
-                return future.result(timeout=settings.RAG_EMBEDDING_TIMEOUT)
-            except FuturesTimeoutError as exc:  # pragma: no cover - defensive
-                future.cancel()
-                msg = "RAG tool execution timed out."
-                logger.exception(msg)
-                raise RuntimeError(msg) from exc
-        else:  # pragma: no cover - defensive
+            pass
+        else:
             msg = (
                 "RagTool._run cannot be invoked from within a running event loop. "
                 "Use the asynchronous interface (ainvoke) instead."
             )
             raise RuntimeError(msg)
 
+        call = self._arun(
+            query,
+            top_k=top_k,
+            ef_search=ef_search,
+            probes=probes,
+            pitaka=pitaka,
+            book_min=book_min,
+            book_max=book_max,
+            page_min=page_min,
+            page_max=page_max,
+        )
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return asyncio.run(self._run_once(call))
+
+        future = asyncio.run_coroutine_threadsafe(call, loop)
+        try:
+            return future.result(timeout=settings.RAG_EMBEDDING_TIMEOUT)
+        except FuturesTimeoutError as exc:  # pragma: no cover - defensive
+            future.cancel()
+            msg = "RAG tool execution timed out."
+            logger.exception(msg)
+            raise RuntimeError(msg) from exc
+
+    async def _run_once(
+        self, call: Coroutine[Any, Any, dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Await ``call`` on a throwaway loop, then release its connections."""
+
+        try:
+            return await call
+        finally:
+            self._loop = None
+            if isinstance(self._vector_service, AsyncpgVectorService):
+                await self._vector_service.aclose()
+            await dispose_engines()
+
     async def _arun(
-        self, query: str, top_k: int | None = None, **_: Any
+        self,
+        query: str | list[str],
+        top_k: int | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+        pitaka: Pitaka | str | None = None,
+        book_min: int | None = None,
+        book_max: int | None = None,
+        page_min: int | None = None,
+        page_max: int | None = None,
+        **_: Any,
     ) -> dict[str, Any]:
-        """Execute the RAG pipeline asynchronously."""
+        """Execute the RAG pipeline asynchronously.
 
+        A list of queries is embedded in one call and searched in one SQL
+        statement; their hits are de-duplicated and merged by score.
+        ``ef_search``/``probes`` tune the HNSW/IVFFlat search of this call;
+        ``pitaka`` and the book/page bounds restrict which pages are searched.
+        """
+
+        self._loop = asyncio.get_running_loop()
         search_k = top_k or self.top_k
+        options = _search_options(ef_search, probes)
+        try:
+            filters = _search_filter(pitaka, book_min, book_max, page_min, page_max)
+        except ValueError as exc:
+            logger.error("Invalid RAG filter for query '{}': {}", query, exc)
+            return {"query": query, "results": [], "error": str(exc), "source": "rag"}
 
         try:
-            results = await self._service.run(query, top_k=search_k)
+            if isinstance(query, str):
+                results = await self._service.run(
+                    query, top_k=search_k, options=options, filters=filters
+                )
+            else:
+                results = await self._service.run_many(
+                    query, top_k=search_k, options=options, filters=filters
+                )
         except RagServiceError as exc:
             logger.error("RAG tool failed for query '{}': {}", query, exc)
             return {"query": query, "results": [], "error": str(exc), "source" : "rag"}
 
-        # Transform results
-        
+        # Payload fields come from typed columns; no per-hit parsing.
         formatted_results = []
         for result in results:
-            logger.debug(result['payload']['content'])
-            temp2 = ast.literal_eval(result['payload']['content'])
+            payload = result['payload']
             formatted_result = {
                 "id" : result['id'],
                 "score" : result['score'],
-                "book": temp2['book'],
-                "page": temp2['page'],
-                "content": temp2['contents'],
-                "header": temp2['header'],
-                "footnote": temp2['footnotes'],
+                "book": payload['book'],
+                "page": payload['page'],
+                "content": payload['contents'],
+                "header": payload['header'],
+                "footnote": payload['footnotes'],
                 "source": "Rag",
             }
             formatted_results.append(formatted_result)
@@ -176,23 +303,17 @@ class RagTool(BaseTool):
         return {"query": query, "results": formatted_results, "top_k": search_k, "source" : "Rag"}
 
     async def aclose(self) -> None:
-        """Close the underlying HTTP client if owned by the tool."""
+        """Close the underlying HTTP client if owned by the tool, and any pool."""
 
-        if self._owns_client and hasattr(self._client, "aclose"):
-            await self._client.aclose()
+        if self._owns_client:
+            await self._client.aio.aclose()
+            self._client.close()
+        if isinstance(self._vector_service, AsyncpgVectorService):
+            await self._vector_service.aclose()
+        self._loop = None
 
-        loop = self._loop
-        thread = self._loop_thread
-        if loop and loop.is_running():
-            loop.call_soon_threadsafe(loop.stop)
-            if thread:
-                await asyncio.to_thread(thread.join)
-            loop.close()
-            self._loop = None
-            self._loop_thread = None
 
-            
 # Create the Rag search tool instance
-RAG_TOOL: BaseTool = RagTool(
+RAG_TOOL: RagTool = RagTool(
     max_results=settings.RAG_MAX_RESULTS
 )
@@ -1,11 +1,36 @@
 """Tavily search tool for websearch."""
 
+from typing import Any
+
 from langchain_core.tools import BaseTool
 from langchain_tavily import TavilySearch
 
 from app import settings
+from app.services.recording import recorder
+
+
+class TavilySearchTool(TavilySearch):
+    """``TavilySearch`` routed through the record/replay layer."""
+
+    @staticmethod
+    def _request(query: str, kwargs: dict[str, Any]) -> dict[str, Any]:
+        options = {key: value for key, value in kwargs.items() if key != "run_manager"}
+        return {"query": query, **options}
+
+    def _run(self, query: str, **kwargs: Any) -> dict[str, Any]:
+        run = super()._run
+        return recorder.call(
+            "tavily", self._request(query, kwargs), lambda: run(query, **kwargs)
+        )
+
+    async def _arun(self, query: str, **kwargs: Any) -> dict[str, Any]:
+        arun = super()._arun
+        return await recorder.acall(
+            "tavily", self._request(query, kwargs), lambda: arun(query, **kwargs)
+        )
+
 
-TAVILY_SEARCH_TOOL: BaseTool = TavilySearch(
+TAVILY_SEARCH_TOOL: BaseTool = TavilySearchTool(
     max_results=10,
     topic="general",
     include_answer=False,
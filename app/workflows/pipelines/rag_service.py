@@ -2,14 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Sequence
-from typing import Any
+from typing import Any, cast
 
-import httpx
+import numpy as np
 from loguru import logger
 
-from app.services.vectorstores import VectorStoreService
+from app.core.enums import SearchMode
+
+from app.services.embeddings import (
+    EMBEDDING_DTYPE,
+    EmbeddingBatcher,
+    EmbeddingCache,
+    timed_mmr,
+    truncate_embeddings,
+)
+from app.services.recording import recorder
+from app.services.vectorstores import (
+    SearchFilter,
+    SearchOptions,
+    VectorSearchResult,
+    VectorStoreService,
+)
 from google import genai
+from google.genai import types
 
 __all__ = ["RagService", "RagServiceError"]
 
@@ -25,9 +42,17 @@ class RagService:
         self,
         *,
         vector_service: VectorStoreService,
-        client: genai.client.AsyncClient,
+        client: genai.Client,
         timeout: float = 10.0,
         default_top_k: int = 5,
+        model: str = "gemini-embedding-001",
+        dimensions: int | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        batch_window: float = 0.0,
+        max_batch_size: int = 20,
+        search_mode: SearchMode = SearchMode.VECTOR,
+        mmr_lambda: float | None = None,
+        mmr_candidates: int = 20,
     ) -> None:
         """Initialize the RAG service.
 
@@ -36,6 +61,20 @@ class RagService:
             client: Google genai client instance contains credentials and endpoint interaction.
             timeout: Request timeout applied when the service instantiates a client.
             default_top_k: Default number of results returned from the vector database.
+            model: Embedding model name, also part of the embedding cache key.
+            dimensions: Output dimensionality requested from the model; vectors are
+                renormalized to unit length. ``None`` keeps the model's default.
+            embedding_cache: Optional cache consulted before calling the embedding API.
+            batch_window: Seconds to collect texts from concurrent callers into one
+                embedding request; 0 sends each call's texts immediately.
+            max_batch_size: Maximum number of texts per embedding request.
+            search_mode: ``hybrid`` fuses the vector ranking with a lexical
+                ranking of the query text in the vector store.
+            mmr_lambda: Enables Maximal Marginal Relevance: ``mmr_candidates``
+                matches are fetched with their embeddings and ``top_k`` of them
+                chosen, trading relevance (1.0) against diversity (0.0).
+                ``None`` returns the plain top-k.
+            mmr_candidates: Matches fetched per query before MMR selection.
         """
 
         if vector_service is None:
@@ -50,24 +89,66 @@ class RagService:
             msg = "default_top_k must be a positive integer."
             raise ValueError(msg)
 
+        if dimensions is not None and dimensions <= 0:
+            msg = "dimensions must be a positive integer."
+            raise ValueError(msg)
+
+        if mmr_lambda is not None and not 0.0 <= mmr_lambda <= 1.0:
+            msg = "mmr_lambda must be between 0 and 1."
+            raise ValueError(msg)
+
         self._client = client
         self._timeout = timeout
         self._default_top_k = default_top_k
         self._vector_service = vector_service
+        self._model = model
+        self._dimensions = dimensions
+        # Vectors of different lengths must not share cache entries.
+        self._cache_model = model if dimensions is None else f"{model}@{dimensions}"
+        self._embedding_cache = embedding_cache
+        self._search_mode = search_mode
+        self._mmr_lambda = mmr_lambda
+        self._mmr_candidates = mmr_candidates
+        self._batcher = (
+            EmbeddingBatcher(
+                self._embed, window=batch_window, max_batch=max_batch_size
+            )
+            if batch_window > 0
+            else None
+        )
 
     async def _post(
         self,
-        client: genai.client.AsyncClient,
+        client: genai.Client,
         payload: dict[str, Any]
     ) -> dict[str, Any]:
-        """Call google gen ai endpoint with client."""
-        embeddings: list[list[float]] = []
-        response = client.models.embed_content(
-                    model='gemini-embedding-001',
-                    contents=payload['text']
-                )
-        embeddings = embeddings + [e.values for e in response.embeddings]
-        result = {"embeddings" : embeddings[0]}
+        """Call google gen ai endpoint with client.
+
+        All ``payload["texts"]`` are embedded in a single request.
+        """
+        request: dict[str, Any] = {"model": self._model, "texts": payload["texts"]}
+        options: dict[str, Any] = {}
+        if self._dimensions is not None:
+            request["dimensions"] = self._dimensions
+            options["config"] = types.EmbedContentConfig(
+                output_dimensionality=self._dimensions
+            )
+
+        async def _call() -> dict[str, Any]:
+            response = await client.aio.models.embed_content(
+                model=self._model,
+                contents=payload["texts"],
+                **options,
+            )
+            return {"embeddings": [e.values for e in response.embeddings or []]}
+
+        try:
+            result = await asyncio.wait_for(
+                recorder.acall("embedding", request, _call), timeout=self._timeout
+            )
+        except TimeoutError as exc:
+            logger.error("Embedding request timed out after {}s", self._timeout)
+            raise RagServiceError("Embedding request timed out.") from exc
 
         #try:
         #    data = response.json()
@@ -82,14 +163,10 @@ class RagService:
 
         return result
 
-    async def calculate_embedding(self, text: str) -> list[float]:
-        """Generate an embedding for the supplied text using the external API."""
-
-        payload = {"text": text}
-        logger.debug("Requesting embedding for text of length {}", len(text))
-        data = await self._post(self._client, payload)
+    @staticmethod
+    def _to_vector(embedding: Any) -> np.ndarray:
+        """Validate one embedding returned by the external API as a float32 vector."""
 
-        embedding = data['embeddings']
         if embedding is None:
             msg = "Embedding response is missing the 'embedding' field."
             logger.error(msg)
@@ -101,27 +178,124 @@ class RagService:
             raise RagServiceError(msg)
 
         try:
-            vector = [float(value) for value in embedding]
+            vector = np.asarray(embedding, dtype=EMBEDDING_DTYPE)
         except (TypeError, ValueError) as exc:
             logger.exception("Embedding values are not numeric: {}", exc)
             raise RagServiceError("Embedding contains non-numeric values.") from exc
 
-        if not vector:
+        if vector.ndim != 1 or not vector.size:
             msg = "Embedding vector may not be empty."
             logger.error(msg)
             raise RagServiceError(msg)
 
+        if not np.isfinite(vector).all():
+            msg = "Embedding contains non-finite values."
+            logger.error(msg)
+            raise RagServiceError(msg)
+
         return vector
 
+    async def _embed(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed ``texts`` with one request to the external API."""
+
+        logger.debug("Requesting embeddings for {} texts", len(texts))
+        data = await self._post(self._client, {"texts": texts})
+
+        embeddings = data.get("embeddings")
+        if not isinstance(embeddings, list) or len(embeddings) != len(texts):
+            msg = "Embedding response does not contain one embedding per text."
+            logger.error(msg)
+            raise RagServiceError(msg)
+
+        vectors = [self._to_vector(embedding) for embedding in embeddings]
+        if self._dimensions is None:
+            return vectors
+        try:
+            return list(truncate_embeddings(np.stack(vectors), self._dimensions))
+        except ValueError as exc:
+            logger.error("Embeddings cannot be reduced: {}", exc)
+            raise RagServiceError("Embedding dimensionality mismatch.") from exc
+
+    async def calculate_embeddings(self, texts: Sequence[str]) -> list[np.ndarray]:
+        """Generate embeddings for ``texts``, calling the external API once for misses.
+
+        Cached embeddings are returned as read-only float32 views. With batching
+        enabled, misses share a request with those of concurrent callers.
+        """
+
+        if not texts:
+            return []
+
+        cache = self._embedding_cache
+        vectors: list[np.ndarray | None] = (
+            await cache.get_many(self._cache_model, texts)
+            if cache
+            else [None] * len(texts)
+        )
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return cast(list[np.ndarray], vectors)
+
+        missing_texts = [texts[index] for index in missing]
+        if self._batcher is not None:
+            computed = await self._batcher.embed(missing_texts)
+        else:
+            computed = await self._embed(missing_texts)
+
+        if cache:
+            computed = await cache.set_many(self._cache_model, missing_texts, computed)
+
+        for index, vector in zip(missing, computed, strict=True):
+            vectors[index] = vector
+        return cast(list[np.ndarray], vectors)
+
+    async def calculate_embedding(self, text: str) -> np.ndarray:
+        """Generate an embedding for the supplied text using the external API."""
+
+        logger.debug("Requesting embedding for text of length {}", len(text))
+        return (await self.calculate_embeddings([text]))[0]
+
+    def _fetch_limit(self, limit: int) -> tuple[int, bool]:
+        """Matches to fetch for ``limit`` results, and whether to apply MMR."""
+
+        if self._mmr_lambda is None:
+            return limit, False
+        return max(limit, self._mmr_candidates), True
+
+    def _diversify(
+        self,
+        embedding: Sequence[float],
+        results: Sequence[VectorSearchResult],
+        limit: int,
+    ) -> list[VectorSearchResult]:
+        """``limit`` of ``results`` chosen by MMR, in selection order."""
+
+        embeddings = [item.embedding for item in results if item.embedding is not None]
+        if (
+            self._mmr_lambda is None
+            or len(results) <= 1
+            or len(embeddings) < len(results)
+        ):
+            return list(results[:limit])
+        selected = timed_mmr(embedding, embeddings, limit, lambda_mult=self._mmr_lambda)
+        return [results[index] for index in selected]
+
     async def query_vector_database(
         self,
         embedding: Sequence[float],
         *,
         top_k: int | None = None,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        text: str | None = None,
     ) -> list[dict[str, Any]]:
-        """Query the vector database using the supplied embedding."""
+        """Query the vector database using the supplied embedding.
 
-        if not embedding:
+        In hybrid mode ``text`` is also ranked lexically and fused. With MMR
+        enabled a wider candidate set is diversified down to ``top_k``.
+        """
+
+        if embedding is None or len(embedding) == 0:
             msg = "An embedding vector is required to query the database."
             logger.error(msg)
             raise RagServiceError(msg)
@@ -134,14 +308,31 @@ class RagService:
 
         logger.debug("Querying vector database with top_k={}", limit)
 
+        fetch, diversify = self._fetch_limit(limit)
         try:
-            results = await self._vector_service.similarity_search(
-                embedding, limit=limit
-            )
+            if self._search_mode == SearchMode.HYBRID and text:
+                results = await self._vector_service.hybrid_search(
+                    embedding,
+                    text,
+                    limit=fetch,
+                    options=options,
+                    filters=filters,
+                    with_embedding=diversify,
+                )
+            else:
+                results = await self._vector_service.similarity_search(
+                    embedding,
+                    limit=fetch,
+                    options=options,
+                    filters=filters,
+                    with_embedding=diversify,
+                )
         except Exception as exc:  # pragma: no cover - service specific errors
             logger.exception("Vector database query failed: {}", exc)
             raise RagServiceError("Vector database query failed.") from exc
 
+        if diversify:
+            results = self._diversify(embedding, results, limit)
         formatted_results = [
             {"id": item.id, "score": item.score, "payload": item.payload}
             for item in results
@@ -149,8 +340,117 @@ class RagService:
 
         return formatted_results
 
-    async def run(self, text: str, *, top_k: int | None = None) -> list[dict[str, Any]]:
+    async def query_vector_database_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        top_k: int | None = None,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        texts: Sequence[str] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Query the top-k matches of every embedding in one database round trip.
+
+        In hybrid mode each embedding is paired with its text in ``texts``.
+        """
+
+        limit = top_k or self._default_top_k
+        if limit <= 0:
+            msg = "top_k must be a positive integer."
+            logger.error(msg)
+            raise RagServiceError(msg)
+
+        logger.debug(
+            "Querying vector database for {} embeddings with top_k={}",
+            len(embeddings),
+            limit,
+        )
+
+        fetch, diversify = self._fetch_limit(limit)
+        try:
+            if self._search_mode == SearchMode.HYBRID and texts:
+                results = await self._vector_service.hybrid_search_many(
+                    embeddings,
+                    texts,
+                    limit=fetch,
+                    options=options,
+                    filters=filters,
+                    with_embedding=diversify,
+                )
+            else:
+                results = await self._vector_service.similarity_search_many(
+                    embeddings,
+                    limit=fetch,
+                    options=options,
+                    filters=filters,
+                    with_embedding=diversify,
+                )
+        except Exception as exc:  # pragma: no cover - service specific errors
+            logger.exception("Vector database query failed: {}", exc)
+            raise RagServiceError("Vector database query failed.") from exc
+
+        if diversify:
+            results = [
+                self._diversify(embedding, matches, limit)
+                for embedding, matches in zip(embeddings, results, strict=True)
+            ]
+
+        return [
+            [
+                {"id": item.id, "score": item.score, "payload": item.payload}
+                for item in matches
+            ]
+            for matches in results
+        ]
+
+    @staticmethod
+    def merge_results(
+        per_query: Sequence[Sequence[dict[str, Any]]],
+    ) -> list[dict[str, Any]]:
+        """De-duplicate hits across queries, keeping each document's best score.
+
+        Scores are cosine distances (negated fusion scores in hybrid mode), so
+        lower is better; the merged list is ordered by score.
+        """
+
+        best: dict[str, dict[str, Any]] = {}
+        for matches in per_query:
+            for match in matches:
+                current = best.get(match["id"])
+                if current is None or match["score"] < current["score"]:
+                    best[match["id"]] = match
+        return sorted(best.values(), key=lambda match: match["score"])
+
+    async def run_many(
+        self,
+        texts: Sequence[str],
+        *,
+        top_k: int | None = None,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[dict[str, Any]]:
+        """Embed ``texts`` in one call, search them in one query, merge the hits."""
+
+        # Vector stores read float32 arrays directly; no conversion to lists.
+        embeddings = cast(
+            list[Sequence[float]], await self.calculate_embeddings(texts)
+        )
+        per_query = await self.query_vector_database_many(
+            embeddings, top_k=top_k, options=options, filters=filters, texts=texts
+        )
+        return self.merge_results(per_query)
+
+    async def run(
+        self,
+        text: str,
+        *,
+        top_k: int | None = None,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+    ) -> list[dict[str, Any]]:
         """Execute the RAG pipeline: embed the text and query the vector database."""
 
-        embedding = await self.calculate_embedding(text)
-        return await self.query_vector_database(embedding, top_k=top_k)
\ No newline at end of file
+        embedding = cast(Sequence[float], await self.calculate_embedding(text))
+        return await self.query_vector_database(
+            embedding, top_k=top_k, options=options, filters=filters, text=text
+        )
\ No newline at end of file
@@ -0,0 +1 @@
+"""Benchmark scripts for the retrieval and generation pipeline."""
@@ -0,0 +1,91 @@
+"""Benchmark the full ``/ask`` LangGraph pipeline.
+
+Run once with ``REPLAY_MODE=record`` against the live backends to capture
+cassettes, then with ``REPLAY_MODE=replay`` to benchmark offline:
+
+    REPLAY_MODE=record python -m benchmarks.ask_pipeline --questions q.txt
+    REPLAY_MODE=replay python -m benchmarks.ask_pipeline --questions q.txt -c 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from langchain_core.messages import HumanMessage
+from loguru import logger
+
+from app.core.config import settings
+from app.workflows.graphs.rag import RagAgentGraph
+
+from .common import load_questions, summarize
+
+DEFAULT_QUESTIONS = (
+    "อริยสัจ ๔ มีอะไรบ้าง",
+    "What does the Vinaya say about monks handling money?",
+    "พระพุทธเจ้าแสดงปฐมเทศนาที่ไหน",
+)
+
+
+def _initial_state(question: str) -> dict[str, Any]:
+    return {
+        "question": HumanMessage(content=question),
+        "refined_question": "",
+        "refined_questions": [],
+        "require_enhancement": False,
+        "require_tripitika": False,
+        "search_results": [],
+        "messages": [HumanMessage(content=question)],
+    }
+
+
+async def _run(questions: list[str], concurrency: int, repeat: int) -> None:
+    graph = RagAgentGraph().compile()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async def _ask(question: str) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await graph.ainvoke(
+                    _initial_state(question),
+                    config={"configurable": {"thread_id": str(uuid.uuid4())}},
+                )
+            except Exception as exc:
+                failures += 1
+                logger.error("Pipeline run failed for '{}': {}", question, exc)
+                return
+            latencies.append(time.perf_counter() - started)
+
+    workload = [question for _ in range(repeat) for question in questions]
+    started = time.perf_counter()
+    await asyncio.gather(*(_ask(question) for question in workload))
+    wall_time = time.perf_counter() - started
+
+    label = f"ask[{settings.REPLAY_MODE.value}] c={concurrency}"
+    print(summarize(label, latencies, wall_time))
+    if failures:
+        print(f"failures={failures}")
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", help="File with one question per line.")
+    parser.add_argument("-c", "--concurrency", type=int, default=1)
+    parser.add_argument("-n", "--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions, DEFAULT_QUESTIONS)
+    asyncio.run(_run(questions, args.concurrency, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
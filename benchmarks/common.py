@@ -0,0 +1,57 @@
+"""Shared helpers for benchmark scripts."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(label: str, latencies: Sequence[float], wall_time: float) -> str:
+    """Format latency percentiles (in ms) and throughput for one run."""
+
+    count = len(latencies)
+    throughput = count / wall_time if wall_time > 0 else math.nan
+    return (
+        f"{label:<28} n={count:<5} "
+        f"p50={percentile(latencies, 50) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms "
+        f"throughput={throughput:8.2f}/s"
+    )
+
+
+def recall_at_k(
+    retrieved: Sequence[Sequence[Any]], relevant: Sequence[Sequence[Any]]
+) -> float:
+    """Mean fraction of each query's reference top-k found in ``retrieved``."""
+
+    scores = [
+        len(set(found) & set(expected)) / len(expected)
+        for found, expected in zip(retrieved, relevant, strict=True)
+        if expected
+    ]
+    return sum(scores) / len(scores) if scores else math.nan
+
+
+def load_questions(path: str | None, default: Sequence[str]) -> list[str]:
+    """Read one question per line from ``path``, or fall back to ``default``."""
+
+    if path is None:
+        return list(default)
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+__all__ = ["load_questions", "percentile", "recall_at_k", "summarize"]
@@ -0,0 +1,158 @@
+"""Measure recall@k and search latency of reduced-dimension embeddings.
+
+The stored full-precision vectors are the baseline. For every candidate
+``storage(dimensions)`` a temporary copy of the table is built with truncated,
+renormalized vectors; each query is embedded once at full length, truncated
+the same way, and searched exactly (no ANN index) against both:
+
+    python -m benchmarks.embedding_dimensions --dimensions 1536 768 256 -k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from google import genai
+from loguru import logger
+from sqlalchemy import Integer, TableClause, column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.enums import VectorStorage
+from app.database.session import async_session_factory, engine
+from app.services.embeddings import truncate_embeddings
+from app.services.vectorstores.pgvector.models import PgVectorDocument, embedding_type
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.services.vectorstores.pgvector.service import PgVectorService
+from app.workflows.pipelines import RagService
+
+from .common import load_questions, percentile, recall_at_k
+from .rag_retrieval import DEFAULT_QUERIES
+
+
+async def _search(
+    conn: AsyncConnection,
+    target: TableClause,
+    queries: np.ndarray,
+    k: int,
+    repeat: int,
+) -> tuple[list[list[int]], list[float]]:
+    ids: list[list[int]] = []
+    latencies: list[float] = []
+    for query in queries:
+        distance = target.c.embedding.cosine_distance(query.tolist())
+        stmt = select(target.c.id).order_by(distance).limit(k)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = (await conn.execute(stmt)).scalars().all()
+            latencies.append(time.perf_counter() - started)
+        ids.append(list(rows))
+    return ids, latencies
+
+
+def _report(label: str, recall: float, latencies: list[float], size: int) -> None:
+    print(
+        f"{label:<16} recall={recall:6.3f} "
+        f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.2f}ms "
+        f"size={size / 2**20:8.1f}MB"
+    )
+
+
+async def _run(
+    questions: list[str],
+    dimensions: list[int],
+    storages: list[VectorStorage],
+    k: int,
+    repeat: int,
+) -> None:
+    client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+    service = RagService(
+        vector_service=PgVectorService(PgVectorRepository(async_session_factory)),
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+    )
+    try:
+        queries = np.stack(await service.calculate_embeddings(questions))
+        logger.info("Embedded {} queries at {} dimensions", *queries.shape)
+
+        async with engine.connect() as conn:
+            # Exact scans everywhere, so recall reflects dimensionality alone.
+            await conn.execute(text("SET enable_indexscan = off"))
+            baseline_table = PgVectorDocument.__table__
+            baseline, latencies = await _search(
+                conn, baseline_table, queries, k, repeat
+            )
+            size = await conn.scalar(
+                text("SELECT pg_total_relation_size(:name)"),
+                {"name": baseline_table.name},
+            )
+            _report(f"baseline({queries.shape[1]})", 1.0, latencies, size)
+
+            for storage in storages:
+                for dims in dimensions:
+                    name = f"eval_{storage.value}_{dims}"
+                    column_type = f"{storage.value}({dims})"
+                    await conn.execute(
+                        text(
+                            f"CREATE TEMP TABLE {name} AS "
+                            f"SELECT id, l2_normalize(subvector(embedding::vector, 1, "
+                            f"{dims}))::{column_type} AS embedding "
+                            f"FROM {baseline_table.name}"
+                        )
+                    )
+                    candidate = table(
+                        name,
+                        column("id", Integer),
+                        column("embedding", embedding_type(storage, dims)),
+                    )
+                    ids, latencies = await _search(
+                        conn,
+                        candidate,
+                        truncate_embeddings(queries, dims),
+                        k,
+                        repeat,
+                    )
+                    size = await conn.scalar(
+                        text("SELECT pg_total_relation_size(:name)"), {"name": name}
+                    )
+                    _report(column_type, recall_at_k(ids, baseline), latencies, size)
+                    await conn.execute(text(f"DROP TABLE {name}"))
+    finally:
+        await client.aio.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the evaluation."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument(
+        "--dimensions", type=int, nargs="+", default=[1536, 768, 512, 256]
+    )
+    parser.add_argument(
+        "--storage",
+        type=VectorStorage,
+        nargs="+",
+        choices=list(VectorStorage),
+        default=list(VectorStorage),
+    )
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3, help="Timed runs per query."
+    )
+    args = parser.parse_args()
+
+    questions = load_questions(args.queries, DEFAULT_QUERIES)
+    asyncio.run(_run(questions, args.dimensions, args.storage, args.k, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
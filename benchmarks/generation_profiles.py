@@ -0,0 +1,164 @@
+"""Compare generation profiles on recorded prompts.
+
+Replays the prompts captured in the ``gemini`` cassette (see
+``docs/benchmarking.md``) against the live Vertex endpoint once per profile,
+and reports latency, token counts and how closely the output matches the
+recorded baseline answer:
+
+    python -m benchmarks.generation_profiles --node question_rewriter \\
+        --profiles profiles.json -n 3
+
+``profiles.json`` maps a profile name to overrides of the node's profile, e.g.
+``{"no-thinking": {"thinking_budget": 0}, "t512": {"thinking_budget": 512}}``.
+The node's current profile always runs as ``current``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from google.genai.types import Content, GenerateContentConfig
+
+from app.core.config import settings
+from app.core.enums import ReplayMode
+from app.services.llm import TokenUsage
+from app.services.recording import recorder
+from app.workflows.graphs.rag.components.vertex_gemini_client import (
+    VertexGeminiClient,
+)
+from app.workflows.graphs.rag.profiles import GenerationProfile, get_generation_profile
+
+from .common import percentile
+
+# Config keys that belong to the prompt (structured output) rather than the profile.
+_PROMPT_CONFIG_KEYS = ("response_mime_type", "response_schema")
+
+
+@dataclass
+class ProfileResult:
+    """Measurements collected for one profile."""
+
+    latencies: list[float] = field(default_factory=list)
+    similarities: list[float] = field(default_factory=list)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+
+def similarity(baseline: str, candidate: str) -> float:
+    """Score ``candidate`` against ``baseline`` in [0, 1].
+
+    Structured (JSON object) outputs are compared field by field, so a routing
+    decision that flips counts fully; free text uses a sequence ratio.
+    """
+
+    try:
+        expected, actual = json.loads(baseline), json.loads(candidate)
+    except ValueError:
+        return difflib.SequenceMatcher(None, baseline, candidate).ratio()
+
+    if not isinstance(expected, dict) or not isinstance(actual, dict) or not expected:
+        return float(expected == actual)
+    matches = sum(bool(actual.get(key) == value) for key, value in expected.items())
+    return matches / len(expected)
+
+
+def load_prompts(node: str) -> list[dict[str, Any]]:
+    """Recorded ``gemini`` interactions made by ``node``."""
+
+    cassette = recorder.cassette("gemini")
+    if not cassette.path.exists():
+        raise SystemExit(f"No recorded prompts found at {cassette.path}.")
+
+    prompts = []
+    with cassette.path.open(encoding="utf-8") as handle:
+        for line in handle:
+            entry = json.loads(line)
+            if entry["request"].get("node") == node:
+                prompts.append(entry)
+    return prompts
+
+
+def run_profile(
+    profile: GenerationProfile, node: str, prompts: list[dict[str, Any]], repeat: int
+) -> ProfileResult:
+    """Run every recorded prompt ``repeat`` times with ``profile``."""
+
+    client = VertexGeminiClient.from_profile(profile, node=node)
+    result = ProfileResult()
+
+    for entry in prompts:
+        request = entry["request"]
+        contents = [Content.model_validate(content) for content in request["contents"]]
+        prompt_config = {
+            key: request["config"][key]
+            for key in _PROMPT_CONFIG_KEYS
+            if key in request["config"]
+        }
+        config = GenerateContentConfig.model_validate(
+            {
+                **client._build_config().model_dump(exclude_none=True),
+                **prompt_config,
+            }
+        )
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client._client.models.generate_content(
+                model=profile.model, contents=contents, config=config
+            )
+            result.latencies.append(time.perf_counter() - started)
+            result.usage.add(TokenUsage.from_gemini(response.usage_metadata))
+            result.similarities.append(
+                similarity(entry["response"]["text"], response.text or "")
+            )
+
+    return result
+
+
+def main() -> None:
+    """Parse arguments and compare the profiles."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--node", required=True, help="Graph node, e.g. question_rewriter")
+    parser.add_argument("--profiles", help="JSON file of named profile overrides.")
+    parser.add_argument("-n", "--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    if settings.REPLAY_MODE == ReplayMode.REPLAY:
+        raise SystemExit("Profiles must be measured live; unset REPLAY_MODE=replay.")
+
+    current = get_generation_profile(args.node)
+    profiles = {"current": current}
+    if args.profiles:
+        overrides = json.loads(Path(args.profiles).read_text(encoding="utf-8"))
+        for name, update in overrides.items():
+            profiles[name] = GenerationProfile.model_validate(
+                {**current.model_dump(), **update}
+            )
+
+    prompts = load_prompts(args.node)
+    print(f"{len(prompts)} recorded prompts for node '{args.node}'")
+
+    baseline_p50: float | None = None
+    for name, profile in profiles.items():
+        result = run_profile(profile, args.node, prompts, args.repeat)
+        calls = max(result.usage.calls, 1)
+        p50 = percentile(result.latencies, 50)
+        baseline_p50 = p50 if baseline_p50 is None else baseline_p50
+        print(
+            f"{name:<16} "
+            f"p50={p50 * 1000:8.1f}ms ({(p50 - baseline_p50) * 1000:+8.1f}) "
+            f"p95={percentile(result.latencies, 95) * 1000:8.1f}ms "
+            f"out={result.usage.output_tokens / calls:7.1f} "
+            f"thinking={result.usage.thinking_tokens / calls:7.1f} "
+            f"similarity={sum(result.similarities) / max(len(result.similarities), 1):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
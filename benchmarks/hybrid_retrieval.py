@@ -0,0 +1,111 @@
+"""Compare recall@k and latency of vector-only and hybrid retrieval.
+
+Reads a labelled question set, one JSON object per line with the question and
+the ids of the pages that answer it:
+
+    {"question": "อริยสัจ ๔ มีอะไรบ้าง", "relevant": [10234, 10235]}
+
+Each question is embedded once and searched in both modes with the same k:
+
+    python -m benchmarks.hybrid_retrieval questions.jsonl -k 5 -n 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from google import genai
+from loguru import logger
+
+from app.core.config import settings
+from app.database.session import async_session_factory, engine
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.services.vectorstores.pgvector.service import PgVectorService
+from app.workflows.pipelines import RagService
+
+from .common import percentile, recall_at_k
+
+
+def load_labelled(path: str) -> tuple[list[str], list[list[int]]]:
+    """Questions and their relevant page ids from a JSON-lines file."""
+
+    questions: list[str] = []
+    relevant: list[list[int]] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            item = json.loads(line)
+            questions.append(item["question"])
+            relevant.append([int(page_id) for page_id in item["relevant"]])
+    return questions, relevant
+
+
+def _report(label: str, recall: float, latencies: list[float]) -> None:
+    print(
+        f"{label:<8} recall={recall:6.3f} "
+        f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.2f}ms"
+    )
+
+
+async def _run(path: str, k: int, repeat: int) -> None:
+    questions, relevant = load_labelled(path)
+    client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+    repository = PgVectorRepository(
+        async_session_factory,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+        hybrid_candidates=settings.RAG_HYBRID_CANDIDATES,
+        rrf_k=settings.RAG_HYBRID_RRF_K,
+        trigram_threshold=settings.RAG_HYBRID_TRIGRAM_THRESHOLD,
+    )
+    service = RagService(
+        vector_service=PgVectorService(repository),
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+    )
+    try:
+        embeddings = await service.calculate_embeddings(questions)
+        logger.info("Embedded {} labelled questions", len(embeddings))
+
+        modes = {
+            "vector": lambda e, q: repository.similarity_search(e, limit=k),
+            "hybrid": lambda e, q: repository.hybrid_search(e, q, limit=k),
+        }
+        for label, search in modes.items():
+            found: list[list[int]] = []
+            latencies: list[float] = []
+            for embedding, question in zip(embeddings, questions, strict=True):
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    hits = await search(embedding, question)
+                    latencies.append(time.perf_counter() - started)
+                found.append([hit.id for hit in hits])
+            _report(label, recall_at_k(found, relevant), latencies)
+    finally:
+        await client.aio.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the comparison."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("questions", help="JSON-lines file of labelled questions.")
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3, help="Timed runs per question."
+    )
+    args = parser.parse_args()
+    asyncio.run(_run(args.questions, args.k, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Minimal OpenAI-compatible chat server for CPU-only load tests.
+
+Implements ``POST /v1/chat/completions`` (plain, streamed and
+``response_format={"type": "json_schema"}``) with a configurable time to
+first token and token rate, so the graph can be load-tested with
+``USE_LOCAL_MODEL=true`` and no GPU or Vertex access:
+
+    python -m benchmarks.local_model_stub --port 1234 --ttft-ms 150 \\
+        --true-field require_tripitika
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Local model stub")
+
+_OPTIONS: dict[str, Any] = {
+    "ttft_ms": 100.0,
+    "tokens_per_second": 200.0,
+    "reply_tokens": 64,
+    "true_fields": set(),
+}
+
+
+def instance_from_schema(
+    schema: dict[str, Any], defs: dict[str, Any] | None = None, name: str = ""
+) -> Any:
+    """Build a value that validates against a (strict) JSON schema."""
+
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return instance_from_schema(defs[schema["$ref"].split("/")[-1]], defs, name)
+    if "anyOf" in schema:
+        return instance_from_schema(schema["anyOf"][0], defs, name)
+
+    schema_type = schema.get("type", "string")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+
+    if schema_type == "object":
+        return {
+            key: instance_from_schema(value, defs, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        count = max(schema.get("minItems", 2), 1)
+        return [
+            instance_from_schema(schema.get("items", {}), defs, f"{name} {i + 1}")
+            for i in range(count)
+        ]
+    if schema_type == "boolean":
+        return name in _OPTIONS["true_fields"]
+    if schema_type in ("integer", "number"):
+        return 0
+    if schema_type == "null":
+        return None
+    return f"stub {name}".strip()
+
+
+def _reply_text(body: dict[str, Any]) -> str:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        return json.dumps(instance_from_schema(schema), ensure_ascii=False)
+    return " ".join(f"token{i}" for i in range(_OPTIONS["reply_tokens"]))
+
+
+def _usage(body: dict[str, Any], text: str) -> dict[str, int]:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body["messages"])
+    completion_tokens = len(text.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Any:
+    """OpenAI ``chat.completions`` endpoint."""
+
+    body = await request.json()
+    text = _reply_text(body)
+    words = text.split(" ")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", "local-model")
+    per_token = 1 / _OPTIONS["tokens_per_second"]
+
+    await asyncio.sleep(_OPTIONS["ttft_ms"] / 1000)
+
+    if not body.get("stream"):
+        await asyncio.sleep(per_token * len(words))
+        return JSONResponse(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": _usage(body, text),
+            }
+        )
+
+    async def stream() -> AsyncGenerator[str]:
+        def frame(delta: dict[str, Any], finish: str | None = None) -> str:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+        yield frame({"role": "assistant", "content": ""})
+        for index, word in enumerate(words):
+            yield frame({"content": word if index == 0 else f" {word}"})
+            await asyncio.sleep(per_token)
+        yield frame({}, finish="stop")
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": _usage(body, text),
+            }
+            yield f"data: {json.dumps(usage_chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/v1/models")
+async def models() -> dict[str, Any]:
+    """List the single stub model."""
+    return {"object": "list", "data": [{"id": "local-model", "object": "model"}]}
+
+
+def main() -> None:
+    """Parse arguments and serve the stub."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--ttft-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--reply-tokens", type=int, default=64)
+    parser.add_argument(
+        "--true-field",
+        action="append",
+        default=[],
+        help="Boolean schema field answered with true (e.g. require_tripitika).",
+    )
+    args = parser.parse_args()
+
+    _OPTIONS.update(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        true_fields=set(args.true_field),
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
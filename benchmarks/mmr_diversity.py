@@ -0,0 +1,125 @@
+"""Measure the latency MMR adds and how much redundancy it removes.
+
+Runs offline against an exported store (``--memory``), or against random
+clustered vectors with ``--synthetic ROWS``; queries are corpus rows with
+added noise. For each candidate-set size the top-k by similarity and the
+MMR selection are compared by mean similarity to the query (relevance) and
+mean pairwise similarity of the selected pages (redundancy):
+
+    python -m benchmarks.mmr_diversity --memory vector_store -k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings import EMBEDDING_DTYPE, normalize_rows, timed_mmr
+from app.services.vectorstores.memory import NumpyVectorService
+
+from .common import percentile
+from .quantized_index import synthetic_store
+
+
+def _quality(query: np.ndarray, vectors: np.ndarray) -> tuple[float, float]:
+    relevance = float(np.mean(vectors @ query))
+    pairs = vectors @ vectors.T
+    upper = pairs[np.triu_indices(len(vectors), k=1)]
+    return relevance, float(np.mean(upper)) if len(upper) else 0.0
+
+
+async def _run(
+    store: NumpyVectorService,
+    *,
+    k: int,
+    queries: int,
+    noise: float,
+    candidates: Sequence[int],
+    lambda_mult: float,
+) -> None:
+    matrix = store._embeddings
+    rng = np.random.default_rng(1)
+    picked = rng.choice(len(matrix), size=min(queries, len(matrix)), replace=False)
+    vectors = np.asarray(matrix[np.sort(picked)])
+    vectors = normalize_rows(vectors + noise * rng.standard_normal(vectors.shape))
+
+    for fetch in candidates:
+        rows = await store.similarity_search_many(
+            vectors.tolist(), limit=max(fetch, k), with_embedding=True
+        )
+        latencies: list[float] = []
+        plain: list[tuple[float, float]] = []
+        diverse: list[tuple[float, float]] = []
+        for query, hits in zip(vectors, rows, strict=True):
+            blobs = [hit.embedding for hit in hits if hit.embedding is not None]
+            started = time.perf_counter()
+            selected = timed_mmr(query, blobs, k, lambda_mult=lambda_mult)
+            latencies.append(time.perf_counter() - started)
+            embeddings = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE)
+            embeddings = embeddings.reshape(len(blobs), -1)
+            plain.append(_quality(query, embeddings[:k]))
+            diverse.append(_quality(query, embeddings[selected]))
+        top_relevance, top_redundancy = np.mean(plain, axis=0)
+        mmr_relevance, mmr_redundancy = np.mean(diverse, axis=0)
+        print(
+            f"candidates={fetch:<4} "
+            f"mmr p50={percentile(latencies, 50) * 1000:7.3f}ms "
+            f"p95={percentile(latencies, 95) * 1000:7.3f}ms  "
+            f"relevance {top_relevance:.3f} -> {mmr_relevance:.3f}  "
+            f"redundancy {top_redundancy:.3f} -> {mmr_redundancy:.3f}"
+        )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--memory", type=Path, help="Exported store directory.")
+    source.add_argument(
+        "--synthetic", type=int, metavar="ROWS", help="Random clustered vectors."
+    )
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument("-q", "--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument(
+        "--candidates", type=int, nargs="+", default=[10, 20, 50, 100]
+    )
+    parser.add_argument(
+        "--lambda",
+        dest="lambda_mult",
+        type=float,
+        default=settings.RAG_MMR_LAMBDA or 0.5,
+        help="Relevance weight (1.0) against diversity (0.0).",
+    )
+    args = parser.parse_args()
+
+    if args.synthetic:
+        store = synthetic_store(args.synthetic, args.dimensions)
+    else:
+        store = NumpyVectorService.load(
+            args.memory or Path(settings.VECTOR_MEMORY_PATH), mmap=False
+        )
+    asyncio.run(
+        _run(
+            store,
+            k=args.k,
+            queries=args.queries,
+            noise=args.noise,
+            candidates=args.candidates,
+            lambda_mult=args.lambda_mult,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Measure recall@k, latency and memory of the quantized IVF index.
+
+Runs offline against an exported store (``--memory``), or against random
+clustered vectors with ``--synthetic ROWS``. Queries are corpus rows with
+added noise, so no embedding API is needed. Every code type is built once
+and searched at each ``--nprobe`` and ``--rescore`` depth; exact search
+over the full matrix is the recall reference:
+
+    python -m benchmarks.quantized_index --memory vector_store -k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.enums import QuantizedCodes
+from app.services.embeddings import normalize_rows
+from app.services.vectorstores.memory import (
+    IvfIndex,
+    IvfVectorService,
+    NumpyVectorService,
+)
+
+from .common import percentile, recall_at_k
+
+
+def synthetic_store(
+    rows: int, dimensions: int, *, clusters: int = 64, seed: int = 0
+) -> NumpyVectorService:
+    """Store of ``rows`` unit vectors drawn around ``clusters`` random centres."""
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dimensions))
+    labels = rng.integers(clusters, size=rows)
+    vectors = centres[labels] + 0.5 * rng.standard_normal((rows, dimensions))
+    return NumpyVectorService(
+        ids=np.arange(1, rows + 1, dtype=np.int64),
+        embeddings=normalize_rows(vectors),
+        books=np.full(rows, -1, dtype=np.int32),
+        pages=np.full(rows, -1, dtype=np.int32),
+        payloads=[{}] * rows,
+    )
+
+
+async def _measure(
+    store: NumpyVectorService, queries: np.ndarray, k: int
+) -> tuple[list[list[str]], list[float]]:
+    found: list[list[str]] = []
+    latencies: list[float] = []
+    await store.similarity_search(queries[0], limit=k)
+    for query in queries:
+        started = time.perf_counter()
+        hits = await store.similarity_search(query, limit=k)
+        latencies.append(time.perf_counter() - started)
+        found.append([hit.id for hit in hits])
+    return found, latencies
+
+
+def _report(label: str, latencies: list[float], recall: float, memory: int) -> None:
+    print(
+        f"{label:<22} "
+        f"p50={percentile(latencies, 50) * 1000:8.3f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.3f}ms "
+        f"recall={recall:6.3f} memory={memory / 2**20:8.1f}MiB"
+    )
+
+
+async def _run(
+    store: NumpyVectorService,
+    *,
+    k: int,
+    queries: int,
+    noise: float,
+    nprobes: Sequence[int],
+    lists: int | None,
+    rescores: Sequence[int],
+) -> None:
+    matrix = store._embeddings
+    rng = np.random.default_rng(1)
+    picked = rng.choice(len(matrix), size=min(queries, len(matrix)), replace=False)
+    vectors = np.asarray(matrix[np.sort(picked)])
+    vectors = normalize_rows(vectors + noise * rng.standard_normal(vectors.shape))
+
+    reference, latencies = await _measure(store, vectors, k)
+    _report("exact", latencies, 1.0, matrix.nbytes)
+
+    for kind in QuantizedCodes:
+        started = time.perf_counter()
+        index = IvfIndex.build(matrix, lists=lists, kind=kind)
+        print(
+            f"{kind.value}: {index.lists} lists built in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        ivf = IvfVectorService(
+            index=index,
+            ids=store._ids,
+            embeddings=matrix,
+            books=store._books,
+            pages=store._pages,
+            payloads=store._payloads,
+        )
+        for rescore in rescores:
+            for nprobe in nprobes:
+                ivf._nprobe, ivf._rescore = nprobe, rescore
+                found, latencies = await _measure(ivf, vectors, k)
+                _report(
+                    f"{kind.value} nprobe={nprobe} x{rescore}",
+                    latencies,
+                    recall_at_k(found, reference),
+                    index.nbytes,
+                )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--memory", type=Path, help="Exported store directory.")
+    source.add_argument(
+        "--synthetic", type=int, metavar="ROWS", help="Random clustered vectors."
+    )
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument("-q", "--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument(
+        "--rescore",
+        type=int,
+        nargs="+",
+        default=[settings.VECTOR_IVF_RESCORE, 16],
+        help="Shortlist sizes, as multiples of k, rescored exactly.",
+    )
+    args = parser.parse_args()
+
+    if args.synthetic:
+        store = synthetic_store(args.synthetic, args.dimensions)
+    else:
+        store = NumpyVectorService.load(
+            args.memory or Path(settings.VECTOR_MEMORY_PATH), mmap=False
+        )
+    asyncio.run(
+        _run(
+            store,
+            k=args.k,
+            queries=args.queries,
+            noise=args.noise,
+            nprobes=args.nprobe,
+            lists=args.lists,
+            rescores=args.rescore,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark RAG retrieval throughput at several concurrency levels.
+
+Each level issues ``-n`` retrievals per concurrent worker through the tool's
+async path on a single event loop, the way the ``retrieval`` node runs:
+
+    REPLAY_MODE=replay python -m benchmarks.rag_retrieval --levels 1 10 50 -n 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from loguru import logger
+
+from app.core.config import settings
+from app.database.session import engine
+from app.workflows.graphs.rag.tools import RAG_TOOL
+
+from .common import load_questions, summarize
+
+DEFAULT_QUERIES = (
+    "อริยสัจ ๔",
+    "ปฐมเทศนา ธัมมจักกัปปวัตตนสูตร",
+    "ภิกษุรับเงินทอง วินัย",
+    "สติปัฏฐาน ๔",
+)
+
+
+async def _level(queries: list[str], concurrency: int, repeat: int) -> None:
+    latencies: list[float] = []
+    failures = 0
+
+    async def _worker(offset: int) -> None:
+        nonlocal failures
+        for i in range(repeat):
+            query = queries[(offset + i) % len(queries)]
+            started = time.perf_counter()
+            result = await RAG_TOOL.ainvoke({"query": query})
+            if result.get("error"):
+                failures += 1
+                logger.error("Retrieval failed for '{}': {}", query, result["error"])
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(offset) for offset in range(concurrency)))
+    wall_time = time.perf_counter() - started
+
+    print(summarize(f"rag[{settings.REPLAY_MODE.value}] c={concurrency}", latencies, wall_time))
+    if failures:
+        print(f"failures={failures}")
+
+
+async def _run(queries: list[str], levels: list[int], repeat: int) -> None:
+    try:
+        for concurrency in levels:
+            await _level(queries, concurrency, repeat)
+    finally:
+        await RAG_TOOL.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("-n", "--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = load_questions(args.queries, DEFAULT_QUERIES)
+    asyncio.run(_run(queries, args.levels, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
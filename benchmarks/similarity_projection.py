@@ -0,0 +1,132 @@
+"""Compare wire bytes and latency of similarity search query shapes.
+
+``entity`` is the former query loading whole ``PgVectorDocument`` rows,
+embedding included; ``projection`` is the repository's query selecting only
+id, payload and score; ``projection+embedding`` adds the binary-encoded
+vector. Bytes are the server's serialized result size (``EXPLAIN (ANALYZE,
+SERIALIZE)``, PostgreSQL 17+); latency includes ORM/type processing:
+
+    python -m benchmarks.similarity_projection -k 5 -n 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from google import genai
+from loguru import logger
+from sqlalchemy import Select, select, text
+
+from app.core.config import settings
+from app.database.session import async_session_factory, engine
+from app.services.vectorstores.pgvector.models import PgVectorDocument
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.services.vectorstores.pgvector.service import PgVectorService
+from app.workflows.pipelines import RagService
+
+from .common import load_questions, percentile
+from .rag_retrieval import DEFAULT_QUERIES
+
+
+def _entity_query(embedding: Sequence[float], limit: int) -> Select[Any]:
+    distance = PgVectorDocument.embedding.cosine_distance(list(embedding))
+    return (
+        select(PgVectorDocument, distance.label("score"))
+        .order_by(distance)
+        .limit(limit)
+    )
+
+
+async def _serialized_bytes(stmt: Select[Any]) -> int:
+    sql = stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    async with engine.connect() as conn:
+        plan = await conn.scalar(
+            text(f"EXPLAIN (ANALYZE, SERIALIZE TEXT, FORMAT JSON) {sql}")
+        )
+    return int(plan[0]["Serialization"]["Output Volume"] * 1024)
+
+
+async def _measure(
+    label: str,
+    build: Callable[[Sequence[float]], Select[Any]],
+    queries: Sequence[Sequence[float]],
+    repeat: int,
+) -> None:
+    latencies: list[float] = []
+    volume = 0
+    for query in queries:
+        stmt = build(query)
+        volume += await _serialized_bytes(stmt)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            async with async_session_factory() as session:
+                (await session.execute(stmt)).all()
+            latencies.append(time.perf_counter() - started)
+    print(
+        f"{label:<24} bytes/query={volume / len(queries):10.0f} "
+        f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.2f}ms"
+    )
+
+
+async def _run(questions: list[str], k: int, repeat: int) -> None:
+    client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+    repository = PgVectorRepository(
+        async_session_factory,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+    )
+    service = RagService(
+        vector_service=PgVectorService(repository),
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+    )
+    try:
+        queries = await service.calculate_embeddings(questions)
+        logger.info("Embedded {} queries", len(queries))
+
+        await _measure("entity", lambda q: _entity_query(q, k), queries, repeat)
+        await _measure(
+            "projection",
+            lambda q: repository._build_similarity_query(q, limit=k),
+            queries,
+            repeat,
+        )
+        await _measure(
+            "projection+embedding",
+            lambda q: repository._build_similarity_query(
+                q, limit=k, with_embedding=True
+            ),
+            queries,
+            repeat,
+        )
+    finally:
+        await client.aio.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=10, help="Timed runs per query."
+    )
+    args = parser.parse_args()
+
+    questions = load_questions(args.queries, DEFAULT_QUERIES)
+    asyncio.run(_run(questions, args.k, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Compare per-query CPU time and latency of the vector store backends.
+
+Queries are embedded once, then searched one at a time through each backend
+with the same ``k``. CPU time is the client process's (``process_time``), so
+for the Postgres backends it measures statement compilation and row handling,
+not the server's work. When an exported store exists at ``--memory`` the
+in-process NumPy backend is included, and since its search is exact it also
+serves as the reference for every backend's recall:
+
+    python -m benchmarks.vector_backends -k 5 -n 20 --memory vector_store
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from google import genai
+from loguru import logger
+
+from app.core.config import settings
+from app.database.session import async_session_factory, asyncpg_dsn, engine
+from app.services.vectorstores.memory import NumpyVectorService
+from app.services.vectorstores.pgvector.asyncpg_service import AsyncpgVectorService
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.services.vectorstores.pgvector.service import PgVectorService
+from app.workflows.pipelines import RagService
+
+from .common import load_questions, percentile, recall_at_k
+from .rag_retrieval import DEFAULT_QUERIES
+
+Search = Callable[[Sequence[float]], Awaitable[Any]]
+
+
+async def _measure(
+    search: Search, queries: Sequence[Sequence[float]], repeat: int
+) -> tuple[list[list[str]], list[float], list[float]]:
+    await search(queries[0])  # warm up pools, statement caches and page cache
+    found: list[list[str]] = []
+    latencies: list[float] = []
+    cpu: list[float] = []
+    for query in queries:
+        for _ in range(repeat):
+            started, started_cpu = time.perf_counter(), time.process_time()
+            hits = await search(query)
+            latencies.append(time.perf_counter() - started)
+            cpu.append(time.process_time() - started_cpu)
+        found.append([str(hit.id) for hit in hits])
+    return found, latencies, cpu
+
+
+def _report(
+    label: str, latencies: list[float], cpu: list[float], recall: float | None
+) -> None:
+    print(
+        f"{label:<12} "
+        f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.2f}ms "
+        f"cpu/query={sum(cpu) / len(cpu) * 1000:8.3f}ms"
+        + ("" if recall is None else f" recall={recall:6.3f}")
+    )
+
+
+async def _run(
+    questions: list[str], k: int, repeat: int, memory: Path | None
+) -> None:
+    client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+    repository = PgVectorRepository(
+        async_session_factory,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+    )
+    fallback = PgVectorService(repository)
+    fast = AsyncpgVectorService(
+        asyncpg_dsn(),
+        fallback=fallback,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+    )
+    service = RagService(
+        vector_service=fallback,
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+    )
+    try:
+        queries = await service.calculate_embeddings(questions)
+        logger.info("Embedded {} queries", len(queries))
+
+        stores: dict[str, Any] = {}
+        if memory is not None and memory.exists():
+            stores["numpy"] = NumpyVectorService.load(memory)
+        stores["sqlalchemy"] = repository
+        stores["asyncpg"] = fast
+        backends: dict[str, Search] = {
+            label: lambda query, store=store: store.similarity_search(query, limit=k)
+            for label, store in stores.items()
+        }
+
+        reference: list[list[str]] | None = None
+        for label, search in backends.items():
+            found, latencies, cpu = await _measure(search, queries, repeat)
+            if reference is None and label == "numpy":
+                reference = found
+            recall = None if reference is None else recall_at_k(found, reference)
+            _report(label, latencies, cpu, recall)
+
+        # All queries in one call: one statement, or one matrix product.
+        for label, store in stores.items():
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await store.similarity_search_many(queries, limit=k)
+                latencies.append(time.perf_counter() - started)
+            print(
+                f"{label:<12} batch of {len(queries)}: "
+                f"p50={percentile(latencies, 50) * 1000:8.2f}ms"
+            )
+    finally:
+        await fast.aclose()
+        await client.aio.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=20, help="Timed runs per query."
+    )
+    parser.add_argument(
+        "--memory",
+        type=Path,
+        default=Path(settings.VECTOR_MEMORY_PATH),
+        help="Exported store for the NumPy backend (skipped if missing).",
+    )
+    args = parser.parse_args()
+
+    questions = load_questions(args.queries, DEFAULT_QUERIES)
+    asyncio.run(_run(questions, args.k, args.repeat, args.memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Measure ANN index latency and recall against exact search.
+
+Queries are embedded once, their exact top-k is taken with index scans
+disabled, then the same searches run through the index at each search
+setting (``hnsw.ef_search`` or ``ivfflat.probes``):
+
+    python -m benchmarks.vector_index --type hnsw --values 20 40 80 160 -k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections.abc import Sequence
+
+from google import genai
+from loguru import logger
+
+from app.core.config import settings
+from app.core.enums import VectorIndexType
+from app.database.session import async_session_factory, engine
+from app.services.vectorstores import SearchOptions
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.services.vectorstores.pgvector.service import PgVectorService
+from app.workflows.pipelines import RagService
+
+from .common import load_questions, percentile, recall_at_k
+from .rag_retrieval import DEFAULT_QUERIES
+
+
+async def _search(
+    repository: PgVectorRepository,
+    queries: Sequence[Sequence[float]],
+    k: int,
+    options: SearchOptions,
+    repeat: int,
+) -> tuple[list[list[int]], list[float]]:
+    ids: list[list[int]] = []
+    latencies: list[float] = []
+    for query in queries:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = await repository.similarity_search(query, limit=k, options=options)
+            latencies.append(time.perf_counter() - started)
+        ids.append([hit.id for hit in rows])
+    return ids, latencies
+
+
+def _report(label: str, recall: float, latencies: list[float]) -> None:
+    print(
+        f"{label:<20} recall={recall:6.3f} "
+        f"p50={percentile(latencies, 50) * 1000:8.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:8.2f}ms"
+    )
+
+
+async def _run(
+    questions: list[str],
+    index_type: VectorIndexType,
+    values: list[int],
+    k: int,
+    repeat: int,
+) -> None:
+    client = genai.Client(vertexai=True, api_key=settings.GOOGLE_GENAI_API_KEY)
+    repository = PgVectorRepository(
+        async_session_factory,
+        distance=settings.VECTOR_DISTANCE,
+        storage=settings.VECTOR_STORAGE,
+    )
+    service = RagService(
+        vector_service=PgVectorService(repository),
+        client=client,
+        timeout=settings.RAG_EMBEDDING_TIMEOUT,
+        model=settings.GOOGLE_GENAI_EMBED_MODEL,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
+    )
+    try:
+        queries = [
+            vector.tolist() for vector in await service.calculate_embeddings(questions)
+        ]
+        logger.info("Embedded {} queries", len(queries))
+
+        exact, latencies = await _search(
+            repository, queries, k, SearchOptions(exact=True), repeat
+        )
+        _report("exact", 1.0, latencies)
+
+        hnsw = index_type == VectorIndexType.HNSW
+        setting = "ef_search" if hnsw else "probes"
+        for value in values:
+            options = (
+                SearchOptions(ef_search=value) if hnsw else SearchOptions(probes=value)
+            )
+            ids, latencies = await _search(repository, queries, k, options, repeat)
+            label = f"{index_type.value} {setting}={value}"
+            _report(label, recall_at_k(ids, exact), latencies)
+    finally:
+        await client.aio.aclose()
+        await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--queries", help="File with one query per line.")
+    parser.add_argument(
+        "--type",
+        type=VectorIndexType,
+        choices=list(VectorIndexType),
+        default=settings.VECTOR_INDEX_TYPE,
+    )
+    parser.add_argument(
+        "--values",
+        type=int,
+        nargs="+",
+        help="ef_search (hnsw) or probes (ivfflat) settings to compare.",
+    )
+    parser.add_argument("-k", type=int, default=settings.RAG_DEFAULT_TOP_K)
+    parser.add_argument(
+        "-n", "--repeat", type=int, default=3, help="Timed runs per query."
+    )
+    args = parser.parse_args()
+
+    values = args.values or (
+        [10, 20, 40, 80, 160] if args.type == VectorIndexType.HNSW else [1, 5, 10, 20]
+    )
+    questions = load_questions(args.queries, DEFAULT_QUERIES)
+    asyncio.run(_run(questions, args.type, values, args.k, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
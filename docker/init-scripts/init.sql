@@ -1,2 +1,4 @@
     CREATE EXTENSION vector;
-    CREATE TABLE my_items (id INT PRIMARY KEY,description TEXT,embedding VECTOR(3072));
\ No newline at end of file
+    CREATE EXTENSION pg_trgm;
+    CREATE TABLE my_items (id INT PRIMARY KEY,description TEXT,embedding VECTOR(3072),book INT,page INT,header TEXT,contents TEXT[],footnotes TEXT[],content_hash BYTEA);
+    CREATE INDEX my_items_description_trgm_idx ON my_items USING gin (description gin_trgm_ops);
\ No newline at end of file
@@ -1 +0,0 @@
-    COPY my_items FROM '/docker-entrypoint-initdb.d/data/test.csv' CSV DELIMITER ',';
\ No newline at end of file
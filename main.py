@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import gc
 import multiprocessing
 import sys
 from typing import Any
@@ -87,6 +88,9 @@ def run_prod() -> None:
 
     logger.info(f"🚀 Starting FastAPI in {env_name.upper()} mode (workers={workers})")
 
+    # The app is preloaded: move its objects out of the collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages.
+    gc.freeze()
     try:
         GunicornApp(
             app=app,
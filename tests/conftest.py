@@ -0,0 +1,132 @@
+"""Shared fixtures."""
+
+import asyncio
+import struct
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import pytest
+from asyncpg import Record
+from asyncpg.connect_utils import _ConnectionParameters
+from asyncpg.protocol import Protocol
+from asyncpg.protocol.protocol import NO_TIMEOUT
+from pgvector.asyncpg import HalfVector, Vector
+
+# Made-up oids for the extension types, which have none of their own.
+_VECTOR_TYPES = {"vector": (70001, 70002, Vector), "halfvec": (70003, 70004, HalfVector)}
+_INT8 = 20
+
+
+def _message(kind: bytes, payload: bytes = b"") -> bytes:
+    return kind + struct.pack("!i", len(payload) + 4) + payload
+
+
+class _Transport:
+    def __init__(self) -> None:
+        self.sent: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.sent.append(bytes(data))
+
+    def writelines(self, chunks: Sequence[bytes]) -> None:
+        self.sent.extend(bytes(chunk) for chunk in chunks)
+
+    def get_extra_info(self, *args: Any) -> None:
+        return None
+
+    def is_closing(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        return None
+
+    def abort(self) -> None:
+        return None
+
+
+async def _bind(storage: str, args: Sequence[Any]) -> bytes:
+    loop = asyncio.get_running_loop()
+    connected = loop.create_future()
+    params = _ConnectionParameters("u", None, "db", None, None, None, {}, None, None, None)
+    protocol = Protocol(("localhost", 5432), connected, params, Record, loop)
+    transport = _Transport()
+    protocol.connection_made(transport)
+    protocol.data_received(
+        _message(b"R", struct.pack("!i", 0)) + _message(b"Z", b"I")
+    )
+    await connected
+
+    # What register_vector and the type introspection set up on a real server;
+    # adding a codec drops derived (array) codecs, so those come last.
+    settings = protocol.get_settings()
+    for name, (oid, _, vector_type) in _VECTOR_TYPES.items():
+        settings.add_python_codec(
+            oid,
+            name,
+            "public",
+            [],
+            "scalar",
+            vector_type._to_db_binary,
+            vector_type._from_db_binary,
+            "binary",
+        )
+    settings.register_data_types(
+        [
+            {
+                "oid": array_oid,
+                "ns": "public",
+                "name": f"_{name}",
+                "kind": "b",
+                "basetype": None,
+                "elemtype": oid,
+                "elemdelim": ",",
+                "range_subtype": None,
+                "attrtypoids": None,
+                "attrnames": None,
+                "depth": 0,
+                "basetype_name": None,
+                "elemtype_name": name,
+                "range_subtype_name": None,
+            }
+            for name, (oid, array_oid, _) in _VECTOR_TYPES.items()
+        ]
+    )
+
+    prepare = asyncio.ensure_future(
+        protocol.prepare("", "q", NO_TIMEOUT, record_class=Record)
+    )
+    await asyncio.sleep(0)
+    parameters = struct.pack("!hii", 2, _VECTOR_TYPES[storage][1], _INT8)
+    protocol.data_received(
+        _message(b"1") + _message(b"t", parameters) + _message(b"n")
+    )
+    state = await prepare
+    state._init_codecs()
+
+    transport.sent.clear()
+    execute = asyncio.ensure_future(
+        protocol.bind_execute(state, args, "", 0, False, NO_TIMEOUT)
+    )
+    await asyncio.sleep(0)
+    if execute.done():
+        # Arguments are encoded before anything is sent.
+        execute.result()
+    protocol.data_received(
+        _message(b"2") + _message(b"C", b"SELECT 0\0") + _message(b"Z", b"I")
+    )
+    await execute
+    return b"".join(transport.sent)
+
+
+@pytest.fixture
+def bind_similarity_args() -> Callable[[str, Sequence[Any]], bytes]:
+    """Encode ``($1::<storage>[], $2::int8)`` arguments as asyncpg sends them.
+
+    Runs asyncpg's own protocol and array codecs against a scripted server,
+    so arguments that a real Postgres connection would reject raise here.
+    """
+
+    def bind(storage: str, args: Sequence[Any]) -> bytes:
+        return asyncio.run(_bind(storage, args))
+
+    return bind
@@ -0,0 +1,113 @@
+"""Tests for the raw asyncpg vector store backend."""
+
+import asyncio
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import asyncpg
+import numpy as np
+import pytest
+
+from app.core.enums import Pitaka, VectorDistance, VectorStorage
+from app.services.vectorstores import SearchFilter, SearchOptions
+from app.services.vectorstores.pgvector.asyncpg_service import (
+    AsyncpgVectorService,
+    similarity_sql,
+)
+
+
+class _FakeConnection:
+    def __init__(self, records: list[dict[str, Any]]) -> None:
+        self.records = records
+        self.executed: list[tuple[Any, ...]] = []
+        self.fetched: list[tuple[Any, ...]] = []
+
+    def transaction(self) -> Any:
+        return self
+
+    async def __aenter__(self) -> Any:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def execute(self, *args: Any) -> str:
+        self.executed.append(args)
+        return "SELECT 1"
+
+    async def fetch(self, *args: Any) -> list[dict[str, Any]]:
+        self.fetched.append(args)
+        return self.records
+
+
+class _FakePool:
+    def __init__(self, conn: _FakeConnection) -> None:
+        self.conn = conn
+
+    def acquire(self) -> Any:
+        return self.conn
+
+
+def _service(conn: _FakeConnection) -> AsyncpgVectorService:
+    service = AsyncpgVectorService("postgresql://", fallback=None)  # type: ignore
+    service._pool = _FakePool(conn)
+    return service
+
+
+def test_statement_matches_the_repository_query() -> None:
+    """Scores, filters and the per-query LIMIT follow the ORM query."""
+    sql = similarity_sql(
+        "my_items",
+        distance=VectorDistance.INNER_PRODUCT,
+        storage=VectorStorage.HALFVEC,
+        filters=SearchFilter(pitaka=Pitaka.VINAYA),
+    )
+
+    assert "unnest($1::halfvec[]) WITH ORDINALITY" in sql
+    assert "1 + (my_items.embedding <#> q.query) AS score" in sql
+    assert "WHERE my_items.book >= 1 AND my_items.book <= 8" in sql
+    assert "LIMIT $2" in sql
+
+
+def test_rows_are_grouped_per_query() -> None:
+    """One statement serves every query; results come back in input order."""
+    page = {"book": 1, "page": 2, "header": "h", "contents": None, "footnotes": []}
+    conn = _FakeConnection(
+        [
+            {"query_index": 2, "id": 7, "score": 0.2, "description": None, **page},
+            {"query_index": 1, "id": 3, "score": 0.1, "description": None, **page},
+        ]
+    )
+    service = _service(conn)
+
+    rows = asyncio.run(
+        service.similarity_search_many(
+            [[1.0, 0.0], [0.0, 1.0]], limit=1, options=SearchOptions(ef_search=80)
+        )
+    )
+
+    assert [[hit.id for hit in hits] for hits in rows] == [["3"], ["7"]]
+    assert rows[0][0].payload["contents"] == []
+    assert conn.executed == [
+        ("SELECT set_config($1, $2, true)", "hnsw.ef_search", "80")
+    ]
+    assert len(conn.fetched) == 1 and conn.fetched[0][2] == 1
+
+
+@pytest.mark.parametrize("storage", list(VectorStorage))
+def test_query_vectors_bind_as_one_array_element_each(
+    bind_similarity_args: Callable[[str, Sequence[Any]], bytes],
+    storage: VectorStorage,
+) -> None:
+    """asyncpg encodes the bound queries as a 1-D array of pgvector values."""
+    conn = _FakeConnection([])
+    service = _service(conn)
+    service._storage = storage
+    embeddings = np.eye(2, 3, dtype=np.float32)
+
+    asyncio.run(service.similarity_search_many(list(embeddings), limit=5))
+
+    bind = bind_similarity_args(storage.value, conn.fetched[0][1:])
+    assert bind.startswith(b"B")
+    with pytest.raises(asyncpg.DataError, match="expected ndim to be 1"):
+        bind_similarity_args(storage.value, [list(embeddings), 5])
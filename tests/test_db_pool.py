@@ -0,0 +1,82 @@
+"""Tests for database pool sizing."""
+
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from app.core.config import settings
+from app.core.enums import VectorBackend
+from app.database import session
+from app.database.session import asyncpg_pool_max_size, engine, pool_limits
+
+
+def test_pool_share_fits_the_connection_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    """With 2N+1 workers all pools together stay within DB_MAX_CONNECTIONS."""
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 80)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", None)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", None)
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", VectorBackend.SQLALCHEMY)
+
+    pool_size, max_overflow = pool_limits(9)
+
+    assert (pool_size, max_overflow) == (4, 4)
+    assert 9 * (pool_size + max_overflow) <= 80
+
+
+def test_asyncpg_pool_comes_out_of_the_share(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The raw asyncpg pool and the engine pool share one worker's budget."""
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 80)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", None)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", None)
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", VectorBackend.ASYNCPG)
+    monkeypatch.setattr(settings, "VECTOR_ASYNCPG_POOL_MAX_SIZE", None)
+
+    asyncpg_size = asyncpg_pool_max_size(9)
+    pool_size, max_overflow = pool_limits(9)
+
+    assert (asyncpg_size, pool_size, max_overflow) == (4, 2, 2)
+    assert 9 * (asyncpg_size + pool_size + max_overflow) <= 80
+
+
+def test_pools_over_budget_warn(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Sizes that cannot fit the budget are used, but not silently."""
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 20)
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", None)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", None)
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", VectorBackend.ASYNCPG)
+    monkeypatch.setattr(settings, "VECTOR_ASYNCPG_POOL_MAX_SIZE", 10)
+    messages: list[str] = []
+    handler = logger.add(messages.append, level="WARNING", format="{message}")
+    try:
+        assert pool_limits(9) == (1, 0)
+    finally:
+        logger.remove(handler)
+
+    assert "above DB_MAX_CONNECTIONS=20" in messages[0]
+
+
+def test_explicit_pool_size_wins(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Configured sizes override the derived share."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", VectorBackend.SQLALCHEMY)
+
+    assert pool_limits(9) == (3, 0)
+
+
+def test_engine_uses_configured_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The engine pre-pings and caches prepared statements."""
+    created: dict[str, Any] = {}
+
+    def capture(url: Any, **kwargs: Any) -> Any:
+        created.update(kwargs, url=url)
+        return engine
+
+    monkeypatch.setattr(session, "create_async_engine", capture)
+    session.create_engine(settings.PG_URL, "test")
+
+    assert created["pool_pre_ping"] is settings.DB_POOL_PRE_PING
+    assert created["url"].query["prepared_statement_cache_size"] == str(
+        settings.DB_STATEMENT_CACHE_SIZE
+    )
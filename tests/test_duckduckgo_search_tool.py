@@ -0,0 +1,62 @@
+"""Tests for the DuckDuckGo search tool."""
+
+import asyncio
+import threading
+from typing import Any
+
+import pytest
+
+from app.workflows.graphs.rag.tools import duckduckgo_search_tool as ddg
+
+
+class _FakeDDGS:
+    calls = 0
+
+    def text(self, query: str, max_results: int) -> list[dict[str, Any]]:
+        _FakeDDGS.calls += 1
+        return [{"header": query, "link": "https://example.com", "body": "body"}]
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ddg, "_client", _FakeDDGS)
+    _FakeDDGS.calls = 0
+    ddg._CACHE.clear()
+
+
+def test_repeated_queries_are_served_from_cache() -> None:
+    """Queries differing only in case and spacing hit the network once."""
+    tool = ddg.DuckDuckGoSearchTool(max_results=3)
+
+    first = tool.invoke({"query": "Four Noble Truths"})
+    second = tool.invoke({"query": "  four   noble truths "})
+
+    assert _FakeDDGS.calls == 1
+    assert second["results"] == first["results"]
+    assert second["query"] == "  four   noble truths "
+
+    ddg.DuckDuckGoSearchTool(max_results=5).invoke({"query": "Four Noble Truths"})
+    assert _FakeDDGS.calls == 2
+
+
+def test_ainvoke_runs_off_the_event_loop() -> None:
+    """The blocking search runs on the worker pool, not the loop thread."""
+    threads = []
+
+    class _RecordingDDGS(_FakeDDGS):
+        def text(self, query: str, max_results: int) -> list[dict[str, Any]]:
+            threads.append(threading.current_thread().name)
+            return super().text(query, max_results)
+
+    async def _search() -> dict[str, Any]:
+        loop_thread = threading.current_thread().name
+        result = await ddg.DuckDuckGoSearchTool().ainvoke({"query": "sati"})
+        assert threads and threads[0] != loop_thread
+        return result
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(ddg, "_client", _RecordingDDGS)
+        result = asyncio.run(_search())
+
+    assert result["results"][0]["content"] == "body"
+    assert threads[0].startswith("ddgs")
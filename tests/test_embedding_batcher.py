@@ -0,0 +1,65 @@
+"""Tests for micro-batching of embedding requests."""
+
+import asyncio
+
+import pytest
+
+from app.services.embeddings import EmbeddingBatcher
+
+
+def test_concurrent_callers_share_one_request() -> None:
+    """Texts queued within the window go out together, deduplicated."""
+    calls: list[list[str]] = []
+
+    async def embed(texts: list[str]) -> list[list[float]]:
+        calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    async def _run() -> list[list[list[float]]]:
+        batcher = EmbeddingBatcher(embed, window=0.01, max_batch=20)
+        return await asyncio.gather(
+            batcher.embed(["a", "bb"]),
+            batcher.embed(["bb"]),
+            batcher.embed(["ccc"]),
+        )
+
+    results = asyncio.run(_run())
+    assert calls == [["a", "bb", "ccc"]]
+    assert results == [[[1.0], [2.0]], [[2.0]], [[3.0]]]
+
+
+def test_full_batches_are_sent_without_waiting() -> None:
+    """Reaching ``max_batch`` dispatches immediately; the rest waits for the window."""
+    calls: list[list[str]] = []
+
+    async def embed(texts: list[str]) -> list[str]:
+        calls.append(texts)
+        return texts
+
+    async def _run() -> list[str]:
+        batcher = EmbeddingBatcher(embed, window=0.01, max_batch=2)
+        return await batcher.embed(["a", "b", "c"])
+
+    assert asyncio.run(_run()) == ["a", "b", "c"]
+    assert calls == [["a", "b"], ["c"]]
+
+
+def test_failures_reach_every_caller_in_the_batch() -> None:
+    """An embedding error is raised to each caller whose text was in the batch."""
+
+    async def embed(texts: list[str]) -> list[str]:
+        raise RuntimeError("quota exceeded")
+
+    async def _run() -> list[BaseException]:
+        batcher = EmbeddingBatcher(embed, window=0.01, max_batch=20)
+        return await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True
+        )
+
+    errors = asyncio.run(_run())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_rejects_non_positive_batch_size() -> None:
+    with pytest.raises(ValueError):
+        EmbeddingBatcher(lambda texts: texts, window=0.0, max_batch=0)
@@ -0,0 +1,80 @@
+"""Tests for the query embedding cache."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+from app.services.embeddings import EmbeddingCache
+from app.workflows.pipelines import RagService
+
+
+class _FakeRemote:
+    """Minimal stand-in for the aiocache Redis tier."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    async def multi_get(self, keys: list[str]) -> list[bytes | None]:
+        return [self.data.get(key) for key in keys]
+
+    async def multi_set(self, pairs: list[tuple[str, bytes]], ttl: Any = None) -> None:
+        self.data.update(pairs)
+
+
+def test_hits_are_zero_copy_float32_views() -> None:
+    """Vectors round-trip as packed float32 and come back without copying."""
+    cache = EmbeddingCache(max_bytes=1 << 20)
+
+    async def _roundtrip() -> list[Any]:
+        await cache.set_many("m", ["อริยสัจ  ๔"], [[0.5, -1.25, 2.0]])
+        return await cache.get_many("m", ["อริยสัจ ๔", "other"])
+
+    hit, miss = asyncio.run(_roundtrip())
+    assert miss is None
+    assert hit.dtype == np.float32
+    assert not hit.flags.owndata and not hit.flags.writeable
+    np.testing.assert_array_equal(hit, [0.5, -1.25, 2.0])
+
+
+def test_remote_tier_backfills_local() -> None:
+    """A Redis hit is served from the in-process LRU afterwards."""
+    remote = _FakeRemote()
+    writer = EmbeddingCache(max_bytes=1 << 20, remote=remote)
+    reader = EmbeddingCache(max_bytes=1 << 20, remote=remote)
+
+    async def _run() -> None:
+        await writer.set_many("m", ["sati"], [[1.0, 2.0]])
+        assert (await reader.get_many("m", ["sati"]))[0] is not None
+        remote.data.clear()
+        assert (await reader.get_many("m", ["sati"]))[0] is not None
+
+    asyncio.run(_run())
+
+
+def test_rag_service_embeds_only_misses() -> None:
+    """Repeated queries skip the embedding API."""
+    calls: list[list[str]] = []
+
+    async def embed_content(*, model: str, contents: list[str]) -> Any:
+        calls.append(contents)
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=[1.0, 2.0]) for _ in contents]
+        )
+
+    models = SimpleNamespace(embed_content=embed_content)
+    client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    service = RagService(
+        vector_service=SimpleNamespace(),
+        client=client,
+        embedding_cache=EmbeddingCache(max_bytes=1 << 20),
+    )
+
+    async def _run() -> None:
+        await service.calculate_embeddings(["a", "b"])
+        vectors = await service.calculate_embeddings(["b", "c"])
+        assert [v.tolist() for v in vectors] == [[1.0, 2.0], [1.0, 2.0]]
+
+    asyncio.run(_run())
+    assert calls == [["a", "b"], ["c"]]
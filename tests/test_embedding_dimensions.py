@@ -0,0 +1,86 @@
+"""Tests for reduced-dimension embeddings."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.core.enums import VectorStorage
+from app.services.embeddings import truncate_embeddings
+from app.services.vectorstores.pgvector.migrations import reduce_embeddings
+from app.workflows.pipelines import RagService
+
+
+def test_truncation_renormalizes_rows() -> None:
+    """Truncated rows keep their prefix direction and have unit length."""
+    vectors = np.array([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]])
+
+    reduced = truncate_embeddings(vectors, 2)
+
+    assert reduced.dtype == np.float32
+    np.testing.assert_allclose(reduced[0], [0.6, 0.8], rtol=1e-6)
+    np.testing.assert_array_equal(reduced[1], [0.0, 0.0])  # zero prefix stays zero
+    with pytest.raises(ValueError):
+        truncate_embeddings(vectors, 4)
+
+
+def test_rag_service_requests_reduced_dimensions() -> None:
+    """The API is asked for the configured size and results are unit length."""
+    configs: list[Any] = []
+
+    async def embed_content(*, model: str, contents: list[str], config: Any) -> Any:
+        configs.append(config)
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=[2.0, 0.0]) for _ in contents]
+        )
+
+    client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(embed_content=embed_content))
+    )
+    service = RagService(vector_service=object(), client=client, dimensions=2)
+
+    vector = asyncio.run(service.calculate_embedding("sati"))
+
+    assert configs[0].output_dimensionality == 2
+    np.testing.assert_allclose(vector, [1.0, 0.0])
+
+
+class _RecordingSession:
+    def __init__(self, indexes: list[str]) -> None:
+        self.indexes = indexes
+        self.statements: list[str] = []
+        self.committed = False
+
+    async def __aenter__(self) -> "_RecordingSession":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execute(self, stmt: Any, params: Any = None) -> Any:
+        self.statements.append(str(stmt))
+        return SimpleNamespace(scalars=lambda: iter(self.indexes))
+
+    async def commit(self) -> None:
+        self.committed = True
+
+
+def test_reduction_drops_ann_indexes_before_changing_the_column() -> None:
+    """The column type change would fail under an ANN index, so it goes first."""
+    session = _RecordingSession(["my_items_embedding_hnsw_idx"])
+
+    dropped = asyncio.run(
+        reduce_embeddings(
+            lambda: session,  # type: ignore[arg-type]
+            dimensions=768,
+            storage=VectorStorage.HALFVEC,
+        )
+    )
+
+    assert dropped == ["my_items_embedding_hnsw_idx"]
+    assert "amname IN ('hnsw', 'ivfflat')" in session.statements[0]
+    assert session.statements[1] == "DROP INDEX my_items_embedding_hnsw_idx"
+    assert "ALTER COLUMN embedding TYPE halfvec(768)" in session.statements[2]
+    assert session.committed
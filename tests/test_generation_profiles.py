@@ -0,0 +1,66 @@
+"""Tests for per-node generation profiles."""
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.workflows.graphs.rag.components.vertex_gemini_client import VertexGeminiClient
+from app.workflows.graphs.rag.profiles import DEFAULT_PROFILES, get_generation_profile
+
+
+def test_overrides_merge_into_the_node_defaults(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Only the overridden fields change; other nodes keep their defaults."""
+    monkeypatch.setattr(
+        settings,
+        "LLM_GENERATION_PROFILES",
+        {"question_rewriter": {"max_output_tokens": 128, "top_p": 0.9}},
+    )
+
+    rewriter = get_generation_profile("question_rewriter")
+
+    assert rewriter.max_output_tokens == 128
+    assert rewriter.top_p == 0.9
+    assert rewriter.thinking_budget == 0
+    assert rewriter.model == DEFAULT_PROFILES["question_rewriter"].model
+    assert get_generation_profile("answer_generation") == DEFAULT_PROFILES[
+        "answer_generation"
+    ]
+
+
+def test_invalid_overrides_are_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Overrides are validated like the defaults, e.g. the hedge budget bounds."""
+    monkeypatch.setattr(
+        settings, "LLM_GENERATION_PROFILES", {"answer_generation": {"hedge_budget": 2}}
+    )
+
+    with pytest.raises(ValidationError):
+        get_generation_profile("answer_generation")
+
+
+def test_build_config_applies_the_profile(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A client built from a profile sends its parameters with every call."""
+    monkeypatch.setattr(
+        settings,
+        "LLM_GENERATION_PROFILES",
+        {
+            "question_enhancer": {
+                "top_k": 20,
+                "stop_sequences": ["\n\n"],
+                "temperature": 0.3,
+            }
+        },
+    )
+    client = VertexGeminiClient.from_profile(
+        get_generation_profile("question_enhancer"), node="question_enhancer"
+    )
+
+    config = client._build_config()
+
+    assert client.node == "question_enhancer"
+    assert config.temperature == 0.3
+    assert config.max_output_tokens == 256
+    assert config.top_k == 20
+    assert config.top_p is None
+    assert config.stop_sequences == ["\n\n"]
+    assert config.thinking_config is not None
+    assert config.thinking_config.thinking_budget == 0
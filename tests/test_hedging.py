@@ -0,0 +1,153 @@
+"""Tests for hedging of streamed LLM calls."""
+
+import contextlib
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.services.llm import Cancellation, HedgeCancelledError, Hedger
+from app.workflows.graphs.rag.components.vertex_gemini_client import VertexGeminiClient
+
+
+def _fast(cancel: Cancellation, first: Callable[[], None]) -> str:
+    first()
+    return "fast"
+
+
+def _warm_up(hedger: Hedger, node: str, samples: int) -> None:
+    for _ in range(samples):
+        hedger.run(node, _fast, budget=1.0)
+
+
+def test_slow_first_token_is_hedged_and_loser_cancelled() -> None:
+    """A late first token fires a duplicate; the faster attempt wins."""
+    hedger = Hedger(min_delay=0.05, max_delay=0.05, min_samples=5)
+    _warm_up(hedger, "answer_generation", 5)
+
+    calls = []
+    cancelled = threading.Event()
+
+    def attempt(cancel: threading.Event, first: Callable[[], None]) -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            if cancel.wait(timeout=2):
+                cancelled.set()
+                raise HedgeCancelledError("lost")
+            return "slow"
+        first()
+        return "hedge"
+
+    assert hedger.run("answer_generation", attempt, budget=1.0) == "hedge"
+    assert cancelled.wait(timeout=1)
+    assert len(calls) == 2
+
+
+def test_hedging_respects_budget_and_warm_up() -> None:
+    """No hedge fires before enough latencies are known or past the budget."""
+    hedger = Hedger(min_delay=0.01, max_delay=0.01, min_samples=5, window=10)
+
+    def slow(cancel: threading.Event, first: Callable[[], None]) -> str:
+        time.sleep(0.05)
+        first()
+        return "slow"
+
+    assert hedger.delay("answer_generation") is None
+    _warm_up(hedger, "answer_generation", 5)
+    assert hedger.delay("answer_generation") == 0.01
+
+    # 10% of the last 10 calls: at most one hedge in the window.
+    calls = []
+
+    def counted(cancel: threading.Event, first: Callable[[], None]) -> str:
+        calls.append(1)
+        return slow(cancel, first)
+
+    for _ in range(10):
+        hedger.run("answer_generation", counted, budget=0.1)
+    assert len(calls) == 11
+
+
+def test_cancel_runs_close_callbacks_of_a_blocked_loser() -> None:
+    """A loser blocked before its first chunk is released by its close callback."""
+    hedger = Hedger(min_delay=0.05, max_delay=0.05, min_samples=5)
+    _warm_up(hedger, "answer_generation", 5)
+
+    calls = []
+    closed = threading.Event()
+
+    def attempt(cancel: Cancellation, first: Callable[[], None]) -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            # Blocked on I/O: never polls ``cancel``.
+            cancel.on_cancel(closed.set)
+            if not closed.wait(timeout=2):
+                return "slow"
+            raise HedgeCancelledError("lost")
+        first()
+        return "hedge"
+
+    assert hedger.run("answer_generation", attempt, budget=1.0) == "hedge"
+    assert closed.wait(timeout=1)
+
+    late = Cancellation()
+    late.set()
+    ran = []
+    late.on_cancel(lambda: ran.append(1))
+    assert ran == [1]
+
+
+def test_cancelled_vertex_stream_is_shut_down_before_its_first_chunk(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Cancelling closes the connection of a stream still waiting for data."""
+    server = socket.create_server(("127.0.0.1", 0))
+    disconnected = threading.Event()
+
+    def serve() -> None:
+        conn, _ = server.accept()
+        with conn:
+            conn.recv(65536)
+            conn.sendall(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+            )
+            # Never sends a chunk; returns once the client hangs up.
+            conn.settimeout(5)
+            with contextlib.suppress(OSError):
+                while conn.recv(65536):
+                    pass
+                disconnected.set()
+
+    threading.Thread(target=serve, daemon=True).start()
+    monkeypatch.setenv(
+        "GOOGLE_VERTEX_BASE_URL", f"http://127.0.0.1:{server.getsockname()[1]}/"
+    )
+    client = VertexGeminiClient(model="gemini-test", node="answer_generation")
+    cancel = Cancellation()
+    errors: list[BaseException] = []
+
+    def consume() -> None:
+        try:
+            client._consume_stream(
+                client._convert_messages([HumanMessage(content="hi")]),
+                client._build_config(),
+                cancel,
+            )
+        except BaseException as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=consume)
+    worker.start()
+    time.sleep(0.2)
+    cancel.set()
+    worker.join(timeout=2)
+    server.close()
+
+    assert not worker.is_alive()
+    assert isinstance(errors[0], HedgeCancelledError)
+    assert disconnected.wait(timeout=1)
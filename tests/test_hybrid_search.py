@@ -0,0 +1,81 @@
+"""Tests for hybrid trigram + vector retrieval."""
+
+import asyncio
+from collections.abc import Sequence
+from types import SimpleNamespace
+from typing import Any
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.enums import SearchMode
+from app.services.vectorstores import VectorSearchResult
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.workflows.pipelines import RagService
+
+
+def _sql(stmt: Any) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class _FakeEmbeddings:
+    async def embed_content(self, *, model: str, contents: list[str]) -> Any:
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=[1.0, 0.0]) for _ in contents]
+        )
+
+
+class _FakeVectorService:
+    def __init__(self) -> None:
+        self.texts: Sequence[str] | None = None
+
+    async def hybrid_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        *,
+        limit: int,
+        **kwargs: Any,
+    ) -> list[list[VectorSearchResult]]:
+        self.texts = texts
+        return [
+            [VectorSearchResult(id=text, score=-0.03, payload={})] for text in texts
+        ]
+
+
+def test_hybrid_query_fuses_both_rankings() -> None:
+    """One statement ranks by vector and by trigram similarity, then sums RRF."""
+    repository = PgVectorRepository(None, hybrid_candidates=40, rrf_k=60)
+    sql = _sql(repository._build_hybrid_query([0.1, 0.2], "อริยสัจ", limit=5))
+
+    assert "<%" in sql
+    assert "word_similarity" in sql
+    assert sql.count("row_number() OVER") == 2
+    assert "UNION ALL" in sql
+    assert "sum(" in sql
+
+
+def test_multi_hybrid_query_uses_one_values_list() -> None:
+    """All queries are sent once and searched through a LATERAL subquery."""
+    repository = PgVectorRepository(None)
+    sql = _sql(
+        repository._build_multi_hybrid_query(
+            [[0.1, 0.2], [0.3, 0.4]], ["sati", "magga"], limit=5
+        )
+    )
+
+    assert sql.count("VALUES") == 1
+    assert "LATERAL" in sql
+
+
+def test_hybrid_mode_sends_the_query_texts() -> None:
+    """In hybrid mode the service passes each query's text to the store."""
+    vector_service = _FakeVectorService()
+    client = SimpleNamespace(aio=SimpleNamespace(models=_FakeEmbeddings()))
+    service = RagService(
+        vector_service=vector_service, client=client, search_mode=SearchMode.HYBRID
+    )
+
+    results = asyncio.run(service.run_many(["sati", "magga"], top_k=1))
+
+    assert list(vector_service.texts or []) == ["sati", "magga"]
+    assert {r["id"] for r in results} == {"sati", "magga"}
@@ -0,0 +1,154 @@
+"""Tests for bulk ingestion into the vector table."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.services.vectorstores.pgvector import ingest
+from app.services.vectorstores.pgvector.indexes import IndexDimensionsError
+from app.services.vectorstores.pgvector.ingest import (
+    COLUMNS,
+    IngestRecord,
+    _embedded_pages,
+    build_indexes,
+    content_hash,
+    copy_and_upsert,
+    iter_csv,
+    iter_pages,
+    upsert_sql,
+)
+
+PAGE = {
+    "book": 9,
+    "page": 3,
+    "header": "สุตตันตปิฎก",
+    "contents": ["ทีฆนิกาย �"],
+    "footnotes": [],
+}
+
+
+class _FakeConnection:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.arguments: list[tuple[Any, ...]] = []
+        self.copied: list[tuple[Any, ...]] = []
+
+    @asynccontextmanager
+    async def transaction(self) -> Any:
+        yield
+
+    async def execute(self, statement: str, *args: Any) -> str:
+        self.statements.append(statement)
+        self.arguments.append(args)
+        return "INSERT 0 1"
+
+    async def copy_records_to_table(
+        self, table: str, *, records: Any, columns: list[str]
+    ) -> str:
+        assert tuple(columns) == COLUMNS
+        self.copied = [record async for record in records]
+        return f"COPY {len(self.copied)}"
+
+
+def test_page_ids_derive_from_book_and_page(tmp_path: Path) -> None:
+    """A page keeps its id when other pages come and go, from books or a CSV."""
+    for book in (2, 1):
+        book_pages = [{**PAGE, "book": book, "page": page} for page in (1, 3)]
+        path = tmp_path / f"book_{book:02d}.json"
+        path.write_text(json.dumps(book_pages), encoding="utf-8")
+
+    pages = list(iter_pages(tmp_path))
+
+    assert [page_id for page_id, _ in pages] == [10001, 10003, 20001, 20003]
+    assert "�" not in pages[0][1]
+    assert content_hash(pages[0][1]) != content_hash(pages[1][1])
+
+    csv_path = tmp_path / "embedding.csv"
+    csv_path.write_text(f'7,"{pages[1][1]}","[1.0, 0.0]"\n', encoding="utf-8")
+    assert [row[0] for row in iter_csv(csv_path)] == [10003]
+
+
+def test_unchanged_rows_are_not_rewritten() -> None:
+    """The upsert only touches rows whose content hash differs."""
+    sql = upsert_sql("my_items")
+
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    assert sql.endswith(
+        "WHERE target.content_hash IS DISTINCT FROM EXCLUDED.content_hash"
+    )
+
+
+def test_embedded_pages_stream_through_copy() -> None:
+    """Batches are embedded together and staged with parsed payload columns."""
+    calls: list[list[str]] = []
+
+    async def embed(texts: list[str]) -> list[list[float]]:
+        calls.append(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    pages = [(index, str(PAGE)) for index in range(1, 6)]
+    conn = _FakeConnection()
+    records = _embedded_pages(pages, embed, batch_size=2, concurrency=2)
+
+    staged, written = asyncio.run(copy_and_upsert(conn, records))
+
+    assert [len(texts) for texts in calls] == [2, 2, 1]
+    assert (staged, written) == (5, 1)
+    assert conn.copied[0][:2] == (1, str(PAGE))
+    assert conn.copied[0][3:5] == (9, 3)
+    assert "CREATE TEMP TABLE ingest_staging" in conn.statements[0]
+
+
+def test_too_wide_column_skips_only_the_ann_index(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A 3072-d vector column still gets its filter and trigram indexes."""
+    built: list[str] = []
+
+    async def create_index(*args: Any, **kwargs: Any) -> str:
+        raise IndexDimensionsError("pgvector cannot index embedding vector(3072)")
+
+    async def rebuild_index(*args: Any, **kwargs: Any) -> None:
+        built.append("rebuild")
+
+    async def create_filter_index(*args: Any, **kwargs: Any) -> str:
+        built.append("filters")
+        return "filters"
+
+    async def create_lexical_index(*args: Any, **kwargs: Any) -> str:
+        built.append("lexical")
+        return "lexical"
+
+    for function in (
+        create_index,
+        rebuild_index,
+        create_filter_index,
+        create_lexical_index,
+    ):
+        monkeypatch.setattr(ingest, function.__name__, function)
+
+    asyncio.run(build_indexes(None, rebuild=True))  # type: ignore[arg-type]
+
+    assert built == ["filters", "lexical"]
+
+
+def test_pages_missing_from_the_source_are_deleted_with_the_upsert() -> None:
+    """Rows outside ``keep_ids`` go in the same transaction; no ids, no delete."""
+
+    async def records() -> AsyncIterator[IngestRecord]:
+        return
+        yield
+
+    conn = _FakeConnection()
+    asyncio.run(copy_and_upsert(conn, records(), keep_ids={90003, 90004}))
+    empty = _FakeConnection()
+    asyncio.run(copy_and_upsert(empty, records(), keep_ids=set()))
+
+    assert conn.statements[-1] == "DELETE FROM my_items WHERE id <> ALL($1::int4[])"
+    assert sorted(conn.arguments[-1][0]) == [90003, 90004]
+    assert not any(statement.startswith("DELETE") for statement in empty.statements)
@@ -0,0 +1,144 @@
+"""Tests for LLM token usage and cost accounting."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.apis.monitor.routers import monitor_router
+from app.apis.v1.chat.service import ChatService
+from app.core.config import settings
+from app.services.llm import (
+    IdentityUsage,
+    TokenUsage,
+    UsageTracker,
+    identity_label,
+    record_usage,
+    usage_tracker_ctx_var,
+)
+from app.services.llm import usage as usage_module
+
+PRICING = {"m": {"input": 1.0, "cached_input": 0.25, "output": 4.0}}
+
+
+def test_cost_bills_cached_input_and_thinking_at_their_rates(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Cached prompt tokens use the cached rate; thinking is billed as output."""
+    monkeypatch.setattr(settings, "LLM_PRICING", PRICING)
+    usage = TokenUsage(
+        prompt_tokens=1_000_000,
+        cached_tokens=400_000,
+        output_tokens=100_000,
+        thinking_tokens=150_000,
+    )
+
+    # 0.6M input at $1, 0.4M cached at $0.25, 0.25M output at $4.
+    assert usage.cost_usd("m") == pytest.approx(0.6 + 0.1 + 1.0)
+    assert usage.cost_usd("unpriced") == 0.0
+
+
+def test_usage_from_gemini_and_langchain_metadata() -> None:
+    """Both SDKs map onto the same fields; missing metadata counts no call."""
+    gemini = TokenUsage.from_gemini(
+        SimpleNamespace(
+            prompt_token_count=120,
+            candidates_token_count=30,
+            thoughts_token_count=None,
+            cached_content_token_count=20,
+        )
+    )
+    langchain = TokenUsage.from_langchain(
+        {
+            "input_tokens": 120,
+            "output_tokens": 50,
+            "input_token_details": {"cache_read": 20},
+            "output_token_details": {"reasoning": 20},
+        }
+    )
+
+    assert gemini == TokenUsage(120, 30, 0, 20, calls=1)
+    assert langchain == TokenUsage(120, 30, 20, 20, calls=1)
+    assert TokenUsage.from_gemini(None).calls == 0
+    assert TokenUsage.from_langchain(None).calls == 0
+    assert TokenUsage.from_dict(gemini.as_dict()) == gemini
+
+
+def test_tracker_summary_adds_calls_per_node(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The summary has per-node usage, the total and the summed cost."""
+    monkeypatch.setattr(settings, "LLM_PRICING", PRICING)
+    tracker = UsageTracker(identity="token")
+    tracker.record("answer_generation", "m", TokenUsage(1000, 500, calls=1))
+    tracker.record("answer_generation", "m", TokenUsage(1000, 500, calls=1))
+    tracker.record("question_rewriter", "other", TokenUsage(200, 10, calls=1))
+
+    summary = tracker.summary()
+
+    assert summary["nodes"]["answer_generation"]["calls"] == 2
+    assert summary["nodes"]["answer_generation"]["total_tokens"] == 3000
+    assert summary["total"]["total_tokens"] == 3210
+    assert summary["cost_usd"] == pytest.approx(0.006)
+
+
+def test_usage_event_is_the_summary_as_an_sse_frame() -> None:
+    """The final ``usage`` frame carries the tracker's summary as JSON."""
+    tracker = UsageTracker()
+    tracker.record("answer_generation", "m", TokenUsage(10, 5, calls=1))
+
+    frame = ChatService._usage_event(tracker)
+
+    event, data = frame.removesuffix("\n\n").split("\n")
+    assert event == "event: usage"
+    assert json.loads(data.removeprefix("data: ")) == tracker.summary()
+
+
+def test_identity_table_keeps_the_most_recently_active(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A new identity evicts the one idle the longest; top sorts by cost."""
+    monkeypatch.setattr(settings, "LLM_PRICING", PRICING)
+    table = IdentityUsage(max_identities=2)
+    table.record("alice", TokenUsage(100, 10, calls=1), 0.5)
+    table.record("bob", TokenUsage(100, 10, calls=1), 0.1)
+    table.record("alice", TokenUsage(100, 10, calls=1), 0.5)
+    table.record("carol", TokenUsage(50, 5, calls=1), 0.2)
+
+    top = table.top(10)
+
+    assert [row["identity"] for row in top] == [
+        identity_label("alice"),
+        identity_label("carol"),
+    ]
+    assert top[0]["calls"] == 2
+    assert top[0]["cost_usd"] == 1.0
+    assert table.top(1) == top[:1]
+
+
+def test_record_usage_feeds_the_identity_table_served_on_usage(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Calls made for a request add up under its identity in ``GET /usage``."""
+    monkeypatch.setattr(settings, "LLM_PRICING", PRICING)
+    monkeypatch.setattr(usage_module, "identity_usage", IdentityUsage(10))
+    monkeypatch.setattr(
+        "app.apis.monitor.routers.identity_usage", usage_module.identity_usage
+    )
+    token = usage_tracker_ctx_var.set(UsageTracker(identity="10.0.0.1"))
+    try:
+        record_usage("answer_generation", "m", TokenUsage(1000, 250, calls=1))
+        record_usage("question_rewriter", "m", TokenUsage(500, 0, calls=1))
+    finally:
+        usage_tracker_ctx_var.reset(token)
+    app = FastAPI()
+    app.include_router(monitor_router)
+
+    response = TestClient(app).get("/usage", params={"limit": 5})
+
+    assert response.status_code == 200
+    (row,) = response.json()["data"]["identities"]
+    assert row["identity"] == identity_label("10.0.0.1")
+    assert row["calls"] == 2
+    assert row["total_tokens"] == 1750
+    assert row["cost_usd"] == pytest.approx(0.0025)
@@ -0,0 +1,213 @@
+"""Tests for the pooled, schema-constrained local model client."""
+
+import asyncio
+import json
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from app.services.llm import UsageTracker, usage_tracker_ctx_var
+from app.workflows.graphs.rag import local_model_client
+from app.workflows.graphs.rag.local_model_client import LocalModelClient
+
+
+class Route(BaseModel):
+    """Schema the stub server is asked to fill."""
+
+    refined_question: str
+    require_tripitika: bool
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "local-model",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17},
+    }
+
+
+def _stream(content: str) -> bytes:
+    """Server-sent events streaming ``content`` one word per chunk, then usage."""
+
+    def chunk(delta: dict, usage: dict | None = None) -> str:
+        body = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "local-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+            if delta
+            else [],
+            "usage": usage,
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    words = content.split(" ")
+    events = [chunk({"role": "assistant", "content": ""})]
+    events += [
+        chunk({"content": word if i == 0 else " " + word})
+        for i, word in enumerate(words)
+    ]
+    events.append(chunk({}, _completion(content)["usage"]))
+    return ("".join(events) + "data: [DONE]\n\n").encode()
+
+
+@pytest.fixture
+def serve(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable]:
+    """Route the shared model's HTTP client to a handler returning ``content``."""
+
+    requests: list[dict] = []
+
+    def install(content: str) -> list[dict]:
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            requests.append(body)
+            if body.get("stream"):
+                return httpx.Response(
+                    200,
+                    content=_stream(content),
+                    headers={"content-type": "text/event-stream"},
+                )
+            return httpx.Response(200, json=_completion(content))
+
+        class StubClient(httpx.Client):
+            def __init__(self, **kwargs: Any) -> None:
+                super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+        class StubAsyncClient(httpx.AsyncClient):
+            def __init__(self, **kwargs: Any) -> None:
+                super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+        local_model_client._shared_chat_model.cache_clear()
+        with monkeypatch.context() as patch:
+            patch.setattr(httpx, "Client", StubClient)
+            patch.setattr(httpx, "AsyncClient", StubAsyncClient)
+            local_model_client._shared_chat_model()
+        return requests
+
+    yield install
+    local_model_client._shared_chat_model.cache_clear()
+
+
+def test_clients_share_one_model_and_record_usage(serve: Callable) -> None:
+    """Every node reuses the pooled model; token usage reaches the tracker."""
+    serve("Hello")
+    tracker = UsageTracker()
+    token = usage_tracker_ctx_var.set(tracker)
+    try:
+        rewriter = LocalModelClient(node="question_rewriter")
+        answerer = LocalModelClient(node="answer_generation")
+        reply = answerer.invoke([HumanMessage(content="Hi")])
+    finally:
+        usage_tracker_ctx_var.reset(token)
+
+    assert rewriter.client is answerer.client
+    assert reply == "Hello"
+    summary = tracker.summary()
+    assert summary["nodes"]["answer_generation"]["prompt_tokens"] == 12
+    assert summary["nodes"]["answer_generation"]["output_tokens"] == 5
+
+
+def test_invoke_structured_requests_strict_json_schema(serve: Callable) -> None:
+    """The schema is sent as a strict ``json_schema`` response format."""
+    requests = serve(json.dumps({"refined_question": "dukkha", "require_tripitika": True}))
+
+    result = LocalModelClient().invoke_structured(
+        [HumanMessage(content="What is dukkha?")], schema=Route
+    )
+
+    assert result == Route(refined_question="dukkha", require_tripitika=True)
+    response_format = requests[0]["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format["json_schema"]["name"] == "Route"
+
+
+def test_invoke_structured_rejects_output_outside_schema(serve: Callable) -> None:
+    """Output that does not match the schema raises instead of being guessed."""
+    serve("yes, search the tripitaka")
+
+    with pytest.raises(ValueError, match="invalid structured output"):
+        LocalModelClient().invoke_structured([HumanMessage(content="?")], schema=Route)
+
+
+def test_async_calls_share_the_pooled_async_client(serve: Callable) -> None:
+    """``ainvoke`` goes through the shared async HTTP pool and records usage."""
+    serve("Hello")
+    tracker = UsageTracker()
+
+    async def run() -> str:
+        token = usage_tracker_ctx_var.set(tracker)
+        try:
+            return await LocalModelClient(node="answer_generation").ainvoke(
+                [HumanMessage(content="Hi")]
+            )
+        finally:
+            usage_tracker_ctx_var.reset(token)
+
+    assert asyncio.run(run()) == "Hello"
+    assert tracker.summary()["nodes"]["answer_generation"]["output_tokens"] == 5
+
+
+def test_astream_yields_chunks_and_records_usage_once(serve: Callable) -> None:
+    """Text arrives chunk by chunk; usage is recorded from the final chunk."""
+    requests = serve("Namo tassa bhagavato")
+    tracker = UsageTracker()
+
+    async def run() -> list[str]:
+        token = usage_tracker_ctx_var.set(tracker)
+        try:
+            client = LocalModelClient(node="answer_generation")
+            return [chunk async for chunk in client.astream([HumanMessage("Hi")])]
+        finally:
+            usage_tracker_ctx_var.reset(token)
+
+    chunks = asyncio.run(run())
+
+    assert chunks == ["Namo", " tassa", " bhagavato"]
+    assert requests[0]["stream"] is True
+    summary = tracker.summary()["nodes"]["answer_generation"]
+    assert (summary["prompt_tokens"], summary["output_tokens"]) == (12, 5)
+
+
+def test_invoke_with_stream_joins_chunks(serve: Callable) -> None:
+    """``invoke(stream=True)``, as the answer node calls it, returns the joined text."""
+    requests = serve("Namo tassa bhagavato")
+    tracker = UsageTracker()
+    token = usage_tracker_ctx_var.set(tracker)
+    try:
+        reply = LocalModelClient(node="answer_generation").invoke(
+            [HumanMessage("Hi")], stream=True
+        )
+    finally:
+        usage_tracker_ctx_var.reset(token)
+
+    assert reply == "Namo tassa bhagavato"
+    assert requests[0]["stream"] is True
+    summary = tracker.summary()["nodes"]["answer_generation"]
+    assert (summary["prompt_tokens"], summary["output_tokens"]) == (12, 5)
+
+
+def test_ainvoke_structured_returns_the_schema_type(serve: Callable) -> None:
+    """The async structured call parses into ``schema`` like the sync one."""
+    serve(json.dumps({"refined_question": "anatta", "require_tripitika": False}))
+
+    result = asyncio.run(
+        LocalModelClient().ainvoke_structured([HumanMessage("?")], schema=Route)
+    )
+
+    assert result.refined_question == "anatta"
+    assert result.require_tripitika is False
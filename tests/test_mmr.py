@@ -0,0 +1,35 @@
+"""Tests for Maximal Marginal Relevance selection."""
+
+import numpy as np
+import pytest
+
+from app.services.embeddings import MMR_SECONDS, mmr, pack, timed_mmr
+
+
+def _candidates() -> np.ndarray:
+    # Two near-duplicates of the query, then a less relevant distinct page.
+    return np.array([[0.95, 0.31, 0.0], [0.94, 0.34, 0.0], [0.8, -0.6, 0.0]])
+
+
+def test_mmr_skips_near_duplicates() -> None:
+    """The second pick is the distinct page, not the duplicate of the first."""
+    assert mmr([1.0, 0.0, 0.0], _candidates(), 2, lambda_mult=0.5).tolist() == [0, 2]
+
+
+def test_lambda_one_ranks_by_relevance() -> None:
+    """Without the diversity term MMR is the plain top-k."""
+    selected = mmr([1.0, 0.0, 0.0], _candidates(), 5, lambda_mult=1.0)
+
+    assert selected.tolist() == [0, 1, 2]
+    with pytest.raises(ValueError):
+        mmr([1.0, 0.0, 0.0], _candidates(), 2, lambda_mult=1.5)
+
+
+def test_timed_mmr_decodes_packed_embeddings() -> None:
+    """Packed float32 blobs are selected like arrays and the time is recorded."""
+    before = MMR_SECONDS._sum.get()
+
+    selected = timed_mmr([1.0, 0.0, 0.0], [pack(row) for row in _candidates()], 2)
+
+    assert selected.tolist() == [0, 2]
+    assert MMR_SECONDS._sum.get() > before
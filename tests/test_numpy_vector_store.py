@@ -0,0 +1,105 @@
+"""Tests for the in-memory NumPy vector store."""
+
+import asyncio
+from pathlib import Path
+
+import numpy as np
+
+from app.core.enums import Pitaka
+from app.services.embeddings import normalize_rows
+from app.services.vectorstores import SearchFilter
+from app.services.vectorstores.memory import NumpyVectorService
+from app.services.vectorstores.memory.export import replace_store
+from app.services.vectorstores.memory.store import (
+    PackedPayloads,
+    write_payloads,
+)
+
+
+def _write_store(root: Path, embeddings: np.ndarray, books: list[int]) -> None:
+    np.save(root / "embeddings.npy", normalize_rows(embeddings))
+    np.save(root / "ids.npy", np.arange(1, len(books) + 1, dtype=np.int64))
+    np.save(root / "books.npy", np.asarray(books, dtype=np.int32))
+    np.save(root / "pages.npy", np.ones(len(books), dtype=np.int32))
+    offsets = [0]
+    with (root / "payloads.bin").open("wb") as handle:
+        write_payloads(handle, ({"book": book, "page": 1} for book in books), offsets)
+    np.save(root / "payload_offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+
+def test_matches_brute_force_cosine(tmp_path: Path) -> None:
+    """Top-k ids and scores equal an exact cosine-distance ranking."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 16)).astype(np.float32)
+    _write_store(tmp_path, embeddings, [1] * 200)
+    store = NumpyVectorService.load(tmp_path)
+    queries = rng.normal(size=(3, 16)).astype(np.float32)
+
+    rows = asyncio.run(store.similarity_search_many(queries, limit=5))
+
+    unit = normalize_rows(embeddings)
+    for query, hits in zip(normalize_rows(queries), rows, strict=True):
+        distances = 1 - unit @ query
+        expected = np.argsort(distances)[:5] + 1
+        assert [int(hit.id) for hit in hits] == expected.tolist()
+        assert np.allclose([hit.score for hit in hits], np.sort(distances)[:5])
+
+
+def test_filters_and_embeddings(tmp_path: Path) -> None:
+    """Only rows in the basket are returned; unknown books never match."""
+    embeddings = np.eye(4, dtype=np.float32)
+    _write_store(tmp_path, embeddings, [3, 12, -1, 40])
+    store = NumpyVectorService.load(tmp_path, mmap=False)
+
+    hits = asyncio.run(
+        store.similarity_search(
+            [0.0, 0.0, 1.0, 0.0],
+            limit=3,
+            filters=SearchFilter(pitaka=Pitaka.SUTTA),
+            with_embedding=True,
+        )
+    )
+
+    assert [hit.id for hit in hits] == ["2"]
+    assert np.frombuffer(hits[0].embedding, dtype="<f4").tolist() == [0, 1, 0, 0]
+
+
+def test_payloads_are_packed_and_memory_mapped(tmp_path: Path) -> None:
+    """Payloads round-trip through the packed file without being parsed at load."""
+    _write_store(tmp_path, np.eye(3, dtype=np.float32), [1, 2, 3])
+    offsets = [0]
+    payloads = [{"header": "ධම්මපදය", "contents": ["නමෝ"]}, {}, {"book": 3}]
+    with (tmp_path / "payloads.bin").open("wb") as handle:
+        write_payloads(handle, payloads, offsets)
+    np.save(tmp_path / "payload_offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+    store = NumpyVectorService.load(tmp_path)
+
+    assert isinstance(store._payloads, PackedPayloads)
+    assert isinstance(store._embeddings, np.memmap)
+    assert list(store._payloads) == payloads
+    assert store._payloads[-1] == {"book": 3}
+    hits = asyncio.run(store.similarity_search([1.0, 0.0, 0.0], limit=1))
+    assert hits[0].payload == payloads[0]
+
+
+def test_new_export_replaces_the_store_without_touching_mapped_files(
+    tmp_path: Path,
+) -> None:
+    """A loaded store keeps its rows; the stale IVF index goes with the old export."""
+    out, staging = tmp_path / "store", tmp_path / "staging"
+    out.mkdir()
+    staging.mkdir()
+    _write_store(out, np.eye(3, dtype=np.float32), [1, 2, 3])
+    (out / "ivf.json").write_text("{}", encoding="utf-8")
+    _write_store(staging, np.eye(3, dtype=np.float32)[::-1], [3, 2, 1])
+    live = NumpyVectorService.load(out)
+
+    replace_store(staging, out)
+
+    assert not staging.exists()
+    assert not (out / "ivf.json").exists()
+    assert [p.name for p in tmp_path.iterdir()] == ["store"]
+    assert asyncio.run(live.similarity_search([1.0, 0.0, 0.0], limit=1))[0].id == "1"
+    reloaded = NumpyVectorService.load(out)
+    assert asyncio.run(reloaded.similarity_search([1.0, 0.0, 0.0], limit=1))[0].id == "3"
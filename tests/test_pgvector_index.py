@@ -0,0 +1,138 @@
+"""Tests for ANN index management and per-query search tuning."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.enums import VectorDistance, VectorIndexType, VectorStorage
+from app.services.vectorstores import SearchOptions
+from app.services.vectorstores.pgvector.indexes import (
+    IndexDimensionsError,
+    check_index_dimensions,
+    create_index,
+    create_index_sql,
+    default_lists,
+    list_indexes,
+)
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+
+
+def test_index_ddl_matches_distance_and_storage() -> None:
+    """The operator class follows the configured distance and column type."""
+    hnsw = create_index_sql(
+        VectorIndexType.HNSW,
+        VectorDistance.INNER_PRODUCT,
+        VectorStorage.HALFVEC,
+        m=24,
+        ef_construction=100,
+    )
+    ivfflat = create_index_sql(
+        VectorIndexType.IVFFLAT, VectorDistance.COSINE, VectorStorage.VECTOR, lists=30
+    )
+
+    assert "CONCURRENTLY" in hnsw
+    assert "USING hnsw (embedding halfvec_ip_ops)" in hnsw
+    assert "WITH (m = 24, ef_construction = 100)" in hnsw
+    assert "USING ivfflat (embedding vector_cosine_ops) WITH (lists = 30)" in ivfflat
+    assert default_lists(30_000) == 30
+    assert default_lists(4_000_000) == 2000
+
+
+def test_columns_wider_than_pgvector_indexes_are_rejected() -> None:
+    """3072-d vectors point to dimension reduction or halfvec; 768-d pass."""
+    check_index_dimensions(768, VectorStorage.VECTOR)
+    check_index_dimensions(3072, VectorStorage.HALFVEC)
+
+    with pytest.raises(IndexDimensionsError, match="--reduce-dimensions") as error:
+        check_index_dimensions(3072, VectorStorage.VECTOR)
+    assert "--storage halfvec" in str(error.value)
+    with pytest.raises(IndexDimensionsError, match="declared dimensions"):
+        check_index_dimensions(None, VectorStorage.HALFVEC)
+
+
+def test_inner_product_orders_by_operator_and_reports_cosine_distance() -> None:
+    """Ordering uses ``<#>`` so the index applies; the score stays a distance."""
+    repository = PgVectorRepository(None, distance=VectorDistance.INNER_PRODUCT)
+
+    sql = str(
+        repository._build_similarity_query([0.6, 0.8], limit=3).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert "ORDER BY my_items.embedding <#>" in sql
+    assert "+ (my_items.embedding <#>" in sql
+
+
+class _RecordingSession:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, stmt: object) -> None:
+        compiled = stmt.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        self.statements.append(str(compiled))
+
+
+def test_search_options_are_transaction_local() -> None:
+    """Only the options that are set are applied, with ``set_config(..., true)``."""
+    session = _RecordingSession()
+
+    asyncio.run(
+        PgVectorRepository._apply_options(session, SearchOptions(ef_search=80))
+    )
+
+    assert session.statements == [
+        "SELECT set_config('hnsw.ef_search', '80', true) AS set_config_1"
+    ]
+
+
+class _CatalogConnection:
+    """Connection answering the catalog queries of ``create_index``."""
+
+    def __init__(self, storage: str) -> None:
+        self.storage = storage
+        self.statements: list[tuple[str, dict[str, Any] | None]] = []
+
+    async def __aenter__(self) -> "_CatalogConnection":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execution_options(self, **options: Any) -> "_CatalogConnection":
+        return self
+
+    async def scalar(self, stmt: Any, params: dict[str, Any] | None = None) -> None:
+        # No index of that name exists yet.
+        return None
+
+    async def execute(self, stmt: Any, params: dict[str, Any] | None = None) -> Any:
+        self.statements.append((str(stmt), params))
+        return SimpleNamespace(one=lambda: (self.storage, 768), all=lambda: [])
+
+
+def test_create_index_uses_the_column_storage_from_the_catalog(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A halfvec column gets halfvec ops even when settings say vector."""
+    monkeypatch.setattr(settings, "VECTOR_STORAGE", VectorStorage.VECTOR)
+    conn = _CatalogConnection("halfvec")
+    bind = SimpleNamespace(connect=lambda: conn)
+
+    name = asyncio.run(
+        create_index(bind, VectorIndexType.HNSW, VectorDistance.COSINE)  # type: ignore[arg-type]
+    )
+    asyncio.run(list_indexes(bind))  # type: ignore[arg-type]
+
+    ddl = conn.statements[-2][0]
+    assert name == "my_items_embedding_hnsw_cosine_ops"
+    assert ddl.startswith(f"CREATE INDEX CONCURRENTLY {name} ON my_items")
+    assert "(embedding halfvec_cosine_ops)" in ddl
+    # Both catalog lookups resolve the table the same (quoted) way.
+    assert conn.statements[0][1] == conn.statements[-1][1] == {"table": "my_items"}
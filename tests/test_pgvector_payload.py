@@ -0,0 +1,127 @@
+"""Tests for the typed page payload of the PGVector model."""
+
+import asyncio
+import struct
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.enums import ReplayMode, VectorStorage
+from app.services.embeddings import pack, unpack
+from app.services.recording import Recorder
+from app.services.vectorstores import VectorSearchResult
+from app.services.vectorstores.pgvector import service
+from app.services.vectorstores.pgvector.models import (
+    PgVectorDocument,
+    build_payload,
+    parse_description,
+)
+from app.services.vectorstores.pgvector.repository import (
+    PgVectorRepository,
+    SimilarityHit,
+    decode_embedding,
+)
+
+PAGE = {
+    "book": 19,
+    "page": 1,
+    "header": "พระไตรปิฎกเล่มที่ ๑๙",
+    "contents": ["๑. อวิชชาสูตร", "[๑] ข้าพเจ้าได้สดับมาอย่างนี้"],
+    "footnotes": ["๑ คำว่า ข้าพเจ้า"],
+}
+
+
+def test_payload_reads_typed_columns_without_parsing() -> None:
+    """Backfilled rows map straight to the payload; description is ignored."""
+    document = PgVectorDocument(id=1, description="not a dict", embedding=[0.0], **PAGE)
+
+    assert document.payload() == PAGE
+
+
+def test_payload_falls_back_to_description() -> None:
+    """Rows written before the migration are parsed from their description."""
+    document = PgVectorDocument(id=2, description=str(PAGE), embedding=[0.0])
+
+    assert parse_description(str(PAGE)) == PAGE
+    assert document.payload() == PAGE
+
+
+def test_projected_rows_build_payload() -> None:
+    """Search rows carry only the payload columns; description only when needed."""
+    row = SimpleNamespace(id=3, description=None, **PAGE)
+    legacy = SimpleNamespace(
+        id=4,
+        description=str(PAGE),
+        book=None,
+        page=None,
+        header=None,
+        contents=None,
+        footnotes=None,
+    )
+
+    assert build_payload(row) == PAGE
+    assert build_payload(legacy) == PAGE
+
+
+def test_binary_embeddings_decode_to_packed_float32() -> None:
+    """pgvector's send format (big-endian, 4-byte header) becomes packed float32."""
+    values = [0.5, -1.25, 2.0]
+    vector_blob = struct.pack(">hh3f", 3, 0, *values)
+    halfvec_blob = struct.pack(">hh3e", 3, 0, *values)
+
+    for blob, storage in (
+        (vector_blob, VectorStorage.VECTOR),
+        (halfvec_blob, VectorStorage.HALFVEC),
+    ):
+        np.testing.assert_array_equal(unpack(decode_embedding(blob, storage)), values)
+
+
+def test_similarity_query_does_not_select_the_embedding() -> None:
+    """Only the binary-encoded vector is selected, and only on request."""
+    repository = PgVectorRepository(None)
+    plain = repository._build_similarity_query([0.1, 0.2], limit=3)
+    full = repository._build_similarity_query([0.1, 0.2], limit=3, with_embedding=True)
+
+    assert "embedding" not in plain.selected_columns
+    assert "vector_send(my_items.embedding) AS embedding" in str(
+        full.compile(dialect=postgresql.dialect())
+    )
+
+
+class _FakeRepository:
+    def __init__(self) -> None:
+        self.hit = SimilarityHit(7, 0.25, {"book": 19}, pack([0.5, -1.25]))
+
+    async def similarity_search(self, *args: Any, **kwargs: Any) -> list:
+        return [self.hit]
+
+    async def similarity_search_many(self, embeddings: Any, **kwargs: Any) -> list:
+        return [[self.hit] for _ in embeddings]
+
+
+def test_results_skip_cassette_records_unless_recording(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Hits map straight to results; only a recording run serializes them."""
+    store = service.PgVectorService(_FakeRepository())
+    expected = VectorSearchResult("7", 0.25, {"book": 19}, pack([0.5, -1.25]))
+
+    def _fail(hit: object) -> dict:
+        raise AssertionError("hits must not be serialized when not recording")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(service, "_to_record", _fail)
+        assert asyncio.run(store.similarity_search([0.1], limit=1)) == [expected]
+
+    monkeypatch.setattr(
+        service, "recorder", Recorder(mode=ReplayMode.RECORD, cassette_dir=tmp_path)
+    )
+    assert asyncio.run(store.similarity_search([0.1], limit=1)) == [expected]
+    assert asyncio.run(store.similarity_search_many([[0.1], [0.2]], limit=1)) == [
+        [expected],
+        [expected],
+    ]
@@ -0,0 +1,62 @@
+"""Tests for per-worker memory reporting."""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.core.extra.process_memory import ProcessMemoryCollector, memory_usage
+
+SMAPS_ROLLUP = """\
+55d0c2a4b000-7ffd8b5f6000 ---p 00000000 00:00 0                          [rollup]
+Rss:              204800 kB
+Pss:              120000 kB
+Shared_Clean:     150000 kB
+Shared_Dirty:       4800 kB
+Private_Clean:     10000 kB
+Private_Dirty:     40000 kB
+Swap:                  0 kB
+"""
+
+
+def test_memory_usage_splits_shared_and_private(tmp_path: Path) -> None:
+    """Clean and dirty pages are summed into shared and private bytes."""
+    path = tmp_path / "smaps_rollup"
+    path.write_text(SMAPS_ROLLUP)
+
+    usage = memory_usage(path)
+
+    assert usage == {
+        "rss": 204800 * 1024,
+        "pss": 120000 * 1024,
+        "shared": 154800 * 1024,
+        "private": 50000 * 1024,
+    }
+    assert memory_usage(tmp_path / "missing") == {}
+
+
+def test_collector_reads_smaps_rollup_once_per_scrape(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Every kind of one scrape comes from a single read of the file."""
+    path = tmp_path / "smaps_rollup"
+    path.write_text(SMAPS_ROLLUP)
+    reads: list[Path] = []
+    read_text = Path.read_text
+
+    def counted(self: Path, *args: Any, **kwargs: Any) -> str:
+        reads.append(self)
+        return read_text(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", counted)
+
+    (family,) = ProcessMemoryCollector(path).collect()
+
+    assert reads == [path]
+    assert family.name == "process_memory_bytes"
+    assert {sample.labels["kind"]: sample.value for sample in family.samples} == {
+        "rss": 204800 * 1024,
+        "pss": 120000 * 1024,
+        "shared": 154800 * 1024,
+        "private": 50000 * 1024,
+    }
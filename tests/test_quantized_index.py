@@ -0,0 +1,105 @@
+"""Tests for the quantized IVF index over the in-memory store."""
+
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.core.enums import QuantizedCodes
+from app.services.embeddings import normalize_rows
+from app.services.vectorstores import SearchOptions
+from app.services.vectorstores.memory import (
+    IvfIndex,
+    IvfVectorService,
+    NumpyVectorService,
+)
+from app.services.vectorstores.memory.ivf import kmeans
+from app.services.vectorstores.memory.store import write_payloads
+
+
+def _write_store(root: Path, embeddings: np.ndarray) -> None:
+    rows = len(embeddings)
+    np.save(root / "embeddings.npy", normalize_rows(embeddings))
+    np.save(root / "ids.npy", np.arange(1, rows + 1, dtype=np.int64))
+    np.save(root / "books.npy", np.ones(rows, dtype=np.int32))
+    np.save(root / "pages.npy", np.arange(rows, dtype=np.int32))
+    offsets = [0]
+    with (root / "payloads.bin").open("wb") as handle:
+        payloads = ({"book": 1, "page": page} for page in range(rows))
+        write_payloads(handle, payloads, offsets)
+    np.save(root / "payload_offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+
+def _clustered(rows: int, dimensions: int, clusters: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(clusters, dimensions))
+    labels = np.arange(rows) % clusters
+    return (centres[labels] + 0.1 * rng.normal(size=(rows, dimensions))).astype(
+        np.float32
+    )
+
+
+def test_kmeans_separates_clusters() -> None:
+    """Rows drawn around three centres end up in three distinct clusters."""
+    data = normalize_rows(_clustered(300, 8, 3))
+
+    centroids = kmeans(data, 3, seed=1)
+
+    labels = np.argmax(data @ centroids.T, axis=1)
+    for cluster in range(3):
+        assert len(set(labels[cluster::3].tolist())) == 1
+    assert len(set(labels.tolist())) == 3
+
+
+@pytest.mark.parametrize("kind", list(QuantizedCodes))
+def test_probing_every_list_matches_exact_search(
+    tmp_path: Path, kind: QuantizedCodes
+) -> None:
+    """With every list probed and a full rescoring shortlist, results are exact."""
+    embeddings = _clustered(240, 32, 6)
+    _write_store(tmp_path, embeddings)
+    IvfIndex.build(np.load(tmp_path / "embeddings.npy"), lists=6, kind=kind).save(
+        tmp_path
+    )
+    exact = NumpyVectorService.load(tmp_path)
+    ivf = IvfVectorService.load(tmp_path, nprobe=6, rescore=240)
+    queries = np.random.default_rng(2).normal(size=(4, 32))
+
+    expected = asyncio.run(exact.similarity_search_many(queries, limit=5))
+    found = asyncio.run(ivf.similarity_search_many(queries, limit=5))
+
+    for hits, reference in zip(found, expected, strict=True):
+        assert [hit.id for hit in hits] == [hit.id for hit in reference]
+        assert np.allclose(
+            [hit.score for hit in hits], [hit.score for hit in reference], atol=1e-6
+        )
+
+
+def test_probes_option_and_codes_round_trip(tmp_path: Path) -> None:
+    """A saved index reloads unchanged; one probe still finds the query's own row."""
+    embeddings = _clustered(120, 16, 4)
+    _write_store(tmp_path, embeddings)
+    index = IvfIndex.build(np.load(tmp_path / "embeddings.npy"), lists=4)
+    index.save(tmp_path)
+    loaded = IvfIndex.load(tmp_path, mmap=False)
+    assert loaded.kind == QuantizedCodes.INT8
+    assert np.array_equal(loaded.codes, index.codes)
+    assert np.array_equal(loaded.offsets, index.offsets)
+
+    ivf = IvfVectorService(
+        index=loaded,
+        nprobe=4,
+        ids=np.arange(1, 121, dtype=np.int64),
+        embeddings=normalize_rows(embeddings),
+        books=np.ones(120, dtype=np.int32),
+        pages=np.arange(120, dtype=np.int32),
+        payloads=[{}] * 120,
+    )
+    hits = asyncio.run(
+        ivf.similarity_search(
+            embeddings[7], limit=3, options=SearchOptions(probes=1)
+        )
+    )
+    assert hits[0].id == "8"
+    assert hits[0].score == pytest.approx(0.0, abs=1e-6)
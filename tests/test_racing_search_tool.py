@@ -0,0 +1,126 @@
+"""Tests for racing web search providers."""
+
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from langchain_core.tools import BaseTool
+from pydantic import ValidationError
+
+from app.workflows.graphs.rag.components import websearch_executor
+from app.workflows.graphs.rag.components.websearch_executor import WebSearchExecutor
+from app.workflows.graphs.rag.tools import RacingSearchTool
+from app.workflows.graphs.rag.tools.racing_search_tool import (
+    SEARCH_PROVIDER_CALLS_TOTAL,
+)
+
+
+class _FakeSearch(BaseTool):
+    name: str = "fake_search"
+    description: str = "Fake search provider"
+    delay: float = 0.0
+    count: int = 3
+    calls: int = 0
+
+    def _response(self, query: str) -> dict[str, Any]:
+        self.calls += 1
+        results = [{"content": f"{self.name} {i}"} for i in range(self.count)]
+        return {"results": results, "query": query}
+
+    def _run(self, query: str) -> dict[str, Any]:
+        time.sleep(self.delay)
+        return self._response(query)
+
+    async def _arun(self, query: str) -> dict[str, Any]:
+        await asyncio.sleep(self.delay)
+        return self._response(query)
+
+
+def test_first_good_result_wins() -> None:
+    """A fast but empty provider loses to a slower one with enough results."""
+    empty = _FakeSearch(name="empty", count=0)
+    slow = _FakeSearch(name="slow", delay=0.05)
+    slower = _FakeSearch(name="slower", delay=1.0)
+    tool = RacingSearchTool(providers={"empty": empty, "slow": slow, "slower": slower})
+
+    result = asyncio.run(tool.ainvoke({"query": "dukkha"}))
+    assert result["results"][0]["content"] == "slow 0"
+    assert slower.calls == 0  # cancelled
+
+    assert tool.invoke({"query": "dukkha"})["results"][0]["content"] == "slow 0"
+
+    stats = tool.stats()
+    assert stats["slow"].wins == 2
+    assert stats["empty"].wins == 0
+
+
+def test_adaptive_queries_the_best_provider_only() -> None:
+    """Adaptive mode sticks to the winner and races everyone when exploring."""
+    fast = _FakeSearch(name="fast")
+    slow = _FakeSearch(name="slow", delay=0.05)
+    tool = RacingSearchTool(
+        providers={"fast": fast, "slow": slow}, adaptive=True, explore_every=5
+    )
+
+    for _ in range(4):
+        tool.invoke({"query": "sila"})
+    time.sleep(0.1)  # let the first, raced call's loser finish
+    assert fast.calls == 4
+    assert slow.calls == 1
+
+    tool.invoke({"query": "sila"})  # fifth call explores
+    time.sleep(0.1)
+    assert slow.calls == 2
+
+
+def test_poor_results_fall_back_to_the_best_available() -> None:
+    """When no provider meets the quality bar the fullest result is used."""
+    one = _FakeSearch(name="one", count=1)
+    two = _FakeSearch(name="two", count=2)
+    tool = RacingSearchTool(providers={"one": one, "two": two})
+
+    assert len(tool.invoke({"query": "metta"})["results"]) == 2
+
+
+def _calls(provider: str, outcome: str) -> float:
+    return float(
+        SEARCH_PROVIDER_CALLS_TOTAL.labels(provider=provider, outcome=outcome)._value.get()
+    )
+
+
+def test_sync_losers_already_running_are_late_not_cancelled() -> None:
+    """A started thread cannot be cancelled; it is recorded when it finishes."""
+    fast = _FakeSearch(name="sync-fast")
+    slow = _FakeSearch(name="sync-slow", delay=0.05)
+    tool = RacingSearchTool(providers={"sync-fast": fast, "sync-slow": slow})
+
+    tool.invoke({"query": "sati"})
+    time.sleep(0.1)
+
+    assert _calls("sync-slow", "cancelled") == 0
+    assert _calls("sync-slow", "late") == 1
+    assert tool.stats()["sync-slow"].calls == 1
+
+
+def test_explore_every_must_be_positive() -> None:
+    """``explore_every=0`` would divide by zero when ranking providers."""
+    with pytest.raises(ValidationError):
+        RacingSearchTool(providers={"a": _FakeSearch()}, explore_every=0)
+
+
+def test_websearch_node_awaits_the_racing_tool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The async graph node races on the event loop and cancels the loser."""
+    fast = _FakeSearch(name="node-fast")
+    slow = _FakeSearch(name="node-slow", delay=1.0)
+    tool = RacingSearchTool(providers={"node-fast": fast, "node-slow": slow})
+    monkeypatch.setattr(websearch_executor, "SEARCH_TOOL", tool)
+    state: Any = {"refined_questions": ["anicca", "dukkha"], "refined_question": ""}
+
+    started = time.perf_counter()
+    update = asyncio.run(WebSearchExecutor().asearch(state))
+
+    assert time.perf_counter() - started < 0.5
+    assert len(update["search_results"]) == 6
+    assert _calls("node-slow", "cancelled") == 2
+    assert slow.calls == 0
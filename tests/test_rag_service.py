@@ -0,0 +1,121 @@
+"""Tests for multi-query retrieval in the RAG service."""
+
+import asyncio
+from collections.abc import Sequence
+from types import SimpleNamespace
+from typing import Any
+
+from app.services.embeddings import pack
+from app.services.vectorstores import SearchFilter, SearchOptions, VectorSearchResult
+from app.workflows.pipelines import RagService
+
+
+class _FakeEmbeddings:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    async def embed_content(self, *, model: str, contents: list[str]) -> Any:
+        self.calls.append(contents)
+        return SimpleNamespace(
+            embeddings=[
+                SimpleNamespace(values=[float(len(text)), 1.0]) for text in contents
+            ]
+        )
+
+
+class _FakeVectorService:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.options: SearchOptions | None = None
+
+    async def similarity_search_many(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[list[VectorSearchResult]]:
+        self.calls += 1
+        self.options = options
+        return [
+            [
+                VectorSearchResult(id="shared", score=0.1 * (index + 1), payload={}),
+                VectorSearchResult(id=f"only-{index}", score=0.5, payload={}),
+            ]
+            for index, _ in enumerate(embeddings)
+        ]
+
+
+def test_run_many_batches_and_merges() -> None:
+    """Queries share one embedding call and one search; duplicates keep the best."""
+    embeddings = _FakeEmbeddings()
+    vector_service = _FakeVectorService()
+    client = SimpleNamespace(aio=SimpleNamespace(models=embeddings))
+    service = RagService(vector_service=vector_service, client=client)
+
+    results = asyncio.run(service.run_many(["อริยสัจ", "มรรค"], top_k=2))
+
+    assert embeddings.calls == [["อริยสัจ", "มรรค"]]
+    assert vector_service.calls == 1
+    assert [(r["id"], r["score"]) for r in results] == [
+        ("shared", 0.1),
+        ("only-0", 0.5),
+        ("only-1", 0.5),
+    ]
+
+
+def test_search_options_reach_the_vector_store() -> None:
+    """Per-query ANN tuning is passed through to the store unchanged."""
+    vector_service = _FakeVectorService()
+    client = SimpleNamespace(aio=SimpleNamespace(models=_FakeEmbeddings()))
+    service = RagService(vector_service=vector_service, client=client)
+    options = SearchOptions(ef_search=80)
+
+    asyncio.run(service.run_many(["sati"], options=options))
+
+    assert vector_service.options is options
+
+
+class _DuplicateVectorService:
+    def __init__(self) -> None:
+        self.requests: list[tuple[int, bool]] = []
+
+    async def similarity_search(
+        self,
+        embedding: Sequence[float],
+        *,
+        limit: int,
+        options: SearchOptions | None = None,
+        filters: SearchFilter | None = None,
+        with_embedding: bool = False,
+    ) -> list[VectorSearchResult]:
+        self.requests.append((limit, with_embedding))
+        vectors = {"a": [0.95, 0.31], "a-copy": [0.94, 0.34], "b": [0.8, -0.6]}
+        return [
+            VectorSearchResult(
+                id=key,
+                score=float(1 - vector[0]),
+                payload={},
+                embedding=pack(vector) if with_embedding else None,
+            )
+            for key, vector in vectors.items()
+        ]
+
+
+def test_mmr_fetches_candidates_and_drops_near_duplicates() -> None:
+    """With MMR a wider set is fetched with embeddings and diversified to top_k."""
+    vector_service = _DuplicateVectorService()
+    client = SimpleNamespace(aio=SimpleNamespace(models=_FakeEmbeddings()))
+    service = RagService(
+        vector_service=vector_service,
+        client=client,
+        mmr_lambda=0.5,
+        mmr_candidates=10,
+    )
+
+    results = asyncio.run(service.query_vector_database([1.0, 0.0], top_k=2))
+
+    assert vector_service.requests == [(10, True)]
+    assert [result["id"] for result in results] == ["a", "b"]
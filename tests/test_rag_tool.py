@@ -0,0 +1,158 @@
+"""Tests for retrieval through the RAG tool on the application's event loop."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+
+from app.core import lifespan as lifespan_module
+from app.core.enums import Pitaka
+from app.workflows.graphs.rag.components import rag_executor
+from app.workflows.graphs.rag.components.rag_executor import RagExecutor
+from app.workflows.graphs.rag.graph import RagAgentGraph
+from app.workflows.graphs.rag.tools import rag_tool as rag_tool_module
+from app.workflows.graphs.rag.tools.rag_tool import RagTool
+
+HIT = {
+    "id": 10003,
+    "score": 0.1,
+    "payload": {
+        "book": 1,
+        "page": 3,
+        "header": "วินัยปิฎก",
+        "contents": ["ปฐมปาราชิกกัณฑ์"],
+        "footnotes": [],
+    },
+}
+
+
+class _FakeRagService:
+    def __init__(self) -> None:
+        self.calls: list[tuple[Any, Any]] = []
+        self.loops: list[asyncio.AbstractEventLoop] = []
+
+    async def run(self, query: str, **kwargs: Any) -> list[dict[str, Any]]:
+        self.calls.append((query, kwargs["filters"]))
+        self.loops.append(asyncio.get_running_loop())
+        return [HIT]
+
+    async def run_many(self, queries: list[str], **kwargs: Any) -> list[dict[str, Any]]:
+        return await self.run(queries, **kwargs)  # type: ignore[arg-type]
+
+
+def _tool() -> tuple[RagTool, _FakeRagService]:
+    tool = RagTool(client=SimpleNamespace(), vector_service=SimpleNamespace())  # type: ignore[arg-type]
+    service = _FakeRagService()
+    tool._service = service  # type: ignore[assignment]
+    return tool, service
+
+
+def test_arun_retrieves_on_the_calling_loop() -> None:
+    """``ainvoke`` runs on the app's loop; sync calls from threads join it."""
+    tool, service = _tool()
+
+    async def serve() -> tuple[dict[str, Any], dict[str, Any]]:
+        awaited = await tool.ainvoke({"query": "ปาราชิก", "pitaka": "vinaya"})
+        threaded = await asyncio.to_thread(tool.invoke, {"query": "สังฆาทิเสส"})
+        return awaited, threaded
+
+    awaited, threaded = asyncio.run(serve())
+
+    assert awaited["results"][0]["header"] == "วินัยปิฎก"
+    assert threaded["results"][0]["id"] == 10003
+    assert service.calls[0][1].pitaka is Pitaka.VINAYA
+    assert service.calls[1][1] is None
+    assert service.loops[0] is service.loops[1]
+
+
+def test_script_runs_release_their_connections(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Without an app loop each call disposes the pools bound to its own loop."""
+    tool, service = _tool()
+    disposed: list[asyncio.AbstractEventLoop] = []
+
+    async def dispose_engines() -> None:
+        disposed.append(asyncio.get_running_loop())
+
+    monkeypatch.setattr(rag_tool_module, "dispose_engines", dispose_engines)
+
+    tool.invoke({"query": "ปาราชิก"})
+    tool.invoke({"query": "สังฆาทิเสส"})
+
+    assert disposed == service.loops
+    assert disposed[0] is not disposed[1]
+    assert tool._loop is None
+
+
+class _FakeRagTool:
+    def __init__(self) -> None:
+        self.requests: list[dict[str, Any]] = []
+        self.threads: list[int] = []
+
+    async def ainvoke(self, request: dict[str, Any]) -> dict[str, Any]:
+        self.requests.append(request)
+        self.threads.append(threading.get_ident())
+        return {"results": [{"content": ["ปฐมปาราชิกกัณฑ์"]}, {"content": []}]}
+
+    def invoke(self, request: dict[str, Any]) -> dict[str, Any]:
+        raise AssertionError("the async node must not block on the sync tool")
+
+
+def test_executor_asearch_batches_the_enhanced_questions(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """All enhanced questions go to the tool as one awaited request."""
+    tool = _FakeRagTool()
+    monkeypatch.setattr(rag_executor, "RAG_TOOL", tool)
+    state: Any = {"refined_questions": ["anicca", "dukkha"], "pitaka": "sutta"}
+
+    update = asyncio.run(RagExecutor().asearch(state))
+
+    assert tool.requests == [{"query": ["anicca", "dukkha"], "pitaka": "sutta"}]
+    assert update == {"search_results": [{"content": ["ปฐมปาราชิกกัณฑ์"]}]}
+
+
+def test_graph_retrieval_node_awaits_the_tool(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The compiled graph's async path runs retrieval on the event loop thread."""
+    tool = _FakeRagTool()
+    monkeypatch.setattr(rag_executor, "RAG_TOOL", tool)
+    node = RagAgentGraph().workflow.nodes["retrieval"].runnable
+    state: Any = {"refined_questions": [], "refined_question": "anatta"}
+
+    async def run() -> tuple[dict[str, Any], int]:
+        return await node.ainvoke(state), threading.get_ident()
+
+    update, loop_thread = asyncio.run(run())
+
+    assert tool.requests == [{"query": "anatta", "pitaka": "all"}]
+    assert tool.threads == [loop_thread]
+    assert len(update["search_results"]) == 1
+
+
+def test_lifespan_closes_the_tool_before_the_engines(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Shutdown closes the RAG tool's clients, then disposes the engines."""
+    events: list[str] = []
+
+    async def record(event: str) -> None:
+        events.append(event)
+
+    monkeypatch.setattr(lifespan_module, "init_rate_limiter", lambda: record("init"))
+    monkeypatch.setattr(lifespan_module, "warm_up_pools", lambda: record("warm"))
+    monkeypatch.setattr(lifespan_module, "dispose_engines", lambda: record("dispose"))
+    monkeypatch.setattr(
+        lifespan_module, "RAG_TOOL", SimpleNamespace(aclose=lambda: record("aclose"))
+    )
+
+    async def serve() -> None:
+        async with lifespan_module.lifespan(FastAPI()):
+            events.append("serving")
+
+    asyncio.run(serve())
+
+    assert events == ["init", "warm", "serving", "aclose", "dispose"]
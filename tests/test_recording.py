@@ -0,0 +1,71 @@
+"""Tests for the record/replay layer used to benchmark offline."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.core.enums import ReplayLatency, ReplayMode
+from app.services.recording import CassetteMissError, Recorder
+
+
+def test_record_then_replay(tmp_path: Path) -> None:
+    """Recorded responses are served back in replay mode without calling out."""
+    request = {"query": "อริยสัจ ๔", "max_results": 3}
+
+    recording = Recorder(mode=ReplayMode.RECORD, cassette_dir=tmp_path)
+    assert recording.call("duckduckgo", request, lambda: [{"body": "x"}]) == [
+        {"body": "x"}
+    ]
+
+    replaying = Recorder(
+        mode=ReplayMode.REPLAY,
+        cassette_dir=tmp_path,
+        latency_profile=ReplayLatency.NONE,
+    )
+
+    def _fail() -> list[dict[str, str]]:
+        raise AssertionError("backend must not be called in replay mode")
+
+    assert replaying.call("duckduckgo", request, _fail) == [{"body": "x"}]
+
+    async def _afail() -> list[dict[str, str]]:
+        raise AssertionError("backend must not be called in replay mode")
+
+    assert asyncio.run(replaying.acall("duckduckgo", request, _afail)) == [
+        {"body": "x"}
+    ]
+
+    with pytest.raises(CassetteMissError):
+        replaying.call("duckduckgo", {"query": "other", "max_results": 3}, _fail)
+
+
+def test_replay_key_ignores_timestamps() -> None:
+    """Prompts that only differ by the injected current time share a key."""
+    first = {"contents": "Current time: 2025-01-01 10:00:00"}
+    second = {"contents": "Current time: 2026-10-19 07:37:12"}
+
+    assert Recorder.make_key("gemini", first) == Recorder.make_key("gemini", second)
+
+
+def test_latency_profiles(tmp_path: Path) -> None:
+    """Replay delay follows the recorded latency, a fixed value, or nothing."""
+    recording = Recorder(mode=ReplayMode.RECORD, cassette_dir=tmp_path)
+    recording.call("embedding", {"text": "a"}, lambda: {"embeddings": [0.1]})
+    entry = recording.cassette("embedding").find(
+        Recorder.make_key("embedding", {"text": "a"})
+    )
+    assert entry is not None
+
+    scaled = Recorder(
+        mode=ReplayMode.REPLAY, cassette_dir=tmp_path, latency_scale=2.0
+    )
+    fixed = Recorder(
+        mode=ReplayMode.REPLAY,
+        cassette_dir=tmp_path,
+        latency_profile=ReplayLatency.FIXED,
+        fixed_latency_ms={"embedding": 250.0},
+    )
+
+    assert scaled.replay_delay("embedding", entry) == pytest.approx(entry.latency * 2)
+    assert fixed.replay_delay("embedding", entry) == pytest.approx(0.25)
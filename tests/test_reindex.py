@@ -0,0 +1,160 @@
+"""Tests for the blue/green reindex of the vector table."""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Sequence
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import pytest
+
+from app.core.enums import VectorDistance, VectorStorage
+from app.services.vectorstores.pgvector.ingest import COLUMNS, _embedding_service
+from app.services.vectorstores.pgvector.reindex import (
+    Validation,
+    _transformed,
+    sample_recall,
+    swap_statements,
+)
+
+
+def test_swap_renames_tables_and_indexes_in_order() -> None:
+    """The live table and its indexes retire before the shadow takes their names."""
+    statements = swap_statements(
+        "my_items",
+        "my_items_shadow",
+        "my_items_previous",
+        live_indexes=["my_items_pkey", "my_items_embedding_hnsw_cosine_ops"],
+        replacement_indexes=["my_items_shadow_pkey", "unrelated_idx"],
+    )
+
+    assert statements == [
+        "DROP TABLE IF EXISTS my_items_previous",
+        "LOCK TABLE my_items, my_items_shadow IN ACCESS EXCLUSIVE MODE",
+        "ALTER TABLE my_items RENAME TO my_items_previous",
+        "ALTER INDEX my_items_pkey RENAME TO my_items_previous_pkey",
+        "ALTER INDEX my_items_embedding_hnsw_cosine_ops "
+        "RENAME TO my_items_previous_embedding_hnsw_cosine_ops",
+        "ALTER TABLE my_items_shadow RENAME TO my_items",
+        "ALTER INDEX my_items_shadow_pkey RENAME TO my_items_pkey",
+    ]
+
+
+def test_validation_blocks_incomplete_or_low_recall_tables() -> None:
+    """Row count mismatches, invalid indexes and low recall prevent the swap."""
+    assert Validation(10, 10, [], 0.95).errors(0.9) == []
+
+    problems = Validation(10, 9, ["my_items_shadow_pkey"], 0.5).errors(0.9)
+
+    assert len(problems) == 3
+
+
+def test_rows_are_truncated_to_new_dimensions() -> None:
+    """Embeddings are cut to ``dimensions`` and renormalized; other columns pass."""
+
+    async def batches() -> AsyncIterator[list[list[Any]]]:
+        for start in (1, 3):
+            yield [
+                [row_id, f"page {row_id}", np.array([3.0, 4.0, 5.0], np.float32)]
+                + [None] * (len(COLUMNS) - 3)
+                for row_id in (start, start + 1)
+            ]
+
+    async def collect() -> list[tuple[Any, ...]]:
+        rows = _transformed(batches(), dimensions=2, embed=None, concurrency=2)
+        return [row async for row in rows]
+
+    rows = asyncio.run(collect())
+
+    assert [row[0] for row in rows] == [1, 2, 3, 4]
+    assert np.allclose(rows[0][COLUMNS.index("embedding")], [0.6, 0.8])
+
+
+def test_reembedded_rows_match_the_shadow_column() -> None:
+    """``--reembed --dimensions`` sizes new embeddings for the shadow column."""
+    requested: list[Any] = []
+
+    async def embed_content(
+        model: str, contents: list[str], **kwargs: Any
+    ) -> SimpleNamespace:
+        requested.append(kwargs["config"].output_dimensionality)
+        # The model's native size; the service reduces it.
+        embedding = SimpleNamespace(values=[3.0, 4.0, 5.0])
+        return SimpleNamespace(embeddings=[embedding] * len(contents))
+
+    models = SimpleNamespace(embed_content=embed_content)
+    client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    service = _embedding_service(client, dimensions=2)  # type: ignore[arg-type]
+    embed = service.calculate_embeddings
+
+    async def batches() -> AsyncIterator[list[list[Any]]]:
+        yield [
+            [row_id, f"page {row_id}", np.zeros(4, np.float32)]
+            + [None] * (len(COLUMNS) - 3)
+            for row_id in (1, 2)
+        ]
+
+    async def collect() -> list[tuple[Any, ...]]:
+        rows = _transformed(batches(), dimensions=None, embed=embed, concurrency=1)
+        return [row async for row in rows]
+
+    rows = asyncio.run(collect())
+
+    assert requested == [2]
+    for row in rows:
+        assert np.allclose(row[COLUMNS.index("embedding")], [0.6, 0.8])
+
+
+class _RecallConnection:
+    """Samples two rows; the ANN search misses one of the exact matches."""
+
+    def __init__(self, storage: VectorStorage) -> None:
+        self.storage = storage
+        self.searches: list[tuple[Any, ...]] = []
+
+    def transaction(self) -> Any:
+        return self
+
+    async def __aenter__(self) -> Any:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def execute(self, *args: Any) -> str:
+        return "SELECT 1"
+
+    async def fetch(self, sql: str, *args: Any) -> list[dict[str, Any]]:
+        if "random()" in sql:
+            dtype = ">f4" if self.storage == VectorStorage.VECTOR else ">f2"
+            return [
+                {"embedding": b"\x00\x03\x00\x00" + row.astype(dtype).tobytes()}
+                for row in np.eye(2, 3)
+            ]
+        self.searches.append(args)
+        found = [1, 2, 3, 4] if len(self.searches) == 1 else [1, 2, 3]
+        return [{"query_index": 1 + (i > 2), "id": i} for i in found]
+
+
+@pytest.mark.parametrize("storage", list(VectorStorage))
+def test_recall_queries_bind_as_pgvector_values(
+    bind_similarity_args: Callable[[str, Sequence[Any]], bytes],
+    storage: VectorStorage,
+) -> None:
+    """Sampled rows are sent as a ``vector[]`` asyncpg can encode."""
+    conn = _RecallConnection(storage)
+
+    recall = asyncio.run(
+        sample_recall(
+            conn,
+            "my_items_shadow",
+            distance=VectorDistance.COSINE,
+            storage=storage,
+            samples=2,
+            k=2,
+        )
+    )
+
+    assert recall == 0.75
+    for args in conn.searches:
+        assert bind_similarity_args(storage.value, args).startswith(b"B")
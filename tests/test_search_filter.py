@@ -0,0 +1,50 @@
+"""Tests for metadata-filtered vector search."""
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.enums import Pitaka, VectorDistance, VectorIndexType, VectorStorage
+from app.services.vectorstores import SearchFilter
+from app.services.vectorstores.pgvector.indexes import create_index_sql
+from app.services.vectorstores.pgvector.repository import PgVectorRepository
+from app.workflows.graphs.rag.tools.rag_tool import _search_filter
+
+
+def _sql(filters: SearchFilter) -> str:
+    stmt = PgVectorRepository(None)._build_similarity_query(
+        [0.1, 0.2], limit=5, filters=filters
+    )
+    compiled = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+    )
+    return str(compiled)
+
+
+def test_pitaka_and_book_range_intersect() -> None:
+    """A book range inside a basket is narrowed to both."""
+    assert SearchFilter(pitaka=Pitaka.SUTTA).book_range() == (9, 33)
+    narrowed = SearchFilter(pitaka=Pitaka.SUTTA, book_min=5, book_max=12)
+    assert narrowed.book_range() == (9, 12)
+    assert SearchFilter(page_min=3).book_range() == (None, None)
+
+
+def test_filter_bounds_match_the_partial_index_predicate() -> None:
+    """Bounds are inlined in the same form as the per-pitaka index predicate."""
+    sql = _sql(SearchFilter(pitaka=Pitaka.VINAYA, page_max=40))
+    ddl = create_index_sql(
+        VectorIndexType.HNSW,
+        VectorDistance.COSINE,
+        VectorStorage.VECTOR,
+        pitaka=Pitaka.VINAYA,
+    )
+
+    assert "my_items.book >= 1 AND my_items.book <= 8 AND my_items.page <= 40" in sql
+    assert ddl.endswith("WHERE book >= 1 AND book <= 8")
+    assert "_hnsw_cosine_ops_vinaya" in ddl
+
+
+def test_tool_treats_all_as_no_filter() -> None:
+    """The rewriter's "all" searches the whole corpus."""
+    assert _search_filter("all", None, None, None, None) is None
+    assert _search_filter("abhidhamma", None, None, None, None) == SearchFilter(
+        pitaka=Pitaka.ABHIDHAMMA
+    )